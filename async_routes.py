@@ -0,0 +1,111 @@
+import aiomysql
+import pymysql
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.routing import APIRoute
+
+from criteria_cache import criteria_cache
+from data_versions import NO_SUCH_TABLE, VERSIONS_QUERY, parse_versions
+from db_async import get_async_read_db, is_primary
+from formatters import format_location, format_criteria, format_location_page, group_evaluations
+from http_cache import response_cache
+from location_filters import LocationQuery, location_query
+import queries
+
+# Handler GET versi async def; endpoint tulis tetap memakai handler sync
+router = APIRouter()
+
+
+async def fetch_all(conn, query, args=None):
+    async with conn.cursor(aiomysql.DictCursor) as cursor:
+        await cursor.execute(query, args)
+        return await cursor.fetchall()
+
+
+async def load_versions(conn):
+    """Versi data_versions (lihat data_versions.load_versions)"""
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(VERSIONS_QUERY)
+            return parse_versions(await cursor.fetchall())
+    except pymysql.err.ProgrammingError as e:
+        if e.args[0] != NO_SUCH_TABLE:
+            raise
+        return None
+
+
+@router.get("/locations")
+async def get_locations(request: Request, query: LocationQuery = Depends(location_query),
+                        conn=Depends(get_async_read_db)):
+    try:
+        validators = response_cache.validators(request, await load_versions(conn), ('locations', 'evaluations'))
+        cached = response_cache.cached(request, validators)
+        if cached is not None:
+            return cached
+        
+        rows = await fetch_all(conn, *query.locations_sql())
+        
+        evaluations = []
+        if query.include_criteria and rows:
+            evaluations = await fetch_all(conn, *query.evaluations_sql(rows[-1]['id']))
+        return response_cache.render(request, validators, format_location_page(query, rows, evaluations))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/locations/{location_id}")
+async def get_location(location_id: int, conn=Depends(get_async_read_db)):
+    try:
+        # Location + evaluations dalam satu query
+        rows = await fetch_all(conn, queries.LOCATION_WITH_EVALUATIONS, (location_id,))
+        found = group_evaluations(rows).get(location_id)
+        if not found:
+            raise HTTPException(status_code=404, detail="Location not found")
+        
+        return format_location(*found)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/criteria")
+async def get_criteria(request: Request, conn=Depends(get_async_read_db)):
+    try:
+        versions = await load_versions(conn)
+        validators = response_cache.validators(request, versions, ('criteria',))
+        cached = response_cache.cached(request, validators)
+        if cached is not None:
+            return cached
+        
+        # Body dari versi yang sama dengan ETag-nya
+        criteria = criteria_cache.peek(versions)
+        if criteria is None:
+            criteria = await fetch_all(conn, queries.ALL_CRITERIA)
+            if is_primary(conn):
+                criteria_cache.fill(criteria, versions)
+            criteria = format_criteria(list(criteria))
+        return response_cache.render(request, validators, criteria)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/evaluations")
+async def get_evaluations(request: Request, conn=Depends(get_async_read_db)):
+    try:
+        validators = response_cache.validators(request, await load_versions(conn), ('locations', 'criteria', 'evaluations'))
+        cached = response_cache.cached(request, validators)
+        if cached is not None:
+            return cached
+        return response_cache.render(request, validators, await fetch_all(conn, queries.EVALUATIONS_WITH_NAMES))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def use_async_routes(app):
+    """Ganti route GET sync dengan versi async pada posisi yang sama"""
+    replacements = {
+        (route.path, frozenset(route.methods)): route
+        for route in router.routes if isinstance(route, APIRoute)
+    }
+    for index, route in enumerate(app.router.routes):
+        if isinstance(route, APIRoute):
+            replacement = replacements.get((route.path, frozenset(route.methods)))
+            if replacement is not None:
+                app.router.routes[index] = replacement
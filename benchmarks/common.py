@@ -0,0 +1,63 @@
+"""Helper bersama script benchmark: statistik latensi dan penyimpanan hasil JSON"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Root repo, supaya script di benchmarks/ bisa import modul aplikasi
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    """mean / p50 / p95 / p99 / max dalam milidetik dari list detik"""
+    latencies = sorted(latencies)
+    return {
+        "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99": round(percentile(latencies, 0.99) * 1000, 3),
+        "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_metadata():
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(path, kind, config, results):
+    """Tulis {kind, metadata, config, results} ke path (jika ada) dan kembalikan dict-nya"""
+    data = {"kind": kind, "metadata": run_metadata(), "config": config, "results": results}
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2, default=str)
+    return data
@@ -0,0 +1,83 @@
+"""Benchmark konkurensi untuk membandingkan mode sync dan async
+
+Jalankan server dua kali lalu bandingkan hasilnya:
+
+    DB_ASYNC=false python main_normalized.py
+    python benchmarks/concurrency.py --url http://localhost:8000 --concurrency 1000
+
+    DB_ASYNC=true python main_normalized.py
+    python benchmarks/concurrency.py --url http://localhost:8000 --concurrency 1000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from common import percentile
+
+
+async def run(url, paths, concurrency, total):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "url": url,
+        "paths": paths,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark konkurensi endpoint GET")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="Endpoint yang diuji (boleh berulang), default /criteria dan /locations")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.paths or ["/criteria", "/locations"], args.concurrency, args.requests))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
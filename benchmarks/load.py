@@ -0,0 +1,318 @@
+"""Load test semua endpoint API dengan klien konkuren
+
+Tiap endpoint dijalankan terpisah (warm-up dulu, lalu --requests request
+dengan --concurrency klien) dan dilaporkan throughput, latensi
+p50/p95/p99, ukuran response dan jumlah query DB per request:
+
+- ``statements_per_request`` dari header X-DB-Statements (server dijalankan
+  dengan DB_STATEMENT_HEADER=true; query yang diukur aplikasi, lihat metrics.py)
+- ``db_queries_per_request`` dari selisih status ``Questions`` MySQL jika
+  --db-stats dipakai (semua query server, termasuk dari klien lain)
+
+    python benchmarks/seed.py --database tofico_bench --locations 100000 --criteria 20
+    DB_NAME=tofico_bench DB_STATEMENT_HEADER=true python main_normalized.py
+    python benchmarks/load.py --concurrency 50 --requests 2000 --db-stats --output results/run.json
+
+Endpoint tulis mengubah data (nilai evaluasi acak; lokasi dan kriteria
+baru dihapus lagi lewat DELETE yang ikut diukur; lokasi hasil import
+dihapus dan evaluasi yang dihapus diisi lagi dengan nilai acak tanpa
+diukur); jalankan hanya terhadap database benchmark, atau pakai
+--read-only.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+import httpx
+
+from common import latency_summary, save_results
+
+DEFAULT_SAMPLE = 1000
+# Baris per request import; lokasi hasil import dikenali dari awalan namanya
+IMPORT_ROWS = 100
+IMPORT_NAME = "Benchmark Import"
+RESTORE_CHUNK = 1000
+
+
+class Context:
+    """Id lokasi/kriteria contoh dari server, dipakai untuk membuat request acak"""
+
+    def __init__(self, locations, criteria, seed):
+        self.locations = locations
+        self.criteria = criteria
+        self.rng = random.Random(seed)
+
+    def location(self):
+        return self.rng.choice(self.locations)
+
+    def criteria_id(self):
+        return self.rng.choice(self.criteria)['id']
+
+    def point(self):
+        location = self.location()
+        return location['latitude'], location['longitude']
+
+
+def _nearby(ctx, path):
+    lat, lng = ctx.point()
+    return ("GET", f"{path}?lat={lat}&lng={lng}&radius_km=10", None)
+
+
+def _bbox(ctx):
+    lat, lng = ctx.point()
+    return f"{lng - 0.1},{lat - 0.1},{lng + 0.1},{lat + 0.1}"
+
+
+def _evaluation(ctx):
+    return {"location_id": ctx.location()['id'], "criteria_id": ctx.criteria_id(), "value": ctx.rng.randint(0, 100)}
+
+
+def _locations_csv(ctx):
+    lines = ["name,address,latitude,longitude"]
+    for i in range(IMPORT_ROWS):
+        lat, lng = ctx.point()
+        lines.append(f"{IMPORT_NAME} {i},Benchmark,{lat},{lng}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _evaluations_ndjson(ctx):
+    return "".join(json.dumps(_evaluation(ctx)) + "\n" for _ in range(IMPORT_ROWS)).encode()
+
+
+def _criteria(ctx):
+    return {"id": f"bench_{ctx.rng.getrandbits(48):012x}", "name": "Benchmark", "weight": 0.1, "type": "benefit"}
+
+
+# nama → (tulis?, fungsi(ctx) → (method, path, body)); body dict dikirim sebagai JSON, bytes apa adanya
+ENDPOINTS = {
+    "root": (False, lambda ctx: ("GET", "/", None)),
+    "health": (False, lambda ctx: ("GET", "/health", None)),
+    "health_live": (False, lambda ctx: ("GET", "/health/live", None)),
+    "health_ready": (False, lambda ctx: ("GET", "/health/ready", None)),
+    "metrics": (False, lambda ctx: ("GET", "/metrics", None)),
+    "criteria_list": (False, lambda ctx: ("GET", "/criteria", None)),
+    "locations_page": (False, lambda ctx: (
+        "GET", f"/locations?limit=100&after={ctx.location()['id'] - 1}", None)),
+    "locations_bbox": (False, lambda ctx: ("GET", f"/locations?bbox={_bbox(ctx)}&fields=id,name", None)),
+    "location_detail": (False, lambda ctx: ("GET", f"/locations/{ctx.location()['id']}", None)),
+    "locations_batch": (False, lambda ctx: (
+        "POST", "/locations/batch", {"ids": [ctx.location()['id'] for _ in range(100)]})),
+    "locations_nearby": (False, lambda ctx: _nearby(ctx, "/locations/nearby")),
+    "locations_export": (False, lambda ctx: ("GET", f"/locations/export?bbox={_bbox(ctx)}", None)),
+    "evaluations_list": (False, lambda ctx: ("GET", "/evaluations", None)),
+    "matrix_json": (False, lambda ctx: ("GET", "/matrix", None)),
+    "matrix_binary": (False, lambda ctx: ("GET", "/matrix?format=binary", None)),
+    "rankings_full": (False, lambda ctx: ("GET", "/rankings", None)),
+    "rankings_top10": (False, lambda ctx: ("GET", "/rankings?limit=10", None)),
+    "rankings_topsis_top10": (False, lambda ctx: ("GET", "/rankings?algorithm=topsis&limit=10", None)),
+    "rankings_nearby": (False, lambda ctx: _nearby(ctx, "/rankings/nearby")),
+    "rankings_consensus": (False, lambda ctx: ("GET", "/rankings/consensus?algorithms=saw,wp,topsis", None)),
+    "rankings_sensitivity": (False, lambda ctx: (
+        "POST", "/rankings/sensitivity", {"samples": 100, "limit": 10, "seed": ctx.rng.randint(0, 1 << 30)})),
+    "evaluation_put": (True, lambda ctx: ("PUT", "/evaluations", _evaluation(ctx))),
+    "evaluations_batch": (True, lambda ctx: (
+        "PUT", "/evaluations/batch", {"evaluations": [_evaluation(ctx) for _ in range(100)]})),
+    "location_put": (True, lambda ctx: (
+        "PUT", f"/locations/{ctx.location()['id']}", {"name": f"Lokasi {ctx.location()['id']}"})),
+    "criteria_put": (True, lambda ctx: (
+        "PUT", f"/criteria/{ctx.criteria_id()}", {"name": f"Kriteria {ctx.criteria_id()}"})),
+    "location_create": (True, lambda ctx: ("POST", "/locations", {
+        "name": "Benchmark", "address": "Benchmark", "latitude": ctx.point()[0], "longitude": ctx.point()[1]})),
+    "criteria_create": (True, lambda ctx: ("POST", "/criteria", _criteria(ctx))),
+    "evaluation_delete": (True, lambda ctx: (
+        "DELETE", f"/evaluations/{ctx.location()['id']}/{ctx.criteria_id()}", None)),
+    "locations_import": (True, lambda ctx: ("POST", "/locations/import?format=csv", _locations_csv(ctx))),
+    "evaluations_import": (True, lambda ctx: ("POST", "/evaluations/import?format=ndjson", _evaluations_ndjson(ctx))),
+}
+# Data dari endpoint pembuat dihapus lagi lewat endpoint berikut (ikut diukur): pembuat → (nama, fungsi(id))
+DELETE_ENDPOINTS = {
+    "location_create": ("location_delete", lambda location_id: ("DELETE", f"/locations/{location_id}", None)),
+    "criteria_create": ("criteria_delete", lambda criteria_id: ("DELETE", f"/criteria/{criteria_id}", None)),
+}
+
+
+class DatabaseStats:
+    """Counter Questions global MySQL (butuh akses DB yang sama dengan server)"""
+
+    def __init__(self, database=None):
+        import mysql.connector
+        from db_config_normalized import DB_CONFIG
+
+        config = dict(DB_CONFIG)
+        if database:
+            config["database"] = database
+        self.connection = mysql.connector.connect(**config)
+
+    def questions(self):
+        cursor = self.connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        value = int(cursor.fetchone()[1])
+        cursor.close()
+        # Query SHOW ini sendiri ikut terhitung
+        return value - 1
+
+    def close(self):
+        self.connection.close()
+
+
+async def load_context(client, sample, seed):
+    criteria = (await client.get("/criteria")).json()
+    page = (await client.get(f"/locations?limit={sample}&fields=id,latitude,longitude")).json()
+    locations = page["items"] if isinstance(page, dict) else page
+    if not criteria or not locations:
+        raise SystemExit("Database is empty - run benchmarks/seed.py first")
+    return Context(locations, criteria, seed)
+
+
+async def drive(client, ctx, name, build, total, concurrency):
+    """Kirim total request dengan concurrency worker; statistik mentah"""
+    latencies = []
+    sizes = []
+    statements = []
+    statuses = Counter()
+    created = []
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, path, body = build(ctx)
+            started = time.perf_counter()
+            try:
+                if isinstance(body, bytes):
+                    response = await client.request(method, path, content=body)
+                else:
+                    response = await client.request(method, path, json=body)
+                content = response.content
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            sizes.append(len(content))
+            header = response.headers.get("x-db-statements")
+            if header is not None:
+                statements.append(int(header))
+            if response.status_code == 200:
+                if name in DELETE_ENDPOINTS:
+                    created.append(response.json()["id"])
+                elif name == "evaluation_delete":
+                    # (location_id, criteria_id) yang diisi lagi setelah pengukuran
+                    created.append(tuple(path.split("/")[2:4]))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, sizes, statements, statuses, created, time.perf_counter() - started
+
+
+def summarize(total, latencies, sizes, statements, statuses, elapsed, questions=None):
+    errors = sum(count for status, count in statuses.items() if not isinstance(status, int) or status >= 400)
+    return {
+        "requests": total,
+        "errors": errors,
+        "status": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": latency_summary(latencies),
+        "response_bytes_mean": round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+        "statements_per_request": round(sum(statements) / len(statements), 3) if statements else None,
+        "db_queries_per_request": round(questions / total, 3) if questions is not None and total else None,
+    }
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    db_stats = DatabaseStats(args.database) if args.db_stats else None
+    results = {}
+    try:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+            ctx = await load_context(client, args.sample, args.seed)
+            names = args.endpoints or [
+                name for name, (write, _) in ENDPOINTS.items() if not (write and args.read_only)
+            ]
+            for name in names:
+                _, build = ENDPOINTS[name]
+                print(f"{name} ...", flush=True)
+                if args.warmup:
+                    *_, warm_created, _ = await drive(client, ctx, name, build, args.warmup, args.concurrency)
+                    await cleanup(client, ctx, name, warm_created)
+
+                before = db_stats.questions() if db_stats else None
+                latencies, sizes, statements, statuses, created, elapsed = await drive(
+                    client, ctx, name, build, args.requests, args.concurrency
+                )
+                questions = db_stats.questions() - before if db_stats else None
+                results[name] = summarize(args.requests, latencies, sizes, statements, statuses, elapsed, questions)
+
+                if created and name in DELETE_ENDPOINTS:
+                    # Hapus data yang dibuat, sekaligus jadi benchmark DELETE-nya
+                    delete_name, delete_request = DELETE_ENDPOINTS[name]
+                    ids = iter(created)
+                    delete = lambda ctx: delete_request(next(ids))  # noqa: E731
+                    before = db_stats.questions() if db_stats else None
+                    outcome = await drive(client, ctx, delete_name, delete, len(created),
+                                          min(args.concurrency, len(created)))
+                    latencies, sizes, statements, statuses, _, elapsed = outcome
+                    questions = db_stats.questions() - before if db_stats else None
+                    results[delete_name] = summarize(len(created), latencies, sizes, statements, statuses,
+                                                     elapsed, questions)
+                else:
+                    await cleanup(client, ctx, name, created)
+    finally:
+        if db_stats:
+            db_stats.close()
+    return results
+
+
+async def cleanup(client, ctx, name, created):
+    """Kembalikan data yang diubah endpoint tulis (tidak diukur)"""
+    if name in DELETE_ENDPOINTS:
+        _, delete_request = DELETE_ENDPOINTS[name]
+        for item in created:
+            method, path, _ = delete_request(item)
+            await client.request(method, path)
+    elif name == "evaluation_delete":
+        rows = [{"location_id": int(location_id), "criteria_id": criteria_id, "value": ctx.rng.randint(0, 100)}
+                for location_id, criteria_id in created]
+        for start in range(0, len(rows), RESTORE_CHUNK):
+            await client.put("/evaluations/batch", json={"evaluations": rows[start:start + RESTORE_CHUNK]})
+    elif name == "locations_import":
+        while True:
+            page = (await client.get("/locations", params={"name_prefix": IMPORT_NAME, "fields": "id",
+                                                            "limit": RESTORE_CHUNK})).json()
+            items = page["items"] if isinstance(page, dict) else page
+            deleted = 0
+            for item in items:
+                deleted += (await client.delete(f"/locations/{item['id']}")).status_code == 200
+            if not deleted:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test semua endpoint API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", action="append", dest="endpoints", choices=sorted(ENDPOINTS),
+                        help="Endpoint yang diuji (boleh berulang), default semua")
+    parser.add_argument("--read-only", action="store_true", help="Lewati endpoint tulis")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000, help="Request per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="Request warm-up per endpoint (tidak diukur)")
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE, help="Jumlah lokasi contoh untuk request acak")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--db-stats", action="store_true", help="Ukur query DB per request dari status Questions")
+    parser.add_argument("--database", help="Database untuk --db-stats (default DB_NAME)")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    data = save_results(args.output, "load", vars(args), results)
+    print(json.dumps(data, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Micro-benchmark kode scoring dan serialisasi tanpa server/database
+
+Matriks keputusan sintetis dibuat di memori, lalu tiap fungsi dijalankan
+--repeat kali (setelah satu panggilan warm-up) dan dilaporkan waktu
+terbaik, median dan rata-rata dalam milidetik.
+
+    python benchmarks/micro.py --locations 100000 --criteria 20 --output results/micro.json
+    python benchmarks/micro.py --group serialization --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+from common import save_results
+from consensus import consensus_ranking
+from decision_matrix import DecisionMatrix
+from incremental_ranking import IncrementalRanking
+from matrix_encoding import matrix_binary, matrix_json
+from ranking_cache import partial_ranking
+from scoring import ALGORITHMS, ScoringContext, rank_order, ranking_rows, saw_top_k, select_top
+import sensitivity
+import serialization
+
+TOP_K = 10
+SENSITIVITY_SAMPLES = 100
+INCREMENTAL_UPDATES = 1000
+
+
+def synthetic_matrix(n, m, density=1.0, seed=42):
+    """DecisionMatrix acak n lokasi × m kriteria (nilai 0-100 seperti evaluations)"""
+    rng = np.random.default_rng(seed)
+    present = rng.random((n, m)) < density
+    values = np.where(present, rng.integers(0, 101, size=(n, m)), 0).astype(np.float64)
+    return DecisionMatrix(
+        location_ids=np.arange(1, n + 1, dtype=np.int64),
+        location_names=[f"Lokasi {i}" for i in range(1, n + 1)],
+        criteria_ids=[f"c{j:03d}" for j in range(1, m + 1)],
+        weights=np.round(rng.uniform(0.05, 1.0, m), 3),
+        is_benefit=rng.random(m) < 0.7,
+        values=values,
+        present=present,
+    )
+
+
+def measure(function, repeat):
+    """Statistik waktu (ms) dari repeat kali panggilan setelah satu warm-up"""
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return {
+        "best_ms": round(min(timings) * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "repeat": repeat,
+    }
+
+
+def scoring_cases(matrix):
+    context = ScoringContext(matrix)
+    cases = {"scoring_context": lambda: ScoringContext(matrix)}
+    for name, algorithm in ALGORITHMS.items():
+        # Context baru per panggilan: hasil normalisasi di-cache di dalamnya
+        cases[f"scores_{name}"] = lambda algorithm=algorithm: algorithm(ScoringContext(matrix))
+
+    scores = ALGORITHMS['saw'](context)
+    cases["rank_order"] = lambda: rank_order(scores)
+    cases["select_top"] = lambda: select_top(scores, limit=TOP_K)
+    cases["saw_top_k"] = lambda: saw_top_k(ScoringContext(matrix), TOP_K)
+    cases["partial_ranking_saw"] = lambda: partial_ranking(matrix, 'saw', limit=TOP_K)
+    cases["partial_ranking_topsis"] = lambda: partial_ranking(matrix, 'topsis', limit=TOP_K)
+    order = rank_order(scores)
+    cases["ranking_rows"] = lambda: ranking_rows(matrix, scores, order)
+    cases["consensus_borda"] = lambda: consensus_ranking(ScoringContext(matrix), list(ALGORITHMS), 'borda')
+
+    scenarios = sensitivity.dirichlet_scenarios(matrix.weights, SENSITIVITY_SAMPLES, seed=0)
+    basis, signs = sensitivity.scoring_basis(matrix, 'saw')
+    cases["sensitivity_dirichlet"] = lambda: sensitivity.rank_statistics(basis, signs, scenarios)
+    return cases
+
+
+def incremental_cases(matrix, seed):
+    cases = {"incremental_build": lambda: IncrementalRanking(matrix)}
+    ranking = IncrementalRanking(matrix)
+    rng = np.random.default_rng(seed)
+    n, m = matrix.shape
+    updates = list(zip(
+        matrix.location_ids[rng.integers(0, n, INCREMENTAL_UPDATES)].tolist(),
+        [matrix.criteria_ids[j] for j in rng.integers(0, m, INCREMENTAL_UPDATES).tolist()],
+        rng.integers(0, 101, INCREMENTAL_UPDATES).tolist(),
+    ))
+
+    def set_values():
+        for location_id, criteria_id, value in updates:
+            ranking.set_value(location_id, criteria_id, value)
+
+    cases[f"incremental_set_value_x{INCREMENTAL_UPDATES}"] = set_values
+    cases["incremental_top_k"] = lambda: ranking.rows('saw', limit=TOP_K)
+    return cases
+
+
+def serialization_cases(matrix):
+    scores = ALGORITHMS['saw'](ScoringContext(matrix))
+    order = rank_order(scores)
+    payload = {"algorithm": "saw", "count": len(order), "results": ranking_rows(matrix, np.round(scores, 6), order)}
+    criteria_names = {criteria_id: criteria_id for criteria_id in matrix.criteria_ids}
+
+    cases = {
+        "json_stdlib": lambda: json.dumps(payload).encode("utf-8"),
+        "json_dumps": lambda: serialization.dumps(payload),
+        "columnar": lambda: serialization.encode(payload, serialization.COLUMNAR),
+        "matrix_json": lambda: serialization.dumps(matrix_json(matrix, criteria_names)),
+        "matrix_binary_float32": lambda: matrix_binary(matrix, criteria_names, "float32"),
+    }
+    if serialization.msgpack is not None:
+        cases["msgpack"] = lambda: serialization.encode(payload, serialization.MSGPACK)
+    sizes = {
+        "json": len(serialization.dumps(payload)),
+        "columnar": len(serialization.encode(payload, serialization.COLUMNAR)),
+        "matrix_json": len(serialization.dumps(matrix_json(matrix, criteria_names))),
+        "matrix_binary_float32": len(matrix_binary(matrix, criteria_names, "float32")),
+    }
+    if serialization.msgpack is not None:
+        sizes["msgpack"] = len(serialization.encode(payload, serialization.MSGPACK))
+    return cases, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark scoring dan serialisasi")
+    parser.add_argument("--locations", type=int, default=10000)
+    parser.add_argument("--criteria", type=int, default=10)
+    parser.add_argument("--density", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--group", action="append", dest="groups",
+                        choices=("scoring", "incremental", "serialization"), help="Default semua grup")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    matrix = synthetic_matrix(args.locations, args.criteria, args.density, args.seed)
+    groups = args.groups or ["scoring", "incremental", "serialization"]
+    results = {}
+    for group in groups:
+        if group == "scoring":
+            cases = scoring_cases(matrix)
+        elif group == "incremental":
+            cases = incremental_cases(matrix, args.seed)
+        else:
+            cases, sizes = serialization_cases(matrix)
+            results["payload_bytes"] = sizes
+        for name, function in cases.items():
+            print(f"{name} ...", flush=True)
+            results[name] = measure(function, args.repeat)
+
+    data = save_results(args.output, "micro", vars(args), results)
+    print(json.dumps(data, indent=2))
+
+
+if __name__ == "__main__":
+    main()
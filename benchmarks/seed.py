@@ -0,0 +1,155 @@
+"""Isi database benchmark dengan data sintetis
+
+Tabel dibuat dari scripts/create_database_normalized.sql (nama database
+diganti), lalu dikosongkan dan diisi lokasi × kriteria acak yang
+deterministik untuk --seed yang sama. Koneksi memakai DB_HOST / DB_USER /
+DB_PASSWORD / DB_PORT dari .env; server MySQL/MariaDB lokal apa pun cukup.
+
+    python benchmarks/seed.py --database tofico_bench --locations 100000 --criteria 20
+    DB_NAME=tofico_bench python main_normalized.py
+"""
+import argparse
+import json
+import os
+import time
+
+import mysql.connector
+import numpy as np
+
+from common import ROOT, save_results
+from data_versions import bump_versions
+from db_config_normalized import DB_CONFIG
+
+SCHEMA_PATH = os.path.join(ROOT, "scripts", "create_database_normalized.sql")
+SCHEMA_DATABASE = "tofico_analyzer"
+CHUNK_SIZE = 5000
+# Kotak kira-kira wilayah Indonesia
+LAT_RANGE = (-11.0, 6.0)
+LNG_RANGE = (95.0, 141.0)
+BENEFIT_SHARE = 0.7
+TABLES = ("calculation_results", "evaluations", "locations", "criteria")
+# data_versions tidak dikosongkan tapi dinaikkan, supaya ETag / snapshot matriks dari isi lama tidak dianggap masih berlaku
+RESOURCES = ("locations", "criteria", "evaluations")
+
+
+def schema_statements(database):
+    """Statement skema dengan nama database diganti; baris komentar dibuang"""
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as file:
+        script = file.read().replace(SCHEMA_DATABASE, database)
+    for statement in script.split(";"):
+        lines = [line for line in statement.splitlines() if not line.strip().startswith("--")]
+        statement = "\n".join(lines).strip()
+        if statement:
+            yield statement
+
+
+def create_schema(cursor, database):
+    for statement in schema_statements(database):
+        cursor.execute(statement)
+
+
+def seed_criteria(cursor, rng, count):
+    criteria_ids = [f"c{j:03d}" for j in range(1, count + 1)]
+    weights = np.round(rng.uniform(0.05, 1.0, count), 3).tolist()
+    types = np.where(rng.random(count) < BENEFIT_SHARE, "benefit", "cost").tolist()
+    cursor.executemany(
+        "INSERT INTO criteria (id, name, weight, type) VALUES (%s, %s, %s, %s)",
+        [(criteria_id, f"Kriteria {criteria_id}", weight, kind)
+         for criteria_id, weight, kind in zip(criteria_ids, weights, types)],
+    )
+    return criteria_ids
+
+
+def seed_chunk(cursor, rng, start, stop, criteria_ids, density):
+    """Lokasi id start..stop-1 beserta evaluasinya; jumlah evaluasi yang ditulis"""
+    count = stop - start
+    ids = list(range(start, stop))
+    lats = np.round(rng.uniform(*LAT_RANGE, count), 8).tolist()
+    lngs = np.round(rng.uniform(*LNG_RANGE, count), 8).tolist()
+    cursor.executemany(
+        "INSERT INTO locations (id, name, address, latitude, longitude) VALUES (%s, %s, %s, %s, %s)",
+        [(location_id, f"Lokasi {location_id}", f"Jalan Benchmark {location_id}", lat, lng)
+         for location_id, lat, lng in zip(ids, lats, lngs)],
+    )
+
+    values = rng.integers(0, 101, size=(count, len(criteria_ids)))
+    present = rng.random((count, len(criteria_ids))) < density
+    rows, columns = np.nonzero(present)
+    evaluations = [
+        (ids[i], criteria_ids[j], value)
+        for i, j, value in zip(rows.tolist(), columns.tolist(), values[rows, columns].tolist())
+    ]
+    for offset in range(0, len(evaluations), CHUNK_SIZE):
+        cursor.executemany(
+            "INSERT INTO evaluations (location_id, criteria_id, value) VALUES (%s, %s, %s)",
+            evaluations[offset:offset + CHUNK_SIZE],
+        )
+    return len(evaluations)
+
+
+def seed(connection, database, locations, criteria, density, seed_value):
+    rng = np.random.default_rng(seed_value)
+    cursor = connection.cursor()
+    started = time.perf_counter()
+
+    create_schema(cursor, database)
+    cursor.execute(f"USE `{database}`")
+    # Data dibuat sendiri dan konsisten, jadi cek FK / unique bisa dimatikan selama seeding
+    cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+    for table in TABLES:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    schema_s = time.perf_counter() - started
+
+    criteria_ids = seed_criteria(cursor, rng, criteria)
+    evaluations = 0
+    for start in range(1, locations + 1, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, locations + 1)
+        connection.start_transaction()
+        evaluations += seed_chunk(cursor, rng, start, stop, criteria_ids, density)
+        connection.commit()
+        print(f"  {stop - 1}/{locations} lokasi", end="\r", flush=True)
+    bump_versions(cursor, *RESOURCES)
+
+    cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+    cursor.close()
+    elapsed = time.perf_counter() - started
+    print()
+    return {
+        "locations": locations,
+        "criteria": criteria,
+        "evaluations": evaluations,
+        "schema_s": round(schema_s, 3),
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round((locations + evaluations) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed data sintetis untuk benchmark")
+    parser.add_argument("--database", default="tofico_bench",
+                        help="Database tujuan (dibuat jika belum ada, isinya DIHAPUS)")
+    parser.add_argument("--locations", type=int, default=1000)
+    parser.add_argument("--criteria", type=int, default=5)
+    parser.add_argument("--density", type=float, default=1.0, help="Bagian sel lokasi × kriteria yang terisi")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Simpan ringkasan sebagai JSON")
+    args = parser.parse_args()
+
+    if args.database == SCHEMA_DATABASE:
+        parser.error(f"refusing to overwrite the application database '{SCHEMA_DATABASE}'")
+    if not (0 < args.density <= 1):
+        parser.error("--density must be in (0, 1]")
+
+    config = {key: value for key, value in DB_CONFIG.items() if key != "database"}
+    connection = mysql.connector.connect(**config)
+    try:
+        summary = seed(connection, args.database, args.locations, args.criteria, args.density, args.seed)
+    finally:
+        connection.close()
+
+    result = save_results(args.output, "seed", vars(args), summary)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import numpy as np
+
+from scoring import ALGORITHMS, rank_order
+
+METHODS = ('borda', 'copeland')
+# Copeland membandingkan semua pasangan lokasi (O(n²·k))
+COPELAND_MAX_LOCATIONS = 20000
+COPELAND_BLOCK = 256
+
+
+def algorithm_ranks(context, algorithms):
+    """Rank 1-based (k, n) tiap algoritma, dari satu ScoringContext bersama"""
+    n = context.matrix.shape[0]
+    ranks = np.empty((len(algorithms), n), dtype=np.int64)
+    for row, algorithm in enumerate(algorithms):
+        order = rank_order(ALGORITHMS[algorithm](context))
+        ranks[row, order] = np.arange(1, n + 1)
+    return ranks
+
+
+def borda_scores(ranks):
+    """Poin Borda (n - rank) dijumlahkan, dinormalisasi ke 0..1"""
+    k, n = ranks.shape
+    if n < 2:
+        return np.ones(n)
+    return (n - ranks).sum(axis=0) / (k * (n - 1))
+
+
+def copeland_scores(ranks):
+    """(menang - kalah) mayoritas per pasangan lokasi, dinormalisasi ke -1..1"""
+    k, n = ranks.shape
+    if n > COPELAND_MAX_LOCATIONS:
+        raise ValueError(f"Copeland supports at most {COPELAND_MAX_LOCATIONS} locations")
+    if n < 2:
+        return np.zeros(n)
+    scores = np.zeros(n, dtype=np.int64)
+    for start in range(0, n, COPELAND_BLOCK):
+        block = ranks[:, start:start + COPELAND_BLOCK, np.newaxis]
+        # Jumlah algoritma yang menempatkan lokasi baris di atas lokasi kolom
+        above = (block < ranks[:, np.newaxis, :]).sum(axis=0)
+        below = (block > ranks[:, np.newaxis, :]).sum(axis=0)
+        scores[start:start + COPELAND_BLOCK] = (above > below).sum(axis=1) - (below > above).sum(axis=1)
+    return scores / (n - 1)
+
+
+def consensus_ranking(context, algorithms, method):
+    """(scores, order, ranks) gabungan beberapa algoritma"""
+    ranks = algorithm_ranks(context, algorithms)
+    scores = borda_scores(ranks) if method == 'borda' else copeland_scores(ranks)
+    return scores, rank_order(scores), ranks
+
+
+def consensus_rows(matrix, algorithms, scores, order, ranks, decimals=6):
+    rows = []
+    ids = matrix.location_ids.tolist()
+    for position, index in enumerate(order.tolist(), start=1):
+        rows.append({
+            "rank": position,
+            "location_id": ids[index],
+            "name": matrix.location_names[index],
+            "score": round(float(scores[index]), decimals),
+            "ranks": {algorithm: int(ranks[row, index]) for row, algorithm in enumerate(algorithms)},
+        })
+    return rows
@@ -0,0 +1,168 @@
+import copy
+import os
+import threading
+import time
+
+from data_versions import load_versions, newer
+from formatters import format_criteria
+from metrics import track_query
+import queries
+
+# Umur maksimum cache (detik)
+CRITERIA_CACHE_TTL = float(os.getenv('CRITERIA_CACHE_TTL', 300))
+# Multi-worker: cek versi criteria di data_versions paling sering tiap N detik (0 = hanya TTL)
+CRITERIA_CACHE_CHECK_INTERVAL = float(os.getenv('CRITERIA_CACHE_CHECK_INTERVAL', 0))
+
+
+def criteria_version(versions):
+    """Versi criteria dari hasil load_versions; None jika tabel data_versions belum ada"""
+    return versions.get('criteria', (0, None)) if versions is not None else None
+
+
+class CriteriaCache:
+    """Cache seluruh tabel criteria per proses (read-through), diberi label versi data_versions
+
+    Pemanggil yang sudah membaca data_versions (GET /criteria, /matrix)
+    memberikan ``versions``: cache hanya dipakai jika versinya sama (atau
+    lebih baru, untuk replica yang tertinggal), jadi body selalu sesuai ETag.
+    Cache hanya diisi dari primary; miss di koneksi replica dibaca tanpa disimpan.
+    Tanpa ``versions`` cache dibaca ulang jika TTL habis, setelah
+    ``invalidate()``, atau - jika ``check_interval`` > 0 - ketika versi
+    criteria berubah karena write dari worker lain. Lookup per id adalah dict
+    hit; id yang tidak ditemukan memicu satu reload supaya kriteria baru dari
+    worker lain tidak ditolak. Versi lama tidak pernah menimpa versi yang lebih baru.
+    """
+
+    def __init__(self, ttl=CRITERIA_CACHE_TTL, check_interval=CRITERIA_CACHE_CHECK_INTERVAL):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rows = None
+        self._by_id = {}
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _expired(self, now):
+        return self._rows is None or now - self._loaded_at >= self.ttl
+
+    def _check_due(self, now):
+        return self.check_interval > 0 and now - self._checked_at >= self.check_interval
+
+    def _serves(self, version):
+        return self._rows is not None and version is not None and (
+            self._version == version or newer(self._version, version)
+        )
+
+    def _store(self, rows, version, now):
+        self._loaded_at = now
+        self._checked_at = now
+        if self._rows is not None and newer(self._version, version):
+            return  # baris dari replica yang tertinggal: isi cache lebih baru
+        self._rows = rows
+        self._by_id = {row['id']: row for row in self._rows}
+        self._version = version
+
+    def _read(self, conn, version=None):
+        """(rows, versi); versi dibaca lebih dulu, jadi isi rows tidak lebih tua dari label versinya"""
+        if version is None:
+            version = criteria_version(load_versions(conn))
+        cursor = conn.cursor(dictionary=True)
+        with track_query("all_criteria", queries.ALL_CRITERIA):
+            cursor.execute(queries.ALL_CRITERIA)
+            rows = cursor.fetchall()
+        cursor.close()
+        return format_criteria(list(rows)), version
+
+    def _load(self, conn, now):
+        self.misses += 1
+        self._store(*self._read(conn), now)
+
+    def _ensure(self, conn):
+        """True jika cache baru saja dibaca ulang"""
+        now = time.monotonic()
+        if self._expired(now):
+            self._load(conn, now)
+            return True
+        if self._check_due(now):
+            self._checked_at = now
+            if criteria_version(load_versions(conn)) != self._version:
+                self._load(conn, now)
+                return True
+        self.hits += 1
+        return False
+
+    def all(self, conn, versions=None, store=True):
+        """Semua kriteria urut nama (salinan, aman diubah pemanggil)
+
+        ``versions`` (hasil load_versions pemanggil) memastikan isi sesuai versi tersebut.
+        store=False (koneksi replica): baris yang dibaca tidak mengisi cache.
+        """
+        version = criteria_version(versions)
+        with self._lock:
+            if version is None and store:
+                self._ensure(conn)
+                return copy.deepcopy(self._rows)
+            if self._serves(version):
+                self.hits += 1
+                return copy.deepcopy(self._rows)
+            self.misses += 1
+            rows, version = self._read(conn, version)
+            if not store:
+                return rows
+            self._store(rows, version, time.monotonic())
+            return copy.deepcopy(rows)
+
+    def get(self, conn, criteria_id):
+        """Satu kriteria (salinan) atau None"""
+        with self._lock:
+            reloaded = self._ensure(conn)
+            row = self._by_id.get(criteria_id)
+            if row is None and not reloaded:
+                self._load(conn, time.monotonic())
+                row = self._by_id.get(criteria_id)
+            return dict(row) if row is not None else None
+
+    def exists(self, conn, criteria_id):
+        return self.get(conn, criteria_id) is not None
+
+    def peek(self, versions):
+        """Isi cache tanpa query (untuk handler async) jika sesuai ``versions``; None jika perlu dibaca"""
+        version = criteria_version(versions)
+        with self._lock:
+            if version is None:
+                now = time.monotonic()
+                if self._expired(now) or self._check_due(now):
+                    return None
+            elif not self._serves(version):
+                return None
+            self.hits += 1
+            return copy.deepcopy(self._rows)
+
+    def fill(self, rows, versions):
+        """Isi cache dari hasil query handler async (``versions`` dibaca sebelum rows)"""
+        with self._lock:
+            self.misses += 1
+            self._store(format_criteria(copy.deepcopy(list(rows))), criteria_version(versions), time.monotonic())
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = None
+            self._by_id = {}
+            self._version = None
+
+    def status(self):
+        with self._lock:
+            return {
+                "loaded": self._rows is not None,
+                "size": len(self._by_id),
+                "version": self._version[0] if self._version is not None else None,
+                "age_s": round(time.monotonic() - self._loaded_at, 3) if self._rows is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+criteria_cache = CriteriaCache()
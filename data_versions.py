@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+import mysql.connector
+
+from metrics import track_query
+
+# Versi per tabel yang dinaikkan oleh setiap write lewat API (dan import).
+# Dipakai sebagai validator ETag / Last-Modified tanpa memindai tabel datanya.
+VERSIONS_QUERY = "SELECT resource, version, UNIX_TIMESTAMP(updated_at) FROM data_versions"
+
+BUMP_PREFIX = "INSERT INTO data_versions (resource, version) VALUES "
+BUMP_SUFFIX = " ON DUPLICATE KEY UPDATE version = version + 1"
+
+# errno MySQL: tabel tidak ada (database lama sebelum migrasi)
+NO_SUCH_TABLE = 1146
+
+
+def bump_sql(count):
+    return BUMP_PREFIX + ", ".join(["(%s, 1)"] * count) + BUMP_SUFFIX
+
+
+def bump_versions(cursor, *resources):
+    """Naikkan versi resource yang berubah; diabaikan jika tabel data_versions belum ada"""
+    try:
+        cursor.execute(bump_sql(len(resources)), resources)
+    except mysql.connector.ProgrammingError as e:
+        if e.errno != NO_SUCH_TABLE:
+            raise
+
+
+def parse_versions(rows):
+    """{resource: (version, updated_at UTC)} dari hasil VERSIONS_QUERY"""
+    return {
+        resource: (version, datetime.fromtimestamp(float(updated_at), timezone.utc) if updated_at else None)
+        for resource, version, updated_at in rows
+    }
+
+
+def load_versions(conn):
+    """Versi semua resource, atau None jika tabel data_versions belum ada"""
+    cursor = conn.cursor()
+    try:
+        with track_query("data_versions", VERSIONS_QUERY):
+            cursor.execute(VERSIONS_QUERY)
+            rows = cursor.fetchall()
+        return parse_versions(rows)
+    except mysql.connector.ProgrammingError as e:
+        if e.errno != NO_SUCH_TABLE:
+            raise
+        return None
+    finally:
+        cursor.close()
+
+
+def follows(previous, current, resources):
+    """True jika current = previous setelah tepat satu bump untuk tiap resource di ``resources``
+
+    Resource lain harus sama persis; dipakai untuk memastikan cache di memori
+    tepat satu write di belakang versi yang dibaca di dalam transaksi write.
+    """
+    if previous is None or current is None:
+        return False
+    for resource in set(previous) | set(current):
+        before, after = previous.get(resource), current.get(resource)
+        if resource not in resources:
+            if before != after:
+                return False
+        elif after is None or after[0] != (before[0] if before is not None else 0) + 1:
+            return False
+    return True
+
+
+def newer(version, other):
+    """True jika versi satu resource (version, updated_at) lebih baru dari other
+
+    Dipakai supaya cache per proses tidak mundur ke versi replica yang
+    tertinggal. updated_at yang lebih baru pada versi lebih kecil berarti
+    database di-reset, jadi bukan "lebih baru".
+    """
+    if version is None or other is None:
+        return False
+    if version[1] is not None and other[1] is not None and version[1] < other[1]:
+        return False
+    return version[0] > other[0]
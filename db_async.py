@@ -0,0 +1,135 @@
+import asyncio
+
+import aiomysql
+from fastapi import Request
+
+from db_config_normalized import DB_CONFIG, POOL_CONFIG
+from replicas import WAIT_FOR_GTID, replica_router, request_token
+
+
+class AsyncDatabase:
+    """Pool aiomysql untuk handler ``async def`` (mode DB_ASYNC=true)
+
+    Ukuran, recycle, pre-ping dan checkout timeout mengikuti POOL_CONFIG
+    yang sama dengan pool sync. Request yang menunggu koneksi cukup
+    menunggu di event loop, tidak memakan thread dari threadpool.
+    """
+
+    def __init__(self, config, pool_size=5, max_overflow=10, recycle=3600, pre_ping=True, timeout=30):
+        self.config = config
+        self.minsize = pool_size
+        self.maxsize = pool_size + max_overflow
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+        self.pool = None
+        # id koneksi yang sedang dipinjam dari pool ini
+        self._borrowed = set()
+
+    async def open(self):
+        if self.pool is not None:
+            return
+        self.pool = await aiomysql.create_pool(
+            host=self.config['host'],
+            port=self.config['port'],
+            user=self.config['user'],
+            password=self.config['password'],
+            db=self.config['database'],
+            charset=self.config['charset'],
+            autocommit=self.config['autocommit'],
+            minsize=self.minsize,
+            maxsize=self.maxsize,
+            pool_recycle=self.recycle,
+        )
+
+    async def close(self):
+        if self.pool is None:
+            return
+        self.pool.close()
+        await self.pool.wait_closed()
+        self.pool = None
+
+    async def acquire(self):
+        connection = await asyncio.wait_for(self.pool.acquire(), timeout=self.timeout)
+        if self.pre_ping:
+            try:
+                await connection.ping(reconnect=True)
+            except BaseException:
+                self.pool.release(connection)
+                raise
+        self._borrowed.add(id(connection))
+        return connection
+
+    def release(self, connection):
+        self._borrowed.discard(id(connection))
+        self.pool.release(connection)
+
+    def owns(self, connection):
+        """True jika koneksi ini sedang dipinjam dari pool ini"""
+        return id(connection) in self._borrowed
+
+    def status(self):
+        return {
+            "minsize": self.minsize,
+            "maxsize": self.maxsize,
+            "size": self.pool.size if self.pool else 0,
+            "idle": self.pool.freesize if self.pool else 0,
+        }
+
+
+async_db = AsyncDatabase(DB_CONFIG, **POOL_CONFIG)
+# Pool aiomysql per read replica, dengan nama yang sama seperti replica_router
+async_replicas = {replica.name: AsyncDatabase(replica.config, **POOL_CONFIG) for replica in replica_router.replicas}
+
+
+async def open_databases():
+    for database in (async_db, *async_replicas.values()):
+        await database.open()
+
+
+async def close_databases():
+    for database in (async_db, *async_replicas.values()):
+        await database.close()
+
+
+async def wait_for_gtid(connection, gtid, timeout):
+    async with connection.cursor() as cursor:
+        await cursor.execute(WAIT_FOR_GTID, (gtid, timeout))
+        (result,) = await cursor.fetchone()
+    return result == 0
+
+
+async def acquire_read(token):
+    """(database, koneksi) untuk request baca async; aturan sama dengan ReplicaRouter.acquire_read"""
+    for replica in replica_router.candidates(token):
+        database = async_replicas[replica.name]
+        try:
+            connection = await database.acquire()
+        except Exception:
+            continue
+        if token is not None and token[0] == "gtid":
+            try:
+                caught_up = await wait_for_gtid(connection, token[1], replica_router.wait_timeout)
+            except Exception:
+                caught_up = False
+            if not caught_up:
+                database.release(connection)
+                break
+        replica_router.count(replica)
+        return database, connection
+    replica_router.count(None)
+    return async_db, await async_db.acquire()
+
+
+def is_primary(connection):
+    """True jika koneksi async ini dari primary (selalu, jika tidak ada replica)"""
+    return not async_replicas or async_db.owns(connection)
+
+
+async def get_async_read_db(request: Request):
+    """FastAPI dependency handler baca async: replica yang cukup mutakhir, kalau tidak primary"""
+    database, connection = await acquire_read(request_token(request))
+    try:
+        yield connection
+    finally:
+        database.release(connection)
@@ -2,6 +2,7 @@ import mysql.connector
 from mysql.connector import Error
 import os
 from dotenv import load_dotenv
+from db_pool import ConnectionPool
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +18,17 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Connection pool configuration
+POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 3600)),
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+}
+
+pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
 def get_db_connection():
     """Buat koneksi ke database MySQL"""
     try:
@@ -27,6 +39,14 @@ def get_db_connection():
         print(f"Error connecting to MySQL: {e}")
         raise e
 
+def get_db():
+    """FastAPI dependency: pinjam koneksi dari pool dan selalu kembalikan"""
+    connection = pool.acquire()
+    try:
+        yield connection
+    finally:
+        pool.release(connection)
+
 def init_database():
     """Inisialisasi database dan tabel"""
     try:
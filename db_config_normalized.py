@@ -2,6 +2,7 @@ import mysql.connector
 from mysql.connector import Error
 import os
 from dotenv import load_dotenv
+from db_pool import ConnectionPool
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +18,31 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Connection pool configuration
+POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 3600)),
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+}
+
+pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
+def parse_replica_hosts(value):
+    """Daftar host[:port] dipisah koma → config per replica (user/password/database sama dengan primary)"""
+    configs = []
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        host, _, port = entry.partition(':')
+        configs.append({**DB_CONFIG, 'host': host, 'port': int(port) if port else DB_CONFIG['port']})
+    return configs
+
+# Opsional: read replica untuk handler baca (lihat replicas.py); kosong = semua ke DB_HOST
+REPLICA_CONFIGS = parse_replica_hosts(os.getenv('DB_REPLICA_HOSTS', ''))
+
+# Mode async: handler GET memakai aiomysql (async def), endpoint tulis tetap sync
+DB_ASYNC = os.getenv('DB_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+
 def get_db_connection():
     """Buat koneksi ke database MySQL"""
     try:
@@ -27,6 +53,24 @@ def get_db_connection():
         print(f"Error connecting to MySQL: {e}")
         raise e
 
+def get_db():
+    """FastAPI dependency: pinjam koneksi dari pool dan selalu kembalikan"""
+    connection = pool.acquire()
+    try:
+        yield connection
+    finally:
+        pool.release(connection)
+
+def sql_statements(path):
+    """Statement dari file SQL; baris komentar dibuang supaya statement di bawah komentar tetap dijalankan"""
+    with open(path, 'r', encoding='utf-8') as file:
+        script = file.read()
+    for statement in script.split(';'):
+        lines = [line for line in statement.splitlines() if not line.strip().startswith('--')]
+        statement = '\n'.join(lines).strip()
+        if statement:
+            yield statement
+
 def init_database():
     """Inisialisasi database dan tabel"""
     try:
@@ -34,27 +78,14 @@ def init_database():
         cursor = connection.cursor()
         
         # Read and execute create database script
-        with open('scripts/create_database_normalized.sql', 'r', encoding='utf-8') as file:
-            sql_script = file.read()
-            
-        # Split and execute each statement
-        statements = sql_script.split(';')
-        for statement in statements:
-            statement = statement.strip()
-            if statement and not statement.startswith('--'):
-                cursor.execute(statement)
+        for statement in sql_statements('scripts/create_database_normalized.sql'):
+            cursor.execute(statement)
         
         print("Database tables created successfully!")
         
-        # Insert sample data
-        with open('scripts/seed_data_normalized.sql', 'r', encoding='utf-8') as file:
-            seed_script = file.read()
-            
-        statements = seed_script.split(';')
-        for statement in statements:
-            statement = statement.strip()
-            if statement and not statement.startswith('--'):
-                cursor.execute(statement)
+        # Insert sample data (termasuk bump data_versions di akhir script)
+        for statement in sql_statements('scripts/seed_data_normalized.sql'):
+            cursor.execute(statement)
         
         print("Sample data inserted successfully!")
         
@@ -0,0 +1,172 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+
+from metrics import record_pool_checkout
+
+
+class PoolTimeoutError(Error):
+    """Tidak ada koneksi yang tersedia sebelum checkout timeout habis"""
+
+
+class ConnectionPool:
+    """Pool koneksi MySQL yang terbatas (size + overflow)
+
+    - ``pool_size`` koneksi disimpan dan dipakai ulang antar request
+    - ``max_overflow`` koneksi tambahan boleh dibuka saat burst, lalu
+      ditutup lagi ketika dikembalikan dan pool sudah penuh
+    - ``recycle`` (detik) membuang koneksi yang terlalu lama idle/hidup
+      sebelum MySQL ``wait_timeout`` memutusnya
+    - ``pre_ping`` mengecek koneksi sebelum dipinjamkan
+    - ``timeout`` (detik) batas tunggu checkout saat semua koneksi terpakai
+    """
+
+    def __init__(self, config, pool_size=5, max_overflow=10, recycle=3600,
+                 pre_ping=True, timeout=30):
+        self.config = dict(config)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+
+        # LIFO supaya koneksi yang paling baru dipakai tetap "hangat"
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._slots = threading.BoundedSemaphore(pool_size + max_overflow)
+        self._lock = threading.Lock()
+        self._created_at = {}
+        self._checked_out = 0
+        self._closed = False
+
+    # Koneksi mentah
+    def _connect(self):
+        connection = mysql.connector.connect(**self.config)
+        self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _is_stale(self, connection):
+        created_at = self._created_at.get(id(connection), 0)
+        return self.recycle >= 0 and time.monotonic() - created_at > self.recycle
+
+    def _is_alive(self, connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    # Checkout / checkin
+    def acquire(self):
+        """Pinjam koneksi dari pool (blok maksimal ``timeout`` detik)"""
+        if self._closed:
+            raise Error("Connection pool is closed")
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            record_pool_checkout(time.perf_counter() - start, timed_out=True)
+            raise PoolTimeoutError(
+                f"No database connection available within {self.timeout}s "
+                f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+            )
+        try:
+            connection = self._checkout_idle()
+            if connection is None:
+                connection = self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._checked_out += 1
+        # Termasuk pre-ping / koneksi baru, yaitu semua yang ditunggu request
+        record_pool_checkout(time.perf_counter() - start)
+        return connection
+
+    def _checkout_idle(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if self._is_stale(connection) or (self.pre_ping and not self._is_alive(connection)):
+                self._discard(connection)
+                continue
+            return connection
+
+    def release(self, connection):
+        """Kembalikan koneksi ke pool dalam keadaan bersih"""
+        try:
+            if self._closed or not self._reset(connection):
+                self._discard(connection)
+            else:
+                try:
+                    self._idle.put_nowait(connection)
+                except queue.Full:
+                    # Koneksi overflow: tutup saja
+                    self._discard(connection)
+        finally:
+            with self._lock:
+                self._checked_out -= 1
+            self._slots.release()
+
+    def _reset(self, connection):
+        """Buang hasil query yang belum dibaca dan transaksi yang menggantung"""
+        try:
+            if connection.unread_result:
+                connection.consume_results()
+            if connection.in_transaction:
+                connection.rollback()
+            return connection.is_connected()
+        except Error:
+            return False
+
+    def owns(self, connection):
+        """True jika koneksi ini dibuka oleh pool ini"""
+        return id(connection) in self._created_at
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    # Lifecycle
+    def warm_up(self, count=None):
+        """Buka ``count`` koneksi di awal supaya request pertama tidak menunggu handshake"""
+        count = self.pool_size if count is None else min(count, self.pool_size)
+        connections = [self.acquire() for _ in range(count)]
+        for connection in connections:
+            self.release(connection)
+
+    def dispose(self):
+        """Tutup semua koneksi idle; koneksi yang sedang dipinjam ditutup saat dikembalikan"""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def reopen(self):
+        self._closed = False
+
+    def status(self):
+        with self._lock:
+            checked_out = self._checked_out
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "checked_out": checked_out,
+            "idle": self._idle.qsize(),
+        }
@@ -0,0 +1,78 @@
+import numpy as np
+
+from metrics import track_query
+
+
+class DecisionMatrix:
+    """Matriks keputusan padat lokasi × kriteria
+
+    - ``location_ids`` / ``location_names``: urutan baris (id naik)
+    - ``criteria_ids`` / ``weights`` / ``is_benefit``: urutan kolom
+    - ``values``: float64 (n, m), sel kosong berisi 0
+    - ``present``: bool (n, m), True jika sel punya evaluasi
+    """
+
+    def __init__(self, location_ids, location_names, criteria_ids, weights, is_benefit, values, present):
+        self.location_ids = location_ids
+        self.location_names = location_names
+        self.criteria_ids = criteria_ids
+        self.weights = weights
+        self.is_benefit = is_benefit
+        self.values = values
+        self.present = present
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def criteria_index(self, criteria_id):
+        return self.criteria_ids.index(criteria_id)
+
+
+def build_decision_matrix(locations, criteria, evaluations):
+    """Bangun matriks dari baris (id, name), (id, weight, type) dan (location_id, criteria_id, value)"""
+    location_ids = np.fromiter((row[0] for row in locations), dtype=np.int64, count=len(locations))
+    location_names = [row[1] for row in locations]
+    order = np.argsort(location_ids, kind="stable")
+    location_ids = location_ids[order]
+    location_names = [location_names[i] for i in order]
+
+    criteria = sorted(criteria, key=lambda row: row[0])
+    criteria_ids = [row[0] for row in criteria]
+    weights = np.array([float(row[1]) for row in criteria], dtype=np.float64)
+    is_benefit = np.array([row[2] == 'benefit' for row in criteria], dtype=bool)
+
+    n, m = len(location_ids), len(criteria_ids)
+    values = np.zeros((n, m), dtype=np.float64)
+    present = np.zeros((n, m), dtype=bool)
+
+    if evaluations and n and m:
+        column_of = {criteria_id: j for j, criteria_id in enumerate(criteria_ids)}
+        count = len(evaluations)
+        eval_locations = np.fromiter((row[0] for row in evaluations), dtype=np.int64, count=count)
+        eval_criteria = np.fromiter((column_of.get(row[1], -1) for row in evaluations), dtype=np.int64, count=count)
+        eval_values = np.fromiter((row[2] for row in evaluations), dtype=np.float64, count=count)
+
+        rows = np.searchsorted(location_ids, eval_locations)
+        rows = np.minimum(rows, n - 1)
+        valid = (location_ids[rows] == eval_locations) & (eval_criteria >= 0)
+        values[rows[valid], eval_criteria[valid]] = eval_values[valid]
+        present[rows[valid], eval_criteria[valid]] = True
+
+    return DecisionMatrix(location_ids, location_names, criteria_ids, weights, is_benefit, values, present)
+
+
+def load_decision_matrix(conn):
+    """Ambil locations, criteria dan evaluations lalu susun jadi DecisionMatrix"""
+    cursor = conn.cursor()
+    with track_query("matrix_locations"):
+        cursor.execute("SELECT id, name FROM locations ORDER BY id")
+        locations = cursor.fetchall()
+    with track_query("matrix_criteria"):
+        cursor.execute("SELECT id, weight, type FROM criteria ORDER BY id")
+        criteria = cursor.fetchall()
+    with track_query("matrix_evaluations"):
+        cursor.execute("SELECT location_id, criteria_id, value FROM evaluations")
+        evaluations = cursor.fetchall()
+    cursor.close()
+    return build_decision_matrix(locations, criteria, evaluations)
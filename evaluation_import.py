@@ -0,0 +1,226 @@
+import codecs
+import csv
+import json
+from collections import deque
+
+from criteria_cache import criteria_cache
+from data_versions import bump_versions, load_versions
+from location_id_cache import location_id_cache
+from ranking_cache import ranking_maintainer
+
+CHUNK_SIZE = 5000
+# Batas jumlah error per baris yang dikembalikan di response
+MAX_REPORTED_ERRORS = 1000
+
+UPSERT_PREFIX = "INSERT INTO evaluations (location_id, criteria_id, value) VALUES "
+UPSERT_SUFFIX = " ON DUPLICATE KEY UPDATE value = VALUES(value)"
+
+
+def upsert_evaluations(cursor, rows):
+    """Satu statement multi-row untuk list (location_id, criteria_id, value)"""
+    query = UPSERT_PREFIX + ", ".join(["(%s, %s, %s)"] * len(rows)) + UPSERT_SUFFIX
+    cursor.execute(query, [value for row in rows for value in row])
+
+
+def load_reference_ids(conn):
+    """Set id lokasi dan kriteria untuk validasi tanpa query per baris
+
+    Diambil dari cache per proses yang diberi label versi data_versions, jadi
+    tabel hanya dibaca ulang jika locations / criteria berubah sejak import sebelumnya.
+    """
+    versions = load_versions(conn)
+    location_ids = location_id_cache.get(conn, versions)
+    criteria_ids = {row['id'] for row in criteria_cache.all(conn, versions)}
+    return location_ids, criteria_ids
+
+
+class EvaluationImporter:
+    """Validasi dan upsert evaluasi dalam chunk multi-row, satu transaksi per chunk
+
+    Baris yang tidak valid dicatat sebagai error tanpa membatalkan batch;
+    chunk yang gagal di database di-rollback dan semua barisnya dicatat.
+    """
+
+    def __init__(self, conn, chunk_size=CHUNK_SIZE):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.location_ids, self.criteria_ids = load_reference_ids(conn)
+        self.pending = []
+        self.pending_rows = []
+        self.received = 0
+        self.written = 0
+        self.failed = 0
+        self.errors = []
+
+    def _error(self, row_number, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "detail": detail})
+
+    def validate(self, record):
+        """(location_id, criteria_id, value) atau string error"""
+        if not isinstance(record, dict):
+            return "Row must be an object with location_id, criteria_id and value"
+        try:
+            location_id = int(record['location_id'])
+            criteria_id = str(record['criteria_id'])
+            value = int(record['value'])
+        except KeyError as e:
+            return f"Missing field {e.args[0]}"
+        except (TypeError, ValueError):
+            return "location_id and value must be integers"
+
+        if not (0 <= value <= 100):
+            return "Value must be between 0-100"
+        if location_id not in self.location_ids:
+            return "Location not found"
+        if criteria_id not in self.criteria_ids:
+            return "Criteria not found"
+        return location_id, criteria_id, value
+
+    def add(self, row_number, record):
+        self.received += 1
+        result = self.validate(record)
+        if isinstance(result, str):
+            self._error(row_number, result)
+            return
+        self.pending.append(result)
+        self.pending_rows.append(row_number)
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def add_error(self, row_number, detail):
+        """Catat baris yang gagal di-parse (JSON/CSV rusak)"""
+        self.received += 1
+        self._error(row_number, detail)
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows, row_numbers = self.pending, self.pending_rows
+        self.pending, self.pending_rows = [], []
+
+        cursor = self.conn.cursor()
+        self.conn.start_transaction()
+        try:
+            upsert_evaluations(cursor, rows)
+            bump_versions(cursor, 'evaluations')
+            self.conn.commit()
+            self.written += len(rows)
+        except Exception as e:
+            self.conn.rollback()
+            for row_number in row_numbers:
+                self._error(row_number, f"Write failed: {e}")
+        finally:
+            cursor.close()
+
+    def finish(self):
+        self.flush()
+        if self.written:
+            ranking_maintainer.invalidate()
+        return {
+            "received": self.received,
+            "written": self.written,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def consume_records(importer, records):
+    """Teruskan hasil parser (row_number, record, error) ke importer"""
+    for row_number, record, error in records:
+        if error:
+            importer.add_error(row_number, error)
+        else:
+            importer.add(row_number, record)
+
+
+class _PendingLines:
+    """Iterator baris untuk csv.reader yang diisi bertahap (boleh habis lalu diisi lagi)"""
+
+    def __init__(self):
+        self._lines = deque()
+
+    def extend(self, lines):
+        self._lines.extend(lines)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+
+class LineParser:
+    """Parser NDJSON/CSV untuk body request yang di-stream
+
+    Body di-decode bertahap (UTF-8, BOM diabaikan). CSV dibaca oleh satu
+    csv.reader atas teks tersebut, jadi field ber-quote boleh berisi newline;
+    baris fisik baru diteruskan ke reader setelah record-nya lengkap (jumlah
+    tanda kutip genap). Nomor baris error adalah baris pertama record.
+    """
+
+    def __init__(self, format):
+        self.format = format
+        self.header = None
+        self.line_number = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+        self._record = []
+        self._quotes = 0
+        self._lines = _PendingLines()
+        self._reader = csv.reader(self._lines)
+
+    def feed(self, chunk):
+        """Yield (row_number, record, error) untuk setiap record lengkap di chunk"""
+        self._buffer += self._decoder.decode(chunk)
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            yield from self._parse(line + "\n")
+
+    def close(self):
+        line, self._buffer = self._buffer + self._decoder.decode(b"", final=True), ""
+        if line:
+            yield from self._parse(line)
+        if self._record:
+            row_number = self.line_number - len(self._record) + 1
+            self._record, self._quotes = [], 0
+            yield row_number, None, "Unterminated quoted field"
+
+    def _parse(self, line):
+        self.line_number += 1
+        if self.format != "csv":
+            line = line.strip()
+            if not line:
+                return
+            try:
+                yield self.line_number, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield self.line_number, None, f"Invalid JSON: {e.msg}"
+            return
+
+        if not self._record and not line.strip():
+            return
+        self._record.append(line)
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            return  # newline di dalam field ber-quote: record berlanjut di baris berikutnya
+
+        row_number = self.line_number - len(self._record) + 1
+        self._lines.extend(self._record)
+        self._record, self._quotes = [], 0
+        try:
+            fields = next(self._reader)
+        except csv.Error as e:
+            yield row_number, None, f"Invalid CSV: {e}"
+            return
+        if self.header is None:
+            self.header = [field.strip() for field in fields]
+            return
+        if len(fields) != len(self.header):
+            yield row_number, None, f"Expected {len(self.header)} columns, got {len(fields)}"
+            return
+        yield row_number, dict(zip(self.header, fields)), None
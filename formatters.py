@@ -0,0 +1,125 @@
+# Ubah baris database (dict) menjadi bentuk response JSON
+from location_filters import LOCATION_COLUMNS
+from serialization import dumps
+
+EXPORT_FETCH_SIZE = 1000
+
+
+def group_evaluations(rows):
+    """Baris LEFT JOIN lokasi + evaluasi → {id: (lokasi, evaluasi)} dalam satu lintasan"""
+    found = {}
+    for row in rows:
+        entry = found.get(row['id'])
+        if entry is None:
+            location = {key: value for key, value in row.items() if key not in ('criteria_id', 'value')}
+            entry = found[row['id']] = (location, [])
+        if row['criteria_id'] is not None:
+            entry[1].append(row)
+    return found
+
+
+def format_location(location, evaluations):
+    """Lengkapi satu baris locations dengan criteria dari evaluations"""
+    location['criteria'] = {evaluation['criteria_id']: evaluation['value'] for evaluation in evaluations}
+    location['latitude'] = float(location['latitude']) if location['latitude'] else 0
+    location['longitude'] = float(location['longitude']) if location['longitude'] else 0
+    return location
+
+
+def format_location_batch(ids, found):
+    """Lokasi dalam urutan ids (dari repository.locations_with_evaluations) dan id yang tidak ditemukan"""
+    locations = []
+    missing = []
+    for location_id in ids:
+        entry = found.get(location_id)
+        if entry is None:
+            missing.append(location_id)
+        else:
+            locations.append(format_location(*entry))
+    return {"count": len(locations), "items": locations, "missing": missing}
+
+
+def format_criteria(criteria):
+    """Convert weight (DECIMAL) ke float"""
+    for criterion in criteria:
+        criterion['weight'] = float(criterion['weight'])
+    return criteria
+
+
+def _location_fields(row, fields):
+    location = {field: row[field] for field in fields if field in LOCATION_COLUMNS}
+    for field in ('latitude', 'longitude'):
+        if field in location:
+            location[field] = float(location[field]) if location[field] else 0
+    return location
+
+
+def format_location_page(query, rows, evaluations):
+    """Response GET /locations: list biasa, atau {items, next_cursor} jika memakai limit"""
+    locations = []
+    by_id = {}
+    for row in rows:
+        location = _location_fields(row, query.fields)
+        if query.include_criteria:
+            location['criteria'] = {}
+            by_id[row['id']] = location
+        locations.append(location)
+    
+    for evaluation in evaluations:
+        location = by_id.get(evaluation['location_id'])
+        if location is not None:
+            location['criteria'][evaluation['criteria_id']] = evaluation['value']
+    
+    if query.limit is None:
+        return locations
+    next_cursor = rows[-1]['id'] if len(rows) == query.limit else None
+    return {"items": locations, "next_cursor": next_cursor}
+
+
+def location_ndjson_lines(cursor, fields):
+    """Baca cursor (unbuffered, terurut id) bertahap dan yield satu baris NDJSON per lokasi"""
+    include_criteria = 'criteria' in fields
+    current = None
+    current_id = None
+    while True:
+        rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            if row['id'] != current_id:
+                if current is not None:
+                    yield dumps(current) + b"\n"
+                current_id = row['id']
+                current = _location_fields(row, fields)
+                if include_criteria:
+                    current['criteria'] = {}
+            if include_criteria and row['criteria_id']:
+                current['criteria'][row['criteria_id']] = row['value']
+    if current is not None:
+        yield dumps(current) + b"\n"
+
+
+def format_nearby(rows, ids, distances):
+    """Lokasi hasil pencarian spasial, urut jarak, dengan distance_km"""
+    by_id = {row['id']: row for row in rows}
+    locations = []
+    for location_id, distance in zip(ids.tolist(), distances.tolist()):
+        row = by_id.get(location_id)
+        if row is None:
+            continue  # terhapus setelah index dibaca
+        location = _location_fields(row, LOCATION_COLUMNS)
+        location['distance_km'] = round(distance, 3)
+        locations.append(location)
+    return locations
+
+
+def format_nearby_ranking(results, ids, distances):
+    """Baris ranking (urut skor) yang lokasinya ada di hasil pencarian spasial"""
+    distance_of = dict(zip(ids.tolist(), distances.tolist()))
+    ranked = []
+    for row in results:
+        distance = distance_of.get(row['location_id'])
+        if distance is None:
+            continue
+        ranked.append({**row, "local_rank": len(ranked) + 1, "distance_km": round(distance, 3)})
+    return ranked
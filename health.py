@@ -0,0 +1,125 @@
+# Status kesehatan per proses untuk /health, /health/live dan /health/ready.
+# Database dicek oleh thread latar tiap HEALTH_CHECK_INTERVAL detik, jadi
+# probe orchestrator hanya membaca state di memori (tanpa round trip DB).
+import os
+import threading
+import time
+
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', 5))
+# Cek sukses terakhir lebih tua dari ini dianggap basi (thread macet / DB hang) → tidak ready
+HEALTH_STALE_AFTER = 3 * HEALTH_CHECK_INTERVAL
+# false: lewati warm-up cache/scoring saat startup (ready begitu database terhubung)
+STARTUP_WARM_UP = os.getenv('STARTUP_WARM_UP', 'true').lower() == 'true'
+
+
+class HealthMonitor:
+    """Hasil cek database terakhir, warm-up startup dan statistik cache
+
+    - ``check``: fungsi tanpa argumen yang melempar exception jika database tidak sehat
+    - ``collectors``: {nama: fungsi() → dict} statistik pool / cache untuk laporan
+    """
+
+    def __init__(self, check, collectors=None, interval=HEALTH_CHECK_INTERVAL, stale_after=HEALTH_STALE_AFTER):
+        self.check = check
+        self.collectors = dict(collectors or {})
+        self.interval = interval
+        self.stale_after = stale_after
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._database = {"ok": False, "checked_at": None, "latency_ms": None, "error": "not checked yet"}
+        self._failures = 0
+        self._warm_up = {"done": False, "steps": {}}
+
+    # Cek database
+    def refresh(self):
+        started = time.perf_counter()
+        try:
+            self.check()
+            error = None
+        except Exception as e:
+            error = str(e)
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        with self._lock:
+            self._failures = 0 if error is None else self._failures + 1
+            self._database = {"ok": error is None, "checked_at": time.monotonic(), "latency_ms": latency_ms,
+                              "error": error}
+
+    def start(self):
+        """Thread latar: cek pertama langsung, lalu tiap ``interval`` detik"""
+        self._stop.clear()
+
+        def run():
+            while True:
+                self.refresh()
+                if self._stop.wait(self.interval):
+                    break
+
+        threading.Thread(target=run, name="health-monitor", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    # Warm-up startup
+    def warm_up(self, steps):
+        """Jalankan (nama, fungsi) berurutan; gagal di satu langkah tidak menghentikan langkah lain"""
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                step()
+                error = None
+            except Exception as e:
+                error = str(e)
+            with self._lock:
+                self._warm_up["steps"][name] = {"ms": round((time.perf_counter() - started) * 1000, 1),
+                                                "error": error}
+        with self._lock:
+            self._warm_up["done"] = True
+
+    # Laporan
+    def _database_state(self):
+        with self._lock:
+            database = dict(self._database)
+            failures = self._failures
+        checked_at = database.pop("checked_at")
+        database["age_s"] = round(time.monotonic() - checked_at, 3) if checked_at is not None else None
+        database["consecutive_failures"] = failures
+        database["stale"] = checked_at is None or database["age_s"] > self.stale_after
+        return database
+
+    def liveness(self):
+        """Proses hidup dan event loop merespons; tidak bergantung pada database"""
+        return {"status": "alive", "uptime_s": round(time.monotonic() - self.started_at, 1)}
+
+    def readiness(self):
+        """(ready, body): warm-up selesai dan cek database terakhir sukses serta belum basi"""
+        database = self._database_state()
+        with self._lock:
+            warmed = self._warm_up["done"]
+        ready = warmed and database["ok"] and not database["stale"]
+        reasons = []
+        if not warmed:
+            reasons.append("warming up")
+        if not database["ok"]:
+            reasons.append(f"database: {database['error']}")
+        elif database["stale"]:
+            reasons.append("database check is stale")
+        return ready, {"status": "ready" if ready else "not ready", "reasons": reasons, "database": database}
+
+    def report(self):
+        """Laporan lengkap untuk /health: database, warm-up dan statistik semua collector"""
+        database = self._database_state()
+        with self._lock:
+            warm_up = {"done": self._warm_up["done"], "steps": dict(self._warm_up["steps"])}
+        report = {
+            "status": "healthy" if database["ok"] and not database["stale"] else "unhealthy",
+            "database": database,
+            "warm_up": warm_up,
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+        }
+        for name, collect in self.collectors.items():
+            try:
+                report[name] = collect()
+            except Exception as e:
+                report[name] = {"error": str(e)}
+        return report
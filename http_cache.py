@@ -0,0 +1,131 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+from serialization import encode, fast_response, negotiate
+
+# Jumlah body (path + query string) yang disimpan
+MAX_ENTRIES = 64
+
+
+class Validators:
+    """ETag dan Last-Modified satu request, dihitung dari versi resource"""
+
+    def __init__(self, key, etag, last_modified, media_type):
+        self.key = key
+        self.etag = etag
+        self.last_modified = last_modified
+        self.media_type = media_type
+
+    def headers(self):
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+
+def _etag_matches(header, etag):
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header, last_modified):
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+class ResponseCache:
+    """Conditional GET dan body yang sudah di-serialize per (path, query, media type)
+
+    ETag dibentuk dari versi tabel di ``data_versions`` yang dipakai endpoint,
+    jadi request dengan If-None-Match yang cocok dijawab 304 tanpa menjalankan
+    query data, dan request tanpa validator memakai body tersimpan selama
+    versinya sama.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()
+
+    def validators(self, request, versions, resources):
+        """None jika versi tidak tersedia (caching dilewati)"""
+        if versions is None:
+            return None
+        media_type = negotiate(request)
+        key = (request.url.path, "&".join(sorted(request.url.query.split("&"))), media_type)
+        parts = [f"{key[0]}?{key[1]}", media_type]
+        stamps = []
+        for resource in resources:
+            version, updated_at = versions.get(resource, (0, None))
+            parts.append(f"{resource}:{version}")
+            if updated_at is not None:
+                stamps.append(updated_at)
+        etag = '"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:20] + '"'
+        last_modified = max(stamps) if stamps else None
+        return Validators(key, etag, last_modified, media_type)
+
+    def cached(self, request, validators):
+        """Response 304 atau body tersimpan; None jika data perlu dibaca dari database"""
+        if validators is None:
+            return None
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, validators.etag)
+        elif if_modified_since is not None and validators.last_modified is not None:
+            not_modified = _not_modified_since(if_modified_since, validators.last_modified)
+        else:
+            not_modified = False
+        if not_modified:
+            return Response(status_code=304, headers=validators.headers())
+
+        with self._lock:
+            entry = self._bodies.get(validators.key)
+            if entry is None or entry[0] != validators.etag:
+                return None
+            self._bodies.move_to_end(validators.key)
+            _, body, media_type = entry
+        return Response(content=body, media_type=media_type, headers=validators.headers())
+
+    def render(self, request, validators, data):
+        """Serialize data, simpan body-nya, dan kembalikan response dengan validator"""
+        if validators is None:
+            return fast_response(request, data)
+        return self.store(validators, encode(data, validators.media_type), validators.media_type)
+
+    def store(self, validators, body, media_type):
+        """Simpan body yang sudah di-encode (mis. biner) dan kembalikan response-nya"""
+        if validators is None:
+            return Response(content=body, media_type=media_type)
+        with self._lock:
+            self._bodies[validators.key] = (validators.etag, body, media_type)
+            self._bodies.move_to_end(validators.key)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        return Response(content=body, media_type=media_type, headers=validators.headers())
+
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+
+    def status(self):
+        with self._lock:
+            return {
+                "entries": len(self._bodies),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(body) for _, body, _ in self._bodies.values()),
+            }
+
+
+response_cache = ResponseCache()
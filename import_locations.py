@@ -0,0 +1,51 @@
+import argparse
+import sys
+
+from db_config_normalized import get_db_connection
+from evaluation_import import consume_records
+from location_import import CHUNK_SIZE, LocationImporter, detect_format, make_parser
+
+READ_SIZE = 1024 * 1024
+
+
+def print_progress(summary):
+    print(
+        f"\r📥 {summary['inserted']:,} lokasi, {summary['evaluations']:,} evaluasi, "
+        f"{summary['failed']:,} error ({summary['rows_per_s']:,.0f} baris/detik)",
+        end="", flush=True,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import lokasi dari file CSV atau GeoJSON")
+    parser.add_argument("path", help="File CSV (name,address,latitude,longitude[,criteria.<id>...]) atau GeoJSON")
+    parser.add_argument("--format", choices=["csv", "geojson"], help="Default: ditebak dari ekstensi file")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    format = args.format or detect_format(filename=args.path)
+    print(f"🚀 Importing {args.path} ({format})...")
+
+    connection = get_db_connection()
+    try:
+        importer = LocationImporter(connection, chunk_size=args.chunk_size, progress=print_progress)
+        records = make_parser(format)
+        with open(args.path, "rb") as file:
+            while True:
+                chunk = file.read(READ_SIZE)
+                if not chunk:
+                    break
+                consume_records(importer, records.feed(chunk))
+        consume_records(importer, records.close())
+        summary = importer.finish()
+    finally:
+        connection.close()
+
+    print()
+    print(f"✅ Import selesai dalam {summary['elapsed_s']}s: {summary['inserted']:,} lokasi, "
+          f"{summary['evaluations']:,} evaluasi")
+    if summary['failed']:
+        print(f"⚠️ {summary['failed']:,} baris/nilai gagal:")
+        for error in summary['errors'][:20]:
+            print(f"   baris {error['row']}: {error['detail']}")
+        sys.exit(1)
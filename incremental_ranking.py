@@ -0,0 +1,272 @@
+import threading
+
+import numpy as np
+from sortedcontainers import SortedList
+
+from data_versions import follows
+from scoring import (
+    column_extremes,
+    ranking_rows,
+    saw_normalize_values,
+    wp_log_values,
+    wp_relative_scores,
+)
+
+# evaluations.value dibatasi CHECK (value >= 0 AND value <= 100)
+MAX_VALUE = 100
+# Algoritma yang skornya bisa diperbarui per sel (jumlah linier per kolom)
+INCREMENTAL_ALGORITHMS = ('saw', 'wp')
+
+
+class IncrementalRanking:
+    """Ranking SAW/WP yang diperbarui per sel, bukan dihitung ulang O(n·m)
+
+    Disimpan per lokasi: jumlah parsial SAW (Σ w·r) dan log-product WP
+    (Σ ±w·log x) dengan bobot mentah; pembagian dengan Σw dilakukan saat
+    dibaca karena tidak mengubah urutan. Min/max tiap kriteria diambil dari
+    histogram nilai 0–100, dan urutan ranking disimpan di SortedList.
+
+    - nilai satu sel berubah, min/max kolom tetap: O(log n)
+    - min/max kolom berubah, atau bobot/tipe kriteria berubah: O(n) untuk
+      kolom itu ditambah penyusunan ulang indeks ranking
+    """
+
+    def __init__(self, matrix, fingerprint=None, versions=None):
+        self.fingerprint = fingerprint
+        self.versions = versions
+        self.revision = 0
+        self.stale = False
+
+        self.location_ids = matrix.location_ids.copy()
+        self.location_names = list(matrix.location_names)
+        self.criteria_ids = list(matrix.criteria_ids)
+        self.weights = matrix.weights.astype(np.float64)
+        self.is_benefit = matrix.is_benefit.copy()
+        self.values = matrix.values.copy()
+        self.present = matrix.present.copy()
+
+        self._row_of = {location_id: i for i, location_id in enumerate(self.location_ids.tolist())}
+        self._column_of = {criteria_id: j for j, criteria_id in enumerate(self.criteria_ids)}
+
+        rows, columns = np.nonzero(self.present)
+        self._counts = np.zeros((len(self.criteria_ids), MAX_VALUE + 1), dtype=np.int64)
+        bins = np.clip(self.values[rows, columns], 0, MAX_VALUE).astype(np.int64)
+        np.add.at(self._counts, (columns, bins), 1)
+
+        col_min, col_max = column_extremes(self.values, self.present)
+        self._normalized = saw_normalize_values(self.values, self.present, self.is_benefit, col_min, col_max)
+        self._logs = wp_log_values(self.values, self.present, self.is_benefit, col_min, col_max)
+
+        self._saw_raw = self._normalized @ self.weights
+        self._wp_raw = self._logs @ (self._signs() * self.weights)
+        self._index = {}
+        self._rebuild_index()
+
+    # Helpers
+    def _signs(self):
+        return np.where(self.is_benefit, 1.0, -1.0)
+
+    def _raw(self, algorithm):
+        return self._saw_raw if algorithm == 'saw' else self._wp_raw
+
+    def _rebuild_index(self):
+        for algorithm in ('saw', 'wp'):
+            raw = self._raw(algorithm)
+            self._index[algorithm] = SortedList(zip((-raw).tolist(), range(len(raw))))
+
+    def _column_extremes(self, j):
+        """(min, max) kolom j dari histogram, O(MAX_VALUE)"""
+        filled = np.flatnonzero(self._counts[j])
+        if not filled.size:
+            return np.inf, -np.inf
+        return float(filled[0]), float(filled[-1])
+
+    def _cell(self, i, j):
+        col_min, col_max = self._column_extremes(j)
+        args = (
+            self.values[i:i + 1, j:j + 1], self.present[i:i + 1, j:j + 1],
+            self.is_benefit[j:j + 1], np.array([col_min]), np.array([col_max]),
+        )
+        return saw_normalize_values(*args)[0, 0], wp_log_values(*args)[0, 0]
+
+    def _refresh_cell(self, i, j):
+        normalized, log_value = self._cell(i, j)
+        weight = self.weights[j]
+        sign = 1.0 if self.is_benefit[j] else -1.0
+        updates = {
+            'saw': weight * (normalized - self._normalized[i, j]),
+            'wp': sign * weight * (log_value - self._logs[i, j]),
+        }
+        self._normalized[i, j] = normalized
+        self._logs[i, j] = log_value
+
+        for algorithm, delta in updates.items():
+            raw = self._raw(algorithm)
+            index = self._index[algorithm]
+            index.remove((-raw[i], i))
+            raw[i] += delta
+            index.add((-raw[i], i))
+
+    def _refresh_column(self, j, weight=None, is_benefit=None):
+        """Hitung ulang kontribusi kolom j (setelah min/max, bobot atau tipe berubah)"""
+        old_saw = self.weights[j] * self._normalized[:, j]
+        old_wp = (1.0 if self.is_benefit[j] else -1.0) * self.weights[j] * self._logs[:, j]
+
+        if weight is not None:
+            self.weights[j] = weight
+        if is_benefit is not None:
+            self.is_benefit[j] = is_benefit
+
+        col_min, col_max = self._column_extremes(j)
+        args = (
+            self.values[:, j:j + 1], self.present[:, j:j + 1],
+            self.is_benefit[j:j + 1], np.array([col_min]), np.array([col_max]),
+        )
+        self._normalized[:, j] = saw_normalize_values(*args)[:, 0]
+        self._logs[:, j] = wp_log_values(*args)[:, 0]
+
+        self._saw_raw += self.weights[j] * self._normalized[:, j] - old_saw
+        self._wp_raw += (1.0 if self.is_benefit[j] else -1.0) * self.weights[j] * self._logs[:, j] - old_wp
+        self._rebuild_index()
+
+    # Updates
+    def set_value(self, location_id, criteria_id, value):
+        """Ubah (atau hapus jika value None) satu sel evaluasi"""
+        i = self._row_of.get(location_id)
+        j = self._column_of.get(criteria_id)
+        if i is None or j is None:
+            self.stale = True
+            return
+
+        before = self._column_extremes(j)
+        if self.present[i, j]:
+            self._counts[j, int(np.clip(self.values[i, j], 0, MAX_VALUE))] -= 1
+        if value is None:
+            self.values[i, j] = 0.0
+            self.present[i, j] = False
+        else:
+            self.values[i, j] = float(value)
+            self.present[i, j] = True
+            self._counts[j, int(np.clip(value, 0, MAX_VALUE))] += 1
+
+        if self._column_extremes(j) != before:
+            self._refresh_column(j)
+        else:
+            self._refresh_cell(i, j)
+        self.revision += 1
+
+    def set_criteria(self, criteria_id, weight=None, type=None):
+        """Ubah bobot dan/atau tipe satu kriteria"""
+        j = self._column_of.get(criteria_id)
+        if j is None:
+            self.stale = True
+            return
+        is_benefit = None if type is None else type == 'benefit'
+        if (weight is None or weight == self.weights[j]) and \
+                (is_benefit is None or is_benefit == self.is_benefit[j]):
+            return
+        self._refresh_column(j, weight=weight, is_benefit=is_benefit)
+        self.revision += 1
+
+    def set_name(self, location_id, name):
+        """Ubah nama lokasi (tidak mempengaruhi skor)"""
+        i = self._row_of.get(location_id)
+        if i is None:
+            self.stale = True
+            return
+        self.location_names[i] = name
+        self.revision += 1
+
+    # Reads
+    def scores(self, algorithm):
+        total = self.weights.sum()
+        raw = self._raw(algorithm)
+        if total <= 0:
+            raw = np.zeros_like(raw)
+        else:
+            raw = raw / total
+        return raw if algorithm == 'saw' else wp_relative_scores(raw)
+
+    def order(self, algorithm, offset=0, limit=None):
+        """Indeks baris rank offset+1..offset+limit, O(log n + limit) dari SortedList"""
+        index = self._index[algorithm]
+        stop = len(index) if limit is None else min(offset + limit, len(index))
+        count = max(stop - offset, 0)
+        rows = (row for _, row in index.islice(offset, stop)) if count else iter(())
+        return np.fromiter(rows, dtype=np.int64, count=count)
+
+    def rows(self, algorithm, decimals=None, offset=0, limit=None, min_score=None):
+        scores = self.scores(algorithm)
+        if decimals is not None:
+            scores = np.round(scores, decimals)
+        order = self.order(algorithm, offset, limit)
+        if min_score is not None:
+            # Skor menurun sepanjang order, jadi yang lolos selalu prefiks
+            order = order[:np.count_nonzero(scores[order] >= min_score)]
+        return ranking_rows(self, scores, order, start=offset + 1)
+
+
+class RankingMaintainer:
+    """Pemegang IncrementalRanking per proses, divalidasi dengan versi data (data_versions)
+
+    Lock hanya menjaga objek di memori; query database selalu dijalankan di luar lock.
+    """
+
+    def __init__(self, version_key):
+        self._version_key = version_key
+        self._lock = threading.Lock()
+        self.ranking = None
+
+    def rows(self, fingerprint, algorithm, decimals=None, offset=0, limit=None, min_score=None):
+        """Hasil ranking jika masih sesuai key versi database, kalau tidak None"""
+        if algorithm not in INCREMENTAL_ALGORITHMS:
+            return None
+        with self._lock:
+            ranking = self.ranking
+            if ranking is None or ranking.fingerprint != fingerprint:
+                return None
+            return ranking.rows(algorithm, decimals, offset, limit, min_score)
+
+    def replace(self, matrix, fingerprint, versions=None):
+        ranking = IncrementalRanking(matrix, fingerprint, versions)
+        with self._lock:
+            self.ranking = ranking
+        return ranking
+
+    def invalidate(self):
+        with self._lock:
+            self.ranking = None
+
+    def status(self):
+        with self._lock:
+            ranking = self.ranking
+        if ranking is None:
+            return {"loaded": False}
+        return {"loaded": True, "locations": len(ranking.location_ids), "revision": ranking.revision}
+
+    def apply(self, versions, resources, change=None):
+        """Terapkan write yang sudah di-commit: ``change(ranking)`` lalu naikkan versinya
+
+        ``versions`` dibaca di dalam transaksi write, sesudah bump ``resources``.
+        Ranking hanya diubah jika versinya tepat satu write di belakang; jika
+        ada write lain di antaranya ranking dibiarkan dengan versi lamanya, jadi
+        tidak akan cocok dengan key database dan dibangun ulang saat dibaca.
+        """
+        if versions is None:
+            self.invalidate()
+            return
+        with self._lock:
+            ranking = self.ranking
+            if ranking is None or not follows(ranking.versions, versions, resources):
+                return
+            try:
+                if change is not None:
+                    change(ranking)
+            except Exception:
+                self.ranking = None
+                raise
+            if ranking.stale:
+                self.ranking = None
+                return
+            ranking.versions = versions
+            ranking.fingerprint = self._version_key(versions)
@@ -0,0 +1,185 @@
+from typing import List, Optional
+
+from fastapi import HTTPException, Query
+
+MAX_PAGE_SIZE = 5000
+LOCATION_COLUMNS = ('id', 'name', 'address', 'latitude', 'longitude')
+LOCATION_FIELDS = LOCATION_COLUMNS + ('criteria',)
+
+
+def parse_fields(fields):
+    """'id,name,criteria' → tuple field; id selalu ikut karena dipakai sebagai cursor"""
+    if not fields:
+        return LOCATION_FIELDS
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in LOCATION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(field for field in LOCATION_FIELDS if field == 'id' or field in requested)
+
+
+def parse_bbox(bbox):
+    """'min_lng,min_lat,max_lng,max_lat' (urutan bbox GeoJSON)"""
+    if not bbox:
+        return None
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in bbox.split(','))
+    except ValueError:
+        raise ValueError("bbox must be 'min_lng,min_lat,max_lng,max_lat'")
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError("bbox minimum must not exceed maximum")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def parse_criteria_filters(filters):
+    """['populationDensity:50:100', 'competition::30'] → [(id, min, max)]"""
+    parsed = []
+    for item in filters or []:
+        parts = item.split(':')
+        if len(parts) != 3 or not parts[0]:
+            raise ValueError("criteria filter must be '<criteria_id>:<min>:<max>'")
+        try:
+            minimum = int(parts[1]) if parts[1] else None
+            maximum = int(parts[2]) if parts[2] else None
+        except ValueError:
+            raise ValueError("criteria filter bounds must be integers")
+        parsed.append((parts[0], minimum, maximum))
+    return parsed
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class LocationQuery:
+    """SQL untuk GET /locations dengan filter, pilihan field dan keyset pagination
+
+    Halaman diambil dengan ``WHERE l.id > after ORDER BY l.id LIMIT n``;
+    evaluasinya diambil dengan filter yang sama dibatasi rentang id halaman,
+    jadi tidak perlu daftar IN yang panjang.
+    """
+
+    def __init__(self, fields=None, name_prefix=None, bbox=None, criteria=None, after=None, limit=None):
+        self.fields = parse_fields(fields)
+        self.name_prefix = name_prefix
+        self.bbox = parse_bbox(bbox)
+        self.criteria_filters = parse_criteria_filters(criteria)
+        self.after = after
+        if limit is not None and not (1 <= limit <= MAX_PAGE_SIZE):
+            raise ValueError(f"limit must be between 1-{MAX_PAGE_SIZE}")
+        self.limit = limit
+
+    @property
+    def include_criteria(self):
+        return 'criteria' in self.fields
+
+    def _where(self, upper_id=None):
+        clauses = []
+        args = []
+        if self.after is not None:
+            clauses.append("l.id > %s")
+            args.append(self.after)
+        if upper_id is not None:
+            clauses.append("l.id <= %s")
+            args.append(upper_id)
+        if self.name_prefix:
+            clauses.append("l.name LIKE %s")
+            args.append(escape_like(self.name_prefix) + '%')
+        if self.bbox:
+            # latitude dulu supaya idx_coordinates (latitude, longitude) bisa dipakai
+            min_lng, min_lat, max_lng, max_lat = self.bbox
+            clauses.append("l.latitude BETWEEN %s AND %s AND l.longitude BETWEEN %s AND %s")
+            args.extend([min_lat, max_lat, min_lng, max_lng])
+        for criteria_id, minimum, maximum in self.criteria_filters:
+            condition = "f.location_id = l.id AND f.criteria_id = %s"
+            args.append(criteria_id)
+            if minimum is not None:
+                condition += " AND f.value >= %s"
+                args.append(minimum)
+            if maximum is not None:
+                condition += " AND f.value <= %s"
+                args.append(maximum)
+            clauses.append(f"EXISTS (SELECT 1 FROM evaluations f WHERE {condition})")
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, args
+
+    def _columns(self):
+        return ", ".join(f"l.{field}" for field in self.fields if field in LOCATION_COLUMNS)
+
+    def locations_sql(self):
+        where, args = self._where()
+        query = f"SELECT {self._columns()} FROM locations l{where} ORDER BY l.id"
+        if self.limit is not None:
+            query += " LIMIT %s"
+            args.append(self.limit)
+        return query, args
+
+    def evaluations_sql(self, last_id):
+        """Evaluasi untuk lokasi di halaman ini (id > after .. id <= last_id)"""
+        where, args = self._where(upper_id=last_id if self.limit is not None else None)
+        query = (
+            "SELECT e.location_id, e.criteria_id, e.value "
+            f"FROM evaluations e JOIN locations l ON l.id = e.location_id{where}"
+        )
+        return query, args
+
+    def export_sql(self):
+        """Satu query join terurut id untuk streaming (baris lokasi yang sama berurutan)"""
+        where, args = self._where()
+        columns = self._columns()
+        if self.include_criteria:
+            return (
+                f"SELECT {columns}, e.criteria_id, e.value FROM locations l "
+                f"LEFT JOIN evaluations e ON l.id = e.location_id{where} ORDER BY l.id"
+            ), args
+        return f"SELECT {columns} FROM locations l{where} ORDER BY l.id", args
+
+
+def location_query(fields: Optional[str] = None, name_prefix: Optional[str] = None,
+                   bbox: Optional[str] = None, criteria: Optional[List[str]] = Query(None),
+                   after: Optional[int] = None, limit: Optional[int] = None):
+    """Parameter bersama GET /locations dan /locations/export
+
+    - fields: id,name,address,latitude,longitude,criteria
+    - bbox: min_lng,min_lat,max_lng,max_lat
+    - criteria: <criteria_id>:<min>:<max> (boleh berulang, batas boleh kosong)
+    - after / limit: keyset pagination berdasarkan id
+    """
+    try:
+        return LocationQuery(fields, name_prefix, bbox, criteria, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+MAX_RADIUS_KM = 1000
+
+
+class NearbyQuery:
+    """Titik pusat dan batas pencarian (radius dan/atau k terdekat)"""
+
+    def __init__(self, lat, lng, radius_km=None, k=None):
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError("lat must be between -90-90 and lng between -180-180")
+        if radius_km is None and k is None:
+            raise ValueError("radius_km or k is required")
+        if radius_km is not None and not (0 < radius_km <= MAX_RADIUS_KM):
+            raise ValueError(f"radius_km must be between 0-{MAX_RADIUS_KM}")
+        if k is not None and not (1 <= k <= MAX_PAGE_SIZE):
+            raise ValueError(f"k must be between 1-{MAX_PAGE_SIZE}")
+        self.lat = lat
+        self.lng = lng
+        self.radius_km = radius_km
+        self.k = k
+
+
+def nearby_query(lat: float, lng: float, radius_km: Optional[float] = None, k: Optional[int] = None):
+    """Parameter bersama /locations/nearby dan /rankings/nearby
+
+    - lat, lng: titik pusat
+    - radius_km: hanya lokasi dalam radius ini
+    - k: hanya k lokasi terdekat (boleh digabung dengan radius_km)
+    """
+    try:
+        return NearbyQuery(lat, lng, radius_km, k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,80 @@
+import threading
+
+from data_versions import follows, newer
+from metrics import track_query
+
+LOCATION_IDS_QUERY = "SELECT id FROM locations"
+
+
+def load_location_ids(conn):
+    cursor = conn.cursor()
+    with track_query("location_ids", LOCATION_IDS_QUERY):
+        cursor.execute(LOCATION_IDS_QUERY)
+        ids = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return ids
+
+
+class LocationIdCache:
+    """Set id lokasi per proses untuk validasi import, diberi label versi locations di data_versions
+
+    Dipakai EvaluationImporter supaya validasi tidak memindai tabel locations
+    di setiap request import. Set dibaca ulang (di luar lock) hanya jika versi
+    locations berubah; write lokasi di worker yang sama mengubahnya di tempat
+    lewat ``apply``. Tanpa tabel data_versions set dibaca setiap kali.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids = None
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def _serves(self, version):
+        return self.ids is not None and version is not None and (
+            self.version == version or newer(self.version, version)
+        )
+
+    def get(self, conn, versions):
+        """Set id lokasi yang berlaku untuk ``versions`` (hasil load_versions pemanggil); jangan diubah"""
+        version = versions.get('locations', (0, None)) if versions is not None else None
+        with self._lock:
+            if self._serves(version):
+                self.hits += 1
+                return self.ids
+            self.misses += 1
+        ids = load_location_ids(conn)
+        with self._lock:
+            if version is not None and not self._serves(version):
+                self.ids = ids
+                self.version = version
+        return ids
+
+    def apply(self, versions, change=None):
+        """Terapkan write ke locations yang sudah di-commit: ``change(ids)`` lalu naikkan versinya
+
+        Sama seperti SpatialIndexHolder.apply: hanya jika set tepat satu write di belakang.
+        """
+        version = versions.get('locations') if versions is not None else None
+        with self._lock:
+            if self.ids is None:
+                return
+            if not follows({'locations': self.version}, {'locations': version}, ('locations',)):
+                return
+            if change is not None:
+                change(self.ids)
+            self.version = version
+
+    def invalidate(self):
+        with self._lock:
+            self.ids = None
+            self.version = None
+
+    def status(self):
+        with self._lock:
+            return {"loaded": self.ids is not None, "size": len(self.ids) if self.ids is not None else 0,
+                    "hits": self.hits, "misses": self.misses}
+
+
+location_id_cache = LocationIdCache()
@@ -0,0 +1,338 @@
+import json
+import time
+
+from data_versions import bump_versions
+from evaluation_import import LineParser, MAX_REPORTED_ERRORS, upsert_evaluations
+from location_id_cache import location_id_cache
+from ranking_cache import ranking_maintainer
+from spatial_index import spatial_index
+
+CHUNK_SIZE = 2000
+BASE_FIELDS = ('name', 'address', 'latitude', 'longitude')
+CRITERIA_PREFIX = 'criteria.'
+
+
+class LocationImporter:
+    """Insert lokasi (dan nilai kriteria inline) dalam chunk multi-row
+
+    Setiap chunk adalah satu transaksi: satu INSERT multi-row ke locations,
+    lalu satu upsert multi-row ke evaluations untuk nilai kriteria inline.
+    Id lokasi dihitung dari lastrowid (id baris pertama): InnoDB memberi
+    auto-increment berurutan untuk satu INSERT multi-row ("simple insert"),
+    dengan jarak @@auto_increment_increment antar baris (bukan selalu 1,
+    mis. pada replikasi multi-primary).
+    """
+
+    def __init__(self, conn, chunk_size=CHUNK_SIZE, progress=None):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.criteria_ids = self._load_criteria_ids()
+        self.id_step = self._load_id_step()
+        self.pending = []
+        self.received = 0
+        self.inserted = 0
+        self.evaluations = 0
+        self.failed = 0
+        self.errors = []
+        self.started_at = time.monotonic()
+
+    def _load_criteria_ids(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT id FROM criteria")
+        criteria_ids = {row[0] for row in cursor.fetchall()}
+        cursor.close()
+        return criteria_ids
+
+    def _load_id_step(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT @@SESSION.auto_increment_increment")
+        (step,) = cursor.fetchone()
+        cursor.close()
+        return int(step)
+
+    def _error(self, row_number, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "detail": detail})
+
+    def validate(self, record):
+        """(location_values, criteria_values, warnings) atau string error"""
+        if not isinstance(record, dict):
+            return "Row must be an object"
+        name = str(record.get('name') or '').strip()
+        if not name:
+            return "Missing field name"
+        try:
+            latitude = float(record['latitude'])
+            longitude = float(record['longitude'])
+        except KeyError as e:
+            return f"Missing field {e.args[0]}"
+        except (TypeError, ValueError):
+            return "latitude and longitude must be numbers"
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return "Coordinates out of range"
+
+        # Nilai kriteria: objek "criteria" atau kolom "criteria.<id>" / "<id>"
+        criteria = record.get('criteria')
+        if criteria and not isinstance(criteria, dict):
+            return "criteria must be an object"
+        inline = dict(criteria or {})
+        for key, value in record.items():
+            if key.startswith(CRITERIA_PREFIX):
+                inline[key[len(CRITERIA_PREFIX):]] = value
+            elif key not in BASE_FIELDS and key in self.criteria_ids:
+                inline[key] = value
+
+        criteria_values = []
+        warnings = []
+        for criteria_id, value in inline.items():
+            if value is None or value == '':
+                continue
+            if criteria_id not in self.criteria_ids:
+                warnings.append(f"Criteria '{criteria_id}' not found")
+                continue
+            try:
+                value = int(float(value))
+            except (TypeError, ValueError):
+                warnings.append(f"Criteria '{criteria_id}' must be a number")
+                continue
+            if not (0 <= value <= 100):
+                warnings.append(f"Criteria '{criteria_id}' must be between 0-100")
+                continue
+            criteria_values.append((criteria_id, value))
+
+        address = record.get('address')
+        location = (name, '' if address is None else str(address), latitude, longitude)
+        return location, criteria_values, warnings
+
+    def add(self, row_number, record):
+        self.received += 1
+        result = self.validate(record)
+        if isinstance(result, str):
+            self._error(row_number, result)
+            return
+        location, criteria_values, warnings = result
+        for warning in warnings:
+            self._error(row_number, warning)
+        self.pending.append((row_number, location, criteria_values))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def add_error(self, row_number, detail):
+        self.received += 1
+        self._error(row_number, detail)
+
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+
+        cursor = self.conn.cursor()
+        self.conn.start_transaction()
+        try:
+            cursor.execute(
+                "INSERT INTO locations (name, address, latitude, longitude) VALUES "
+                + ", ".join(["(%s, %s, %s, %s)"] * len(pending)),
+                [value for _, location, _ in pending for value in location],
+            )
+            first_id = cursor.lastrowid
+            evaluations = [
+                (first_id + offset * self.id_step, criteria_id, value)
+                for offset, (_, _, criteria_values) in enumerate(pending)
+                for criteria_id, value in criteria_values
+            ]
+            if evaluations:
+                upsert_evaluations(cursor, evaluations)
+                bump_versions(cursor, 'locations', 'evaluations')
+            else:
+                bump_versions(cursor, 'locations')
+            self.conn.commit()
+            self.inserted += len(pending)
+            self.evaluations += len(evaluations)
+        except Exception as e:
+            self.conn.rollback()
+            for row_number, _, _ in pending:
+                self._error(row_number, f"Write failed: {e}")
+        finally:
+            cursor.close()
+
+        if self.progress:
+            self.progress(self.summary())
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "evaluations": self.evaluations,
+            "failed": self.failed,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(self.inserted / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def finish(self):
+        self.flush()
+        if self.inserted:
+            ranking_maintainer.invalidate()
+            spatial_index.invalidate()
+            location_id_cache.invalidate()
+        summary = self.summary()
+        summary["errors"] = self.errors
+        summary["errors_truncated"] = self.failed > len(self.errors)
+        return summary
+
+
+class FeatureCollectionParser:
+    """Parser GeoJSON FeatureCollection yang membaca array "features" satu per satu
+
+    Hanya satu feature yang di-decode pada satu waktu, jadi file besar tidak
+    perlu dimuat seluruhnya ke memori. GeoJSON text sequence / NDJSON (satu
+    Feature per baris) juga didukung. Feature dengan JSON rusak dicatat
+    sebagai satu error lalu parsing dilanjutkan dari feature berikutnya.
+    """
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.feature_number = 0
+        self._buffer = ""
+        self._pending_bytes = b""
+        self._in_array = False
+        self._done = False
+        self._sequence = None
+
+    def feed(self, chunk):
+        """Yield (feature_number, record, error) untuk setiap feature lengkap"""
+        data = self._pending_bytes + chunk
+        try:
+            text = data.decode("utf-8")
+            self._pending_bytes = b""
+        except UnicodeDecodeError as e:
+            # Karakter multi-byte terpotong di batas chunk
+            text = data[:e.start].decode("utf-8")
+            self._pending_bytes = data[e.start:]
+        self._buffer += text
+        yield from self._drain(final=False)
+
+    def close(self):
+        yield from self._drain(final=True)
+
+    def _drain(self, final):
+        if self._done:
+            return
+        if not self._in_array and not self._find_array():
+            return
+
+        buffer = self._buffer
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,\x1e":
+                position += 1
+            if position >= len(buffer):
+                break
+            if not self._sequence and buffer[position] == "]":
+                self._done = True
+                break
+            try:
+                feature, end = self.decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                end = value_end(buffer, position)
+                if end is None:
+                    if not final:
+                        break  # feature belum lengkap, tunggu chunk berikutnya
+                    end = len(buffer)
+                # Feature lengkap tapi rusak: lewati sampai batas feature berikutnya
+                self.feature_number += 1
+                yield self.feature_number, None, f"Invalid JSON: {e.msg}"
+                position = end
+                continue
+            position = end
+            self.feature_number += 1
+            yield (self.feature_number, *feature_record(feature))
+        self._buffer = buffer[position:]
+
+    def _find_array(self):
+        stripped = self._buffer.lstrip("\ufeff \t\r\n\x1e")
+        if not stripped:
+            return False
+        if self._sequence is None and stripped.startswith("{"):
+            # Cek apakah ini FeatureCollection atau Feature per baris
+            head = stripped[:200]
+            if '"Feature"' in head and '"FeatureCollection"' not in head and '"features"' not in head:
+                self._sequence = True
+                self._in_array = True
+                self._buffer = stripped
+                return True
+        key = self._buffer.find('"features"')
+        if key < 0:
+            return False
+        bracket = self._buffer.find("[", key)
+        if bracket < 0:
+            return False
+        self._sequence = False
+        self._in_array = True
+        self._buffer = self._buffer[bracket + 1:]
+        return True
+
+
+def value_end(text, start):
+    """Indeks akhir nilai JSON di text[start:] berdasarkan kurung seimbang (string dilewati)
+
+    Dipakai untuk melewati feature yang gagal di-decode: objek/array berakhir
+    di kurung penutupnya, nilai lain di koma / newline / RS berikutnya.
+    None jika nilainya belum lengkap.
+    """
+    depth = 0
+    in_string = escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            if depth == 0:
+                return max(index, start + 1)
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        elif depth == 0 and char in ",\n\x1e":
+            return max(index, start + 1)
+    return None
+
+
+def feature_record(feature):
+    """Ubah satu GeoJSON Feature (Point) menjadi record lokasi"""
+    if not isinstance(feature, dict) or feature.get('type') != 'Feature':
+        return None, "Expected a GeoJSON Feature"
+    geometry = feature.get('geometry') or {}
+    if geometry.get('type') != 'Point':
+        return None, "Only Point geometries are supported"
+    coordinates = geometry.get('coordinates') or []
+    if len(coordinates) < 2:
+        return None, "Point must have [longitude, latitude]"
+
+    record = dict(feature.get('properties') or {})
+    record['longitude'], record['latitude'] = coordinates[0], coordinates[1]
+    return record, None
+
+
+def make_parser(format):
+    if format == "geojson":
+        return FeatureCollectionParser()
+    return LineParser("csv")
+
+
+def detect_format(filename=None, content_type=None):
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith((".geojson", ".json", ".geojsonl", ".geojsons")) or "json" in content_type:
+        return "geojson"
+    return "csv"
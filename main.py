@@ -1,13 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import mysql.connector
-from db_config import get_db_connection
+from contextlib import asynccontextmanager
+from db_config import get_db, pool
 import json
 import uvicorn
 
-app = FastAPI(title="Tofico Analyzer API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool.reopen()
+    yield
+    pool.dispose()
+
+app = FastAPI(title="Tofico Analyzer API", version="1.0.0", lifespan=lifespan)
 
 # CORS untuk ngrok dan GitHub Pages
 app.add_middleware(
@@ -50,9 +57,8 @@ def root():
 
 # LOCATIONS ENDPOINTS
 @app.get("/locations")
-def get_locations():
+def get_locations(conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM locations")
         locations = cursor.fetchall()
@@ -63,15 +69,13 @@ def get_locations():
                 location['criteria'] = json.loads(location['criteria'])
         
         cursor.close()
-        conn.close()
         return locations
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/locations/{location_id}")
-def get_location(location_id: int):
+def get_location(location_id: int, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM locations WHERE id = %s", (location_id,))
         location = cursor.fetchone()
@@ -84,7 +88,6 @@ def get_location(location_id: int):
             location['criteria'] = json.loads(location['criteria'])
         
         cursor.close()
-        conn.close()
         return location
     except HTTPException:
         raise
@@ -92,14 +95,13 @@ def get_location(location_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/locations")
-def create_location(location: LocationCreate):
+def create_location(location: LocationCreate, conn=Depends(get_db)):
     try:
         # Validasi criteria (0-100)
         for key, value in location.criteria.items():
             if not (0 <= value <= 100):
                 raise HTTPException(status_code=400, detail=f"Criteria '{key}' must be between 0-100")
         
-        conn = get_db_connection()
         cursor = conn.cursor()
         
         query = """
@@ -123,7 +125,6 @@ def create_location(location: LocationCreate):
         new_location = cursor.fetchone()
         
         cursor.close()
-        conn.close()
         
         return {
             "id": new_location[0],
@@ -139,9 +140,8 @@ def create_location(location: LocationCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/locations/{location_id}")
-def update_location(location_id: int, location: LocationUpdate):
+def update_location(location_id: int, location: LocationUpdate, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor()
         
         # Check if location exists
@@ -187,7 +187,6 @@ def update_location(location_id: int, location: LocationUpdate):
         updated_location = cursor.fetchone()
         
         cursor.close()
-        conn.close()
         
         return {
             "id": updated_location[0],
@@ -203,9 +202,8 @@ def update_location(location_id: int, location: LocationUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/locations/{location_id}")
-def delete_location(location_id: int):
+def delete_location(location_id: int, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor()
         
         # Check if location exists
@@ -217,7 +215,6 @@ def delete_location(location_id: int):
         conn.commit()
         
         cursor.close()
-        conn.close()
         
         return {"message": "Location deleted successfully"}
     except HTTPException:
@@ -227,20 +224,18 @@ def delete_location(location_id: int):
 
 # CRITERIA ENDPOINTS
 @app.get("/criteria")
-def get_criteria():
+def get_criteria(conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM criteria")
         criteria = cursor.fetchall()
         cursor.close()
-        conn.close()
         return criteria
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/criteria")
-def create_criteria(criteria: CriteriaCreate):
+def create_criteria(criteria: CriteriaCreate, conn=Depends(get_db)):
     try:
         # Validasi weight (0-1)
         if not (0 <= criteria.weight <= 1):
@@ -250,7 +245,6 @@ def create_criteria(criteria: CriteriaCreate):
         if criteria.type not in ['benefit', 'cost']:
             raise HTTPException(status_code=400, detail="Type must be 'benefit' or 'cost'")
         
-        conn = get_db_connection()
         cursor = conn.cursor()
         
         query = "INSERT INTO criteria (id, name, weight, type) VALUES (%s, %s, %s, %s)"
@@ -259,7 +253,6 @@ def create_criteria(criteria: CriteriaCreate):
         cursor.execute(query, values)
         conn.commit()
         cursor.close()
-        conn.close()
         
         return {
             "id": criteria.id,
@@ -275,9 +268,8 @@ def create_criteria(criteria: CriteriaCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/criteria/{criteria_id}")
-def delete_criteria(criteria_id: str):
+def delete_criteria(criteria_id: str, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor()
         
         # Check if criteria exists
@@ -288,7 +280,6 @@ def delete_criteria(criteria_id: str):
         cursor.execute("DELETE FROM criteria WHERE id = %s", (criteria_id,))
         conn.commit()
         cursor.close()
-        conn.close()
         
         return {"message": "Criteria deleted successfully"}
     except HTTPException:
@@ -300,13 +291,12 @@ def delete_criteria(criteria_id: str):
 @app.get("/health")
 def health_check():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return {"status": "healthy", "database": "connected"}
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+        return {"status": "healthy", "database": "connected", "pool": pool.status()}
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
@@ -1,17 +1,128 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import mysql.connector
-from db_config_normalized import get_db_connection
+from contextlib import asynccontextmanager
+from db_config_normalized import get_db, pool, DB_ASYNC
+from evaluation_import import EvaluationImporter, LineParser, consume_records
+from location_import import LocationImporter, detect_format, make_parser
+from formatters import (
+    format_location, format_location_batch, format_location_page, location_ndjson_lines,
+    format_nearby, format_nearby_ranking,
+)
+from location_filters import LocationQuery, location_query, NearbyQuery, nearby_query
+import repository
+import metrics
+from ranking_cache import get_ranking, ranking_maintainer, ranking_versions
+from shared_matrix import MATRIX_STORE, current_matrix, shared_store
+from replicas import (SESSION_TOKEN_HEADER, get_read_db, is_primary, read_connection, replica_router, request_token,
+                      uses_primary)
+from matrix_encoding import BINARY_DTYPES, BINARY_MEDIA_TYPE, matrix_binary, matrix_json
+from scoring import ALGORITHMS, ScoringContext, rank_locations
+import consensus
+import sensitivity
+from spatial_index import spatial_index
+from location_id_cache import location_id_cache
+from criteria_cache import criteria_cache
+from data_versions import load_versions
+from http_cache import response_cache
+from serialization import dumps, fast_response
+from health import STARTUP_WARM_UP, HealthMonitor
 import uvicorn
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Tofico Analyzer API - Normalized", version="2.0.0")
+def check_database():
+    # Pinjam langsung dari pool supaya pool yang habis dilaporkan sebagai unhealthy
+    with pool.connection() as conn:
+        repository.ping(conn)
+
+def health_collectors():
+    """Statistik pool dan cache per proses untuk /health (dibaca dari memori)"""
+    collectors = {
+        "pool": pool.status,
+        "criteria_cache": criteria_cache.status,
+        "spatial_index": spatial_index.status,
+        "location_ids": location_id_cache.status,
+        "ranking": ranking_maintainer.status,
+        "response_cache": response_cache.status,
+        "queries": repository.status,
+    }
+    if MATRIX_STORE:
+        collectors["shared_matrix"] = shared_store.status
+    if replica_router.replicas:
+        collectors["replicas"] = replica_router.status
+    if DB_ASYNC:
+        from db_async import async_db
+        collectors["async_pool"] = async_db.status
+    return collectors
+
+health_monitor = HealthMonitor(check_database, health_collectors())
+
+def warm_up_ranking():
+    """Matriks keputusan + IncrementalRanking di memori, lalu semua algoritma dan
+    serializer dijalankan sekali supaya request pertama tidak membayar inisialisasi numpy/BLAS"""
+    with pool.connection() as conn:
+        fingerprint, versions = ranking_versions(conn)
+        matrix = current_matrix(conn, versions)
+    ranking = ranking_maintainer.replace(matrix, fingerprint, versions)
+    context = ScoringContext(matrix)
+    for algorithm in ALGORITHMS.values():
+        algorithm(context)
+    dumps({"results": ranking.rows('saw', limit=10)})
+
+def warm_up_steps():
+    """(nama, fungsi) yang dijalankan HealthMonitor.warm_up saat startup"""
+    def criteria():
+        with pool.connection() as conn:
+            criteria_cache.all(conn)
+
+    def spatial():
+        with pool.connection() as conn:
+            spatial_index.load(conn)
+
+    steps = [("pool", pool.warm_up), ("criteria", criteria), ("spatial_index", spatial)]
+    if MATRIX_STORE:
+        steps.append(("shared_matrix", lambda: shared_store.start(pool)))
+    steps.append(("ranking", warm_up_ranking))
+    return steps
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool.reopen()
+    if DB_ASYNC:
+        from db_async import open_databases
+        await open_databases()
+    health_monitor.start()
+    # Warm-up di thread latar: liveness langsung menjawab, readiness menunggu warm-up selesai
+    steps = warm_up_steps() if STARTUP_WARM_UP else []
+    threading.Thread(target=health_monitor.warm_up, args=(steps,), name="warm-up", daemon=True).start()
+    if MATRIX_STORE:
+        stop_refresher = shared_store.start_refresher(pool)
+    if replica_router.replicas:
+        replica_router.reopen()
+        stop_replica_monitor = replica_router.start_monitor()
+    yield
+    if replica_router.replicas:
+        stop_replica_monitor.set()
+        replica_router.dispose()
+    if MATRIX_STORE:
+        stop_refresher.set()
+    health_monitor.stop()
+    if DB_ASYNC:
+        from db_async import close_databases
+        await close_databases()
+    pool.dispose()
+
+app = FastAPI(title="Tofico Analyzer API - Normalized", version="2.0.0", lifespan=lifespan)
 
 # CORS untuk ngrok dan GitHub Pages
 app.add_middleware(
@@ -20,8 +131,65 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[SESSION_TOKEN_HEADER],
 )
 
+# Opsional: header X-DB-Statements (jumlah query database per request) untuk benchmark / cek regresi
+DB_STATEMENT_HEADER = os.getenv('DB_STATEMENT_HEADER', 'false').lower() == 'true'
+
+def route_label(request):
+    """Template path (/locations/{location_id}), bukan path mentah, supaya jumlah label terbatas"""
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+if metrics.METRICS_ENABLED or DB_STATEMENT_HEADER:
+    metrics.watch_pool(pool)
+
+    @app.middleware("http")
+    async def instrument_request(request: Request, call_next):
+        """Latensi, ukuran response dan query database per route (GET /metrics)"""
+        started = time.perf_counter()
+        metrics.IN_FLIGHT.inc()
+        with metrics.trace_request() as trace:
+            try:
+                response = await call_next(request)
+            except BaseException:
+                metrics.IN_FLIGHT.dec()
+                metrics.finish_request(request.method, route_label(request), 500,
+                                       time.perf_counter() - started, 0, trace)
+                raise
+        route = route_label(request)
+        
+        def finish(size):
+            metrics.IN_FLIGHT.dec()
+            metrics.finish_request(request.method, route, response.status_code,
+                                   time.perf_counter() - started, size, trace)
+        
+        if DB_STATEMENT_HEADER:
+            response.headers["X-DB-Statements"] = str(trace.queries)
+        # Metrik dicatat setelah body terkirim, jadi export streaming ikut terukur penuh
+        response.body_iterator = metrics.count_body(response.body_iterator, finish)
+        return response
+
+if replica_router.replicas:
+    @app.middleware("http")
+    async def session_token(request: Request, call_next):
+        """Write yang berhasil mendapat X-Session-Token untuk read-your-writes di replica"""
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if request.method != "GET" and response.status_code < 400 and route is not None and uses_primary(route):
+            try:
+                response.headers[SESSION_TOKEN_HEADER] = await run_in_threadpool(replica_router.write_token)
+            except Exception:
+                # Write sudah berhasil; tanpa token klien membaca replica seperti biasa
+                pass
+        return response
+
+# Presisi kolom locations.latitude / longitude (DECIMAL(.., 8))
+COORDINATE_DECIMALS = 8
+# Batas id per POST /locations/batch
+MAX_BATCH_IDS = 1000
+
 # Pydantic Models
 class LocationCreate(BaseModel):
     name: str
@@ -35,6 +203,9 @@ class LocationUpdate(BaseModel):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
 
+class LocationBatch(BaseModel):
+    ids: List[int]
+
 class CriteriaCreate(BaseModel):
     id: str
     name: str
@@ -51,6 +222,21 @@ class EvaluationUpdate(BaseModel):
     criteria_id: str
     value: int
 
+class EvaluationBatch(BaseModel):
+    # Divalidasi per baris di EvaluationImporter supaya satu baris salah tidak menggagalkan batch
+    evaluations: List[Dict[str, Any]]
+
+class SensitivityRequest(BaseModel):
+    algorithm: str = "saw"
+    method: str = "dirichlet"  # 'grid', 'one_at_a_time' atau 'dirichlet'
+    samples: int = 1000  # dirichlet: jumlah sampel bobot
+    concentration: Optional[float] = None  # dirichlet: None = seragam, besar = dekat bobot saat ini
+    seed: Optional[int] = None
+    delta: float = 0.1  # one_at_a_time: perubahan bobot maksimum
+    steps: int = 5  # grid: pembagian bobot; one_at_a_time: langkah per arah
+    top_k: int = 10
+    limit: Optional[int] = 100
+
 class LocationWithEvaluations(BaseModel):
     id: int
     name: str
@@ -66,179 +252,172 @@ def root():
         "message": "Tofico Analyzer API - Normalized Version",
         "status": "running",
         "version": "2.0.0",
-        "endpoints": ["/locations", "/criteria", "/evaluations", "/docs"]
+        "endpoints": ["/locations", "/criteria", "/evaluations", "/matrix", "/rankings", "/docs"]
     }
 
 # LOCATIONS ENDPOINTS
 @app.get("/locations")
-def get_locations():
+def get_locations(request: Request, query: LocationQuery = Depends(location_query), conn=Depends(get_read_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get locations with their evaluations
-        query = """
-        SELECT 
-            l.id, l.name, l.address, l.latitude, l.longitude,
-            e.criteria_id, e.value
-        FROM locations l
-        LEFT JOIN evaluations e ON l.id = e.location_id
-        ORDER BY l.id, e.criteria_id
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        # Group evaluations by location
-        locations = {}
-        for row in results:
-            location_id = row['id']
-            if location_id not in locations:
-                locations[location_id] = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'address': row['address'],
-                    'latitude': float(row['latitude']) if row['latitude'] else 0,
-                    'longitude': float(row['longitude']) if row['longitude'] else 0,
-                    'criteria': {}
-                }
-            
-            if row['criteria_id']:
-                locations[location_id]['criteria'][row['criteria_id']] = row['value']
-        
-        cursor.close()
-        conn.close()
-        return list(locations.values())
+        # 304 / body tersimpan jika tabel locations & evaluations belum berubah
+        validators = response_cache.validators(request, load_versions(conn), ('locations', 'evaluations'))
+        cached = response_cache.cached(request, validators)
+        if cached is not None:
+            return cached
+        
+        # Get locations, then their evaluations for the same page
+        rows, evaluations = repository.location_page(conn, query)
+        return response_cache.render(request, validators, format_location_page(query, rows, evaluations))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/locations/{location_id}")
-def get_location(location_id: int):
+def stream_locations(query, token):
+    # Koneksi dipinjam di dalam generator karena body masih dikirim setelah handler selesai
+    with read_connection(token) as conn:
+        cursor = repository.export_cursor(conn, query)
+        yield from location_ndjson_lines(cursor, query.fields)
+        cursor.close()
+
+@app.get("/locations/export")
+def export_locations(request: Request, query: LocationQuery = Depends(location_query)):
+    """NDJSON satu lokasi per baris, dibaca bertahap dari cursor server (memori konstan)"""
+    return StreamingResponse(stream_locations(query, request_token(request)), media_type="application/x-ndjson")
+
+@app.post("/locations/import")
+async def import_locations(request: Request, format: Optional[str] = None, conn=Depends(get_db)):
+    """Stream CSV (name,address,latitude,longitude[,criteria.<id>...]) atau GeoJSON Point features"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get location
-        cursor.execute("SELECT * FROM locations WHERE id = %s", (location_id,))
-        location = cursor.fetchone()
-        
-        if not location:
-            raise HTTPException(status_code=404, detail="Location not found")
+        format = format or detect_format(content_type=request.headers.get("content-type"))
+        if format not in ("csv", "geojson"):
+            raise HTTPException(status_code=400, detail="Format must be 'csv' or 'geojson'")
         
-        # Get evaluations for this location
-        cursor.execute("SELECT criteria_id, value FROM evaluations WHERE location_id = %s", (location_id,))
-        evaluations = cursor.fetchall()
+        importer = await run_in_threadpool(LocationImporter, conn)
+        parser = make_parser(format)
         
-        location['criteria'] = {eval['criteria_id']: eval['value'] for eval in evaluations}
-        location['latitude'] = float(location['latitude']) if location['latitude'] else 0
-        location['longitude'] = float(location['longitude']) if location['longitude'] else 0
+        async for chunk in request.stream():
+            await run_in_threadpool(consume_records, importer, list(parser.feed(chunk)))
+        await run_in_threadpool(consume_records, importer, list(parser.close()))
         
-        cursor.close()
-        conn.close()
-        return location
+        return await run_in_threadpool(importer.finish)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/locations")
-def create_location(location: LocationCreate):
+@app.get("/locations/nearby")
+def get_nearby_locations(query: NearbyQuery = Depends(nearby_query), conn=Depends(get_read_db)):
+    """Lokasi dalam radius_km dan/atau k terdekat dari (lat, lng), urut jarak"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-        INSERT INTO locations (name, address, latitude, longitude) 
-        VALUES (%s, %s, %s, %s)
-        """
-        values = (location.name, location.address, location.latitude, location.longitude)
+        ids, distances = spatial_index.search(conn, query.lat, query.lng, query.radius_km, query.k)
         
-        cursor.execute(query, values)
-        conn.commit()
-        
-        location_id = cursor.lastrowid
+        rows = repository.locations_by_ids(conn, ids.tolist())
+        return format_nearby(rows, ids, distances)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/locations/batch")
+def get_locations_batch(batch: LocationBatch, conn=Depends(get_read_db)):
+    """Banyak lokasi beserta evaluasinya dalam satu query, urut sesuai ids, plus id yang tidak ada"""
+    try:
+        ids = list(dict.fromkeys(batch.ids))
+        if len(ids) > MAX_BATCH_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
         
-        # Get the created location
-        cursor.execute("SELECT * FROM locations WHERE id = %s", (location_id,))
-        new_location = cursor.fetchone()
+        found = repository.locations_with_evaluations(conn, ids)
+        return format_location_batch(ids, found)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/locations/{location_id}")
+def get_location(location_id: int, conn=Depends(get_read_db)):
+    try:
+        # Location + evaluations dalam satu query
+        found = repository.location_with_evaluations(conn, location_id)
         
-        cursor.close()
-        conn.close()
+        if not found:
+            raise HTTPException(status_code=404, detail="Location not found")
         
+        return format_location(*found)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/locations")
+def create_location(location: LocationCreate, conn=Depends(get_db)):
+    try:
+        with repository.transaction(conn):
+            location_id = repository.insert_location(
+                conn, location.name, location.address, location.latitude, location.longitude
+            )
+            repository.bump_versions(conn, 'locations')
+            versions = load_versions(conn)
+        ranking_maintainer.invalidate()
+        spatial_index.apply(versions, lambda index: index.add(location_id, location.latitude, location.longitude))
+        location_id_cache.apply(versions, lambda ids: ids.add(location_id))
+        
+        # Tanpa SELECT ulang: nilai tersimpan = input (koordinat dibulatkan seperti DECIMAL kolomnya)
         return {
-            "id": new_location[0],
-            "name": new_location[1],
-            "address": new_location[2],
-            "latitude": float(new_location[3]) if new_location[3] else 0,
-            "longitude": float(new_location[4]) if new_location[4] else 0,
+            "id": location_id,
+            "name": location.name,
+            "address": location.address,
+            "latitude": round(location.latitude, COORDINATE_DECIMALS),
+            "longitude": round(location.longitude, COORDINATE_DECIMALS),
             "criteria": {}
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/locations/{location_id}")
-def update_location(location_id: int, location: LocationUpdate):
+def update_location(location_id: int, location: LocationUpdate, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if location exists
-        cursor.execute("SELECT * FROM locations WHERE id = %s", (location_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Location not found")
-        
-        # Build update query dynamically
-        updates = []
-        values = []
-        
-        if location.name is not None:
-            updates.append("name = %s")
-            values.append(location.name)
-        if location.address is not None:
-            updates.append("address = %s")
-            values.append(location.address)
-        if location.latitude is not None:
-            updates.append("latitude = %s")
-            values.append(location.latitude)
-        if location.longitude is not None:
-            updates.append("longitude = %s")
-            values.append(location.longitude)
-        
-        if not updates:
+        fields = location.model_dump(exclude_none=True)
+        if not fields:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        values.append(location_id)
-        query = f"UPDATE locations SET {', '.join(updates)} WHERE id = %s"
-        
-        cursor.execute(query, values)
-        conn.commit()
+        with repository.transaction(conn):
+            # rowcount 0: lokasi tidak ada atau nilainya sama; SELECT ulang membedakan keduanya
+            changed = repository.update_location(conn, location_id, **fields)
+            found = repository.location_with_evaluations(conn, location_id)
+            if changed and found:
+                repository.bump_versions(conn, 'locations')
+                versions = load_versions(conn)
         
-        cursor.close()
-        conn.close()
-        
-        # Return updated location
-        return get_location(location_id)
+        if not found:
+            raise HTTPException(status_code=404, detail="Location not found")
+        if changed:
+            # Index spasial hanya berubah jika koordinat ikut diubah, tapi versinya tetap ikut naik
+            moved = location.latitude is not None or location.longitude is not None
+            latitude, longitude = float(found[0]['latitude'] or 0), float(found[0]['longitude'] or 0)
+            spatial_index.apply(versions,
+                                (lambda index: index.add(location_id, latitude, longitude)) if moved else None)
+            location_id_cache.apply(versions)
+            # Nama lokasi ikut ditampilkan di ranking di memori
+            ranking_maintainer.apply(versions, ('locations',),
+                                     lambda ranking: ranking.set_name(location_id, found[0]['name']))
+        return format_location(*found)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/locations/{location_id}")
-def delete_location(location_id: int):
+def delete_location(location_id: int, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if location exists
-        cursor.execute("SELECT * FROM locations WHERE id = %s", (location_id,))
-        if not cursor.fetchone():
+        with repository.transaction(conn):
+            deleted = repository.delete_location(conn, location_id)
+            if deleted:
+                repository.bump_versions(conn, 'locations', 'evaluations')
+                versions = load_versions(conn)
+        if deleted:
+            ranking_maintainer.invalidate()
+            spatial_index.apply(versions, lambda index: index.remove(location_id))
+            location_id_cache.apply(versions, lambda ids: ids.discard(location_id))
+        
+        if not deleted:
             raise HTTPException(status_code=404, detail="Location not found")
-        
-        cursor.execute("DELETE FROM locations WHERE id = %s", (location_id,))
-        conn.commit()
-        
-        cursor.close()
-        conn.close()
-        
         return {"message": "Location deleted successfully"}
     except HTTPException:
         raise
@@ -247,25 +426,20 @@ def delete_location(location_id: int):
 
 # CRITERIA ENDPOINTS
 @app.get("/criteria")
-def get_criteria():
+def get_criteria(request: Request, conn=Depends(get_read_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM criteria ORDER BY name")
-        criteria = cursor.fetchall()
-        
-        # Convert weight to float
-        for criterion in criteria:
-            criterion['weight'] = float(criterion['weight'])
-        
-        cursor.close()
-        conn.close()
-        return criteria
+        versions = load_versions(conn)
+        validators = response_cache.validators(request, versions, ('criteria',))
+        cached = response_cache.cached(request, validators)
+        if cached is not None:
+            return cached
+        # Body dari versi yang sama dengan ETag-nya
+        return response_cache.render(request, validators, criteria_cache.all(conn, versions, store=is_primary(conn)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/criteria")
-def create_criteria(criteria: CriteriaCreate):
+def create_criteria(criteria: CriteriaCreate, conn=Depends(get_db)):
     try:
         # Validasi weight (0-1)
         if not (0 <= criteria.weight <= 1):
@@ -275,16 +449,11 @@ def create_criteria(criteria: CriteriaCreate):
         if criteria.type not in ['benefit', 'cost']:
             raise HTTPException(status_code=400, detail="Type must be 'benefit' or 'cost'")
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = "INSERT INTO criteria (id, name, weight, type) VALUES (%s, %s, %s, %s)"
-        values = (criteria.id, criteria.name, criteria.weight, criteria.type)
-        
-        cursor.execute(query, values)
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with repository.transaction(conn):
+            repository.insert_criteria(conn, criteria.id, criteria.name, criteria.weight, criteria.type)
+            repository.bump_versions(conn, 'criteria')
+        ranking_maintainer.invalidate()
+        criteria_cache.invalidate()
         
         return {
             "id": criteria.id,
@@ -300,55 +469,45 @@ def create_criteria(criteria: CriteriaCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/criteria/{criteria_id}")
-def update_criteria(criteria_id: str, criteria: CriteriaUpdate):
+def update_criteria(criteria_id: str, criteria: CriteriaUpdate, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Check if criteria exists
-        cursor.execute("SELECT * FROM criteria WHERE id = %s", (criteria_id,))
-        if not cursor.fetchone():
+        if not criteria_cache.exists(conn, criteria_id):
             raise HTTPException(status_code=404, detail="Criteria not found")
         
-        # Build update query dynamically
-        updates = []
-        values = []
-        
-        if criteria.name is not None:
-            updates.append("name = %s")
-            values.append(criteria.name)
-        if criteria.weight is not None:
-            if not (0 <= criteria.weight <= 1):
-                raise HTTPException(status_code=400, detail="Weight must be between 0-1")
-            updates.append("weight = %s")
-            values.append(criteria.weight)
-        if criteria.type is not None:
-            if criteria.type not in ['benefit', 'cost']:
-                raise HTTPException(status_code=400, detail="Type must be 'benefit' or 'cost'")
-            updates.append("type = %s")
-            values.append(criteria.type)
-        
-        if not updates:
-            raise HTTPException(status_code=400, detail="No fields to update")
-        
-        values.append(criteria_id)
-        query = f"UPDATE criteria SET {', '.join(updates)} WHERE id = %s"
-        
-        cursor.execute(query, values)
-        conn.commit()
+        if criteria.weight is not None and not (0 <= criteria.weight <= 1):
+            raise HTTPException(status_code=400, detail="Weight must be between 0-1")
+        if criteria.type is not None and criteria.type not in ['benefit', 'cost']:
+            raise HTTPException(status_code=400, detail="Type must be 'benefit' or 'cost'")
         
-        # Get updated criteria
-        cursor.execute("SELECT * FROM criteria WHERE id = %s", (criteria_id,))
-        updated_criteria = cursor.fetchone()
+        fields = criteria.model_dump(exclude_none=True)
+        if not fields:
+            raise HTTPException(status_code=400, detail="No fields to update")
         
-        cursor.close()
-        conn.close()
+        with repository.transaction(conn):
+            changed = repository.update_criteria(conn, criteria_id, **fields)
+            if changed:
+                repository.bump_versions(conn, 'criteria')
+                versions = load_versions(conn)
+            # Get updated criteria
+            updated_criteria = repository.criteria_by_id(conn, criteria_id)
+        if changed:
+            criteria_cache.invalidate()
+            # Ranking di memori ikut diperbarui per kolom, tanpa hitung ulang penuh
+            # (perubahan nama saja tetap menaikkan versinya)
+            weight = round(criteria.weight, 3) if criteria.weight is not None else None
+            ranking_maintainer.apply(versions, ('criteria',), lambda ranking: ranking.set_criteria(
+                criteria_id, weight=weight, type=criteria.type))
+        
+        # Cache bisa basi jika kriteria baru saja dihapus worker lain
+        if not updated_criteria:
+            raise HTTPException(status_code=404, detail="Criteria not found")
         
         return {
-            "id": updated_criteria[0],
-            "name": updated_criteria[1],
-            "weight": float(updated_criteria[2]),
-            "type": updated_criteria[3]
+            "id": updated_criteria['id'],
+            "name": updated_criteria['name'],
+            "weight": float(updated_criteria['weight']),
+            "type": updated_criteria['type']
         }
     except HTTPException:
         raise
@@ -356,21 +515,20 @@ def update_criteria(criteria_id: str, criteria: CriteriaUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/criteria/{criteria_id}")
-def delete_criteria(criteria_id: str):
+def delete_criteria(criteria_id: str, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if criteria exists
-        cursor.execute("SELECT * FROM criteria WHERE id = %s", (criteria_id,))
-        if not cursor.fetchone():
+        # rowcount 0 = tidak ada, tanpa SELECT terpisah
+        with repository.transaction(conn):
+            deleted = repository.delete_criteria(conn, criteria_id)
+            if deleted:
+                repository.bump_versions(conn, 'criteria', 'evaluations')
+        if deleted:
+            ranking_maintainer.invalidate()
+        criteria_cache.invalidate()
+        
+        if not deleted:
             raise HTTPException(status_code=404, detail="Criteria not found")
         
-        cursor.execute("DELETE FROM criteria WHERE id = %s", (criteria_id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
         return {"message": "Criteria deleted successfully"}
     except HTTPException:
         raise
@@ -379,62 +537,52 @@ def delete_criteria(criteria_id: str):
 
 # EVALUATIONS ENDPOINTS
 @app.get("/evaluations")
-def get_evaluations():
+def get_evaluations(request: Request, conn=Depends(get_read_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-        SELECT 
-            e.location_id, e.criteria_id, e.value,
-            l.name as location_name,
-            c.name as criteria_name, c.type as criteria_type
-        FROM evaluations e
-        JOIN locations l ON e.location_id = l.id
-        JOIN criteria c ON e.criteria_id = c.id
-        ORDER BY l.name, c.name
-        """
-        cursor.execute(query)
-        evaluations = cursor.fetchall()
+        validators = response_cache.validators(request, load_versions(conn), ('locations', 'criteria', 'evaluations'))
+        cached = response_cache.cached(request, validators)
+        if cached is not None:
+            return cached
         
-        cursor.close()
-        conn.close()
-        return evaluations
+        evaluations = repository.evaluations_with_names(conn)
+        return response_cache.render(request, validators, evaluations)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/evaluations")
-def update_evaluation(evaluation: EvaluationUpdate):
+def update_evaluation(evaluation: EvaluationUpdate, conn=Depends(get_db)):
     try:
         # Validasi value (0-100)
         if not (0 <= evaluation.value <= 100):
             raise HTTPException(status_code=400, detail="Value must be between 0-100")
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if location and criteria exist
-        cursor.execute("SELECT * FROM locations WHERE id = %s", (evaluation.location_id,))
-        if not cursor.fetchone():
+        # Lokasi/kriteria yang tidak ada dideteksi dari foreign key, tanpa SELECT terpisah
+        missing = None
+        with repository.transaction(conn):
+            try:
+                # Insert or update evaluation; rowcount 0 berarti nilai tidak berubah
+                changed = repository.upsert_evaluation(conn, evaluation.location_id, evaluation.criteria_id,
+                                                       evaluation.value)
+            except mysql.connector.IntegrityError as e:
+                missing = repository.missing_reference(e)
+                if missing is None:
+                    raise
+                changed = 0
+            if changed:
+                repository.bump_versions(conn, 'evaluations')
+                versions = load_versions(conn)
+        if changed:
+            # Ranking di memori ikut diperbarui untuk sel ini saja
+            ranking_maintainer.apply(versions, ('evaluations',), lambda ranking: ranking.set_value(
+                evaluation.location_id, evaluation.criteria_id, evaluation.value))
+        
+        if missing == 'location_id':
             raise HTTPException(status_code=404, detail="Location not found")
-        
-        cursor.execute("SELECT * FROM criteria WHERE id = %s", (evaluation.criteria_id,))
-        if not cursor.fetchone():
+        if missing == 'criteria_id':
+            # Bisa jadi kriteria dihapus worker lain
+            criteria_cache.invalidate()
             raise HTTPException(status_code=404, detail="Criteria not found")
         
-        # Insert or update evaluation
-        query = """
-        INSERT INTO evaluations (location_id, criteria_id, value) 
-        VALUES (%s, %s, %s)
-        ON DUPLICATE KEY UPDATE value = VALUES(value)
-        """
-        values = (evaluation.location_id, evaluation.criteria_id, evaluation.value)
-        
-        cursor.execute(query, values)
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
         return {
             "location_id": evaluation.location_id,
             "criteria_id": evaluation.criteria_id,
@@ -447,42 +595,251 @@ def update_evaluation(evaluation: EvaluationUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/evaluations/{location_id}/{criteria_id}")
-def delete_evaluation(location_id: int, criteria_id: str):
+def delete_evaluation(location_id: int, criteria_id: str, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if evaluation exists
-        cursor.execute("SELECT * FROM evaluations WHERE location_id = %s AND criteria_id = %s", 
-                      (location_id, criteria_id))
-        if not cursor.fetchone():
+        with repository.transaction(conn):
+            # rowcount 0 = evaluasi tidak ada, tanpa SELECT terpisah
+            deleted = repository.delete_evaluation(conn, location_id, criteria_id)
+            if deleted:
+                repository.bump_versions(conn, 'evaluations')
+                versions = load_versions(conn)
+        if deleted:
+            ranking_maintainer.apply(versions, ('evaluations',),
+                                     lambda ranking: ranking.set_value(location_id, criteria_id, None))
+        
+        if not deleted:
             raise HTTPException(status_code=404, detail="Evaluation not found")
+        return {"message": "Evaluation deleted successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/evaluations/batch")
+def update_evaluations_batch(batch: EvaluationBatch, conn=Depends(get_db)):
+    try:
+        importer = EvaluationImporter(conn)
+        for row_number, record in enumerate(batch.evaluations, start=1):
+            importer.add(row_number, record)
+        return importer.finish()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/evaluations/import")
+async def import_evaluations(request: Request, format: Optional[str] = None, conn=Depends(get_db)):
+    """Stream NDJSON (satu objek per baris) atau CSV (header location_id,criteria_id,value)"""
+    try:
+        if format is None:
+            content_type = request.headers.get("content-type", "")
+            format = "csv" if "csv" in content_type else "ndjson"
+        if format not in ("csv", "ndjson"):
+            raise HTTPException(status_code=400, detail="Format must be 'csv' or 'ndjson'")
         
-        cursor.execute("DELETE FROM evaluations WHERE location_id = %s AND criteria_id = %s", 
-                      (location_id, criteria_id))
-        conn.commit()
-        cursor.close()
-        conn.close()
+        importer = await run_in_threadpool(EvaluationImporter, conn)
+        parser = LineParser(format)
         
-        return {"message": "Evaluation deleted successfully"}
+        async for chunk in request.stream():
+            # Parsing murah, flush ke database (blocking) dijalankan di threadpool
+            await run_in_threadpool(consume_records, importer, list(parser.feed(chunk)))
+        await run_in_threadpool(consume_records, importer, list(parser.close()))
+        
+        return await run_in_threadpool(importer.finish)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Health check
-@app.get("/health")
-def health_check():
+# MATRIX ENDPOINT
+@app.get("/matrix")
+def get_matrix(request: Request, format: str = "json", dtype: str = "float32", conn=Depends(get_read_db)):
+    """Matriks keputusan ringkas: urutan lokasi & kriteria + nilai row-major (json atau binary)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return {"status": "healthy", "database": "connected"}
+        if format not in ("json", "binary"):
+            raise HTTPException(status_code=400, detail="Format must be 'json' or 'binary'")
+        if dtype not in BINARY_DTYPES:
+            raise HTTPException(status_code=400, detail=f"dtype must be one of: {', '.join(BINARY_DTYPES)}")
+        
+        versions = load_versions(conn)
+        validators = response_cache.validators(request, versions, ('locations', 'criteria', 'evaluations'))
+        cached = response_cache.cached(request, validators)
+        if cached is not None:
+            return cached
+        
+        matrix = current_matrix(conn, versions)
+        criteria = criteria_cache.all(conn, versions, store=is_primary(conn))
+        criteria_names = {row['id']: row['name'] for row in criteria}
+        
+        if format == "binary":
+            return response_cache.store(validators, matrix_binary(matrix, criteria_names, dtype), BINARY_MEDIA_TYPE)
+        return response_cache.render(request, validators, matrix_json(matrix, criteria_names))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# RANKINGS ENDPOINTS
+@app.get("/rankings")
+def get_rankings(request: Request, background_tasks: BackgroundTasks, algorithm: str = "saw",
+                 offset: int = 0, limit: Optional[int] = None, min_score: Optional[float] = None,
+                 conn=Depends(get_read_db)):
+    """Ranking lengkap, atau satu halaman (offset/limit) dan/atau skor >= min_score"""
+    try:
+        algorithm = algorithm.lower()
+        if algorithm not in ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"Algorithm must be one of: {', '.join(ALGORITHMS)}")
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="offset must not be negative")
+        if limit is not None and limit < 1:
+            raise HTTPException(status_code=400, detail="limit must be at least 1")
+        
+        results, fingerprint, cached = get_ranking(conn, algorithm, offset, limit, min_score, background_tasks)
+        
+        return fast_response(request, {
+            "algorithm": algorithm,
+            "fingerprint": fingerprint,
+            "cached": cached,
+            "offset": offset,
+            "limit": limit,
+            "min_score": min_score,
+            "count": len(results),
+            "results": results
+        })
+    except HTTPException:
+        raise
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/rankings/nearby")
+def get_nearby_rankings(algorithm: str = "saw", limit: Optional[int] = None,
+                        query: NearbyQuery = Depends(nearby_query), conn=Depends(get_read_db)):
+    """Ranking global yang dibatasi ke lokasi di sekitar (lat, lng), mis. top-10 dalam 5 km"""
+    try:
+        algorithm = algorithm.lower()
+        if algorithm not in ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"Algorithm must be one of: {', '.join(ALGORITHMS)}")
+        if limit is not None and limit < 1:
+            raise HTTPException(status_code=400, detail="limit must be at least 1")
+        
+        ids, distances = spatial_index.search(conn, query.lat, query.lng, query.radius_km, query.k)
+        results, fingerprint, cached = get_ranking(conn, algorithm)
+        results = format_nearby_ranking(results, ids, distances)[:limit]
+        
+        return {
+            "algorithm": algorithm,
+            "fingerprint": fingerprint,
+            "cached": cached,
+            "count": len(results),
+            "results": results
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/rankings/consensus")
+def get_consensus_ranking(request: Request, algorithms: str = "saw,wp,topsis,vikor", method: str = "borda",
+                          conn=Depends(get_read_db)):
+    """Gabungan ranking beberapa algoritma (Borda / Copeland) dari satu kali muat matriks"""
+    try:
+        selected = [algorithm.strip().lower() for algorithm in algorithms.split(",") if algorithm.strip()]
+        unknown = [algorithm for algorithm in selected if algorithm not in ALGORITHMS]
+        if not selected or unknown:
+            raise HTTPException(status_code=400, detail=f"Algorithms must be from: {', '.join(ALGORITHMS)}")
+        if method not in consensus.METHODS:
+            raise HTTPException(status_code=400, detail=f"Method must be one of: {', '.join(consensus.METHODS)}")
+        
+        matrix = current_matrix(conn)
+        try:
+            scores, order, ranks = consensus.consensus_ranking(ScoringContext(matrix), selected, method)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        results = consensus.consensus_rows(matrix, selected, scores, order, ranks)
+        
+        return fast_response(request, {
+            "method": method,
+            "algorithms": selected,
+            "count": len(results),
+            "results": results
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/rankings/sensitivity")
+def ranking_sensitivity(params: SensitivityRequest, conn=Depends(get_read_db)):
+    """Skor banyak skenario bobot sekaligus dan laporkan stabilitas rank per lokasi"""
+    try:
+        algorithm = params.algorithm.lower()
+        if algorithm not in sensitivity.ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"Algorithm must be one of: {', '.join(sensitivity.ALGORITHMS)}")
+        if params.method not in sensitivity.METHODS:
+            raise HTTPException(status_code=400, detail=f"Method must be one of: {', '.join(sensitivity.METHODS)}")
+        if params.steps < 1 or params.top_k < 1 or (params.limit is not None and params.limit < 1):
+            raise HTTPException(status_code=400, detail="steps, top_k and limit must be at least 1")
+        
+        matrix = current_matrix(conn)
+        n, m = matrix.shape
+        if not n or not m:
+            raise HTTPException(status_code=400, detail="Need at least one location and one criteria")
+        
+        try:
+            if params.method == "grid":
+                scenarios = sensitivity.grid_scenarios(m, params.steps)
+            elif params.method == "one_at_a_time":
+                scenarios, _ = sensitivity.one_at_a_time_scenarios(matrix.weights, params.delta, params.steps)
+            else:
+                scenarios = sensitivity.dirichlet_scenarios(
+                    matrix.weights, params.samples, params.concentration, params.seed
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        basis, signs = sensitivity.scoring_basis(matrix, algorithm)
+        stats = sensitivity.rank_statistics(basis, signs, scenarios, params.top_k)
+        _, baseline_order = rank_locations(matrix, algorithm)
+        
+        return {
+            "algorithm": algorithm,
+            "method": params.method,
+            "scenarios": len(scenarios),
+            "locations": n,
+            "criteria": matrix.criteria_ids,
+            "top_k": params.top_k,
+            "results": sensitivity.sensitivity_rows(matrix, baseline_order, stats, params.limit)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Health check: semua dibaca dari state HealthMonitor, tanpa query database per request
+@app.get("/health")
+def health_check():
+    return health_monitor.report()
+
+@app.get("/health/live")
+async def health_live():
+    """Liveness: proses dan event loop merespons (tidak bergantung pada database)"""
+    return health_monitor.liveness()
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: 503 selama warm-up atau jika cek database terakhir gagal / basi"""
+    ready, body = health_monitor.readiness()
+    return JSONResponse(content=body, status_code=200 if ready else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Metrik proses ini dalam format teks Prometheus"""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+# Mode async: ganti handler GET dengan versi aiomysql
+if DB_ASYNC:
+    from async_routes import use_async_routes
+    use_async_routes(app)
 
 if __name__ == "__main__":
     port = int(os.getenv('PORT', 8000))  # Ganti dari 5000 ke 8000
@@ -0,0 +1,69 @@
+import struct
+
+import numpy as np
+
+from serialization import dumps
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+BINARY_MAGIC = b"TMX1"
+# magic, rows, cols, dtype code, panjang metadata (semua little-endian)
+BINARY_HEADER = struct.Struct("<4sIIII")
+# dtype → (kode header, numpy dtype, penanda sel kosong)
+BINARY_DTYPES = {
+    "float32": (0, np.dtype("<f4"), np.nan),
+    "int32": (1, np.dtype("<i4"), -1),
+}
+
+
+def matrix_metadata(matrix, criteria_names):
+    """Urutan baris dan kolom matriks beserta bobot dan tipe kriteria"""
+    return {
+        "shape": list(matrix.shape),
+        "location_ids": matrix.location_ids.tolist(),
+        "location_names": list(matrix.location_names),
+        "criteria": [
+            {
+                "id": criteria_id,
+                "name": criteria_names.get(criteria_id, criteria_id),
+                "weight": weight,
+                "type": "benefit" if is_benefit else "cost",
+            }
+            for criteria_id, weight, is_benefit in zip(
+                matrix.criteria_ids, matrix.weights.tolist(), matrix.is_benefit.tolist()
+            )
+        ],
+    }
+
+
+def matrix_json(matrix, criteria_names):
+    """Metadata + ``values`` row-major (n·m) dengan null untuk sel tanpa evaluasi"""
+    values = matrix.values.astype(np.int64).ravel().tolist()
+    for index in np.flatnonzero(~matrix.present.ravel()).tolist():
+        values[index] = None
+    data = matrix_metadata(matrix, criteria_names)
+    data["values"] = values
+    return data
+
+
+def matrix_binary(matrix, criteria_names, dtype="float32"):
+    """Buffer little-endian yang bisa dibaca langsung dengan np.frombuffer
+
+    Layout: header ``<4sIIII`` (b"TMX1", rows, cols, dtype 0=float32/1=int32,
+    panjang metadata), metadata JSON UTF-8 (di-pad spasi ke kelipatan 4 byte),
+    int32[rows] location_ids, lalu values[rows·cols] row-major. Sel kosong
+    berisi NaN (float32) atau -1 (int32).
+    """
+    code, numpy_dtype, missing = BINARY_DTYPES[dtype]
+    metadata = matrix_metadata(matrix, criteria_names)
+    del metadata["location_ids"]
+    meta = dumps(metadata)
+    meta += b" " * (-len(meta) % 4)
+
+    rows, cols = matrix.shape
+    values = np.where(matrix.present, matrix.values, missing).astype(numpy_dtype)
+    return b"".join([
+        BINARY_HEADER.pack(BINARY_MAGIC, rows, cols, code, len(meta)),
+        meta,
+        matrix.location_ids.astype("<i4").tobytes(),
+        values.tobytes(order="C"),
+    ])
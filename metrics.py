@@ -0,0 +1,271 @@
+# Metrik request / database per proses dalam format teks Prometheus (GET /metrics).
+# Tanpa dependency: counter, gauge dan histogram sederhana dengan label.
+# Dengan beberapa worker uvicorn tiap worker punya metriknya sendiri.
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+# Log request yang lebih lambat dari ini (ms) beserta SQL-nya; 0 = mati
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 0))
+# Batas statement yang disimpan per request untuk slow log (import besar)
+MAX_LOGGED_STATEMENTS = 100
+# Starlette menambahkan "; charset=utf-8"
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608, 33554432)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+slow_log = logging.getLogger("tofico.slow_requests")
+
+# Trace request yang sedang berjalan (lihat trace_request)
+_current_trace = contextvars.ContextVar('request_trace', default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines += self.samples()
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labels, labels)} {_number(value)}" for labels, value in items]
+
+
+class Gauge(Metric):
+    """Gauge biasa (inc/dec/set) atau dihitung saat scrape dari ``function`` → {labels: nilai}"""
+    type = "gauge"
+
+    def __init__(self, name, help, labels=(), function=None):
+        super().__init__(name, help, labels)
+        self.function = function
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def samples(self):
+        if self.function is not None:
+            items = sorted(self.function().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labels, labels)} {_number(value)}" for labels, value in items]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [hitungan per bucket (non-kumulatif, terakhir = +Inf), sum]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(counts), total) for labels, (counts, total) in self._values.items())
+        lines = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "tofico_http_requests_total", "HTTP request selesai", ("method", "route", "status")))
+REQUEST_DURATION = registry.register(Histogram(
+    "tofico_http_request_duration_seconds", "Durasi request sampai body selesai dikirim", ("method", "route")))
+IN_FLIGHT = registry.register(Gauge(
+    "tofico_http_requests_in_flight", "Request yang sedang diproses"))
+RESPONSE_SIZE = registry.register(Histogram(
+    "tofico_http_response_size_bytes", "Ukuran body response", ("method", "route"), SIZE_BUCKETS))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "tofico_db_time_per_request_seconds", "Total waktu query database per request", ("method", "route")))
+REQUEST_QUERIES = registry.register(Histogram(
+    "tofico_db_queries_per_request", "Jumlah query database per request", ("method", "route"), COUNT_BUCKETS))
+QUERY_DURATION = registry.register(Histogram(
+    "tofico_db_query_duration_seconds", "Durasi query (execute + fetch) per nama query", ("query",)))
+POOL_WAIT = registry.register(Histogram(
+    "tofico_db_pool_checkout_seconds", "Waktu tunggu checkout koneksi dari pool"))
+POOL_TIMEOUTS = registry.register(Counter(
+    "tofico_db_pool_timeouts_total", "Checkout pool yang gagal karena timeout"))
+
+
+class RequestTrace:
+    """Query database selama satu request: jumlah, total waktu dan (untuk slow log) daftar statement"""
+
+    def __init__(self, keep_statements=False):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait = 0.0
+        self.statements = [] if keep_statements else None
+
+
+@contextmanager
+def trace_request():
+    """Kumpulkan query selama blok ini ke RequestTrace yang di-yield
+
+    Objeknya ikut terbawa ke thread handler sync (context disalin), jadi
+    middleware bisa membacanya setelah response dibuat.
+    """
+    trace = RequestTrace(keep_statements=SLOW_REQUEST_MS > 0)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def record_query(name, seconds, sql=None):
+    QUERY_DURATION.observe(seconds, (name,))
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.queries += 1
+        trace.db_seconds += seconds
+        if trace.statements is not None and len(trace.statements) < MAX_LOGGED_STATEMENTS:
+            trace.statements.append((name, seconds, sql))
+
+
+@contextmanager
+def track_query(name, sql=None):
+    """Ukur query di luar repository.py (cache, fingerprint, muat matriks)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_query(name, time.perf_counter() - start, sql)
+
+
+def record_pool_checkout(seconds, timed_out=False):
+    POOL_WAIT.observe(seconds)
+    if timed_out:
+        POOL_TIMEOUTS.inc()
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.pool_wait += seconds
+
+
+def watch_pool(pool):
+    """Gauge koneksi pool yang dibaca saat scrape"""
+    def connections():
+        status = pool.status()
+        return {("checked_out",): status["checked_out"], ("idle",): status["idle"]}
+
+    def utilization():
+        status = pool.status()
+        return {(): status["checked_out"] / max(1, status["pool_size"] + status["max_overflow"])}
+
+    registry.register(Gauge("tofico_db_pool_connections", "Koneksi pool per state", ("state",), connections))
+    registry.register(Gauge("tofico_db_pool_max_connections", "pool_size + max_overflow",
+                            function=lambda: {(): pool.pool_size + pool.max_overflow}))
+    registry.register(Gauge("tofico_db_pool_utilization", "Bagian koneksi maksimum yang sedang dipinjam",
+                            function=utilization))
+
+
+def finish_request(method, route, status, seconds, size, trace):
+    labels = (method, route)
+    REQUESTS.inc((method, route, str(status)))
+    REQUEST_DURATION.observe(seconds, labels)
+    RESPONSE_SIZE.observe(size, labels)
+    REQUEST_DB_TIME.observe(trace.db_seconds, labels)
+    REQUEST_QUERIES.observe(trace.queries, labels)
+    if SLOW_REQUEST_MS > 0 and seconds * 1000 >= SLOW_REQUEST_MS:
+        log_slow_request(method, route, status, seconds, size, trace)
+
+
+def log_slow_request(method, route, status, seconds, size, trace):
+    lines = [
+        f"slow request {method} {route} -> {status}: {seconds * 1000:.1f} ms, {size} bytes, "
+        f"{trace.queries} queries / {trace.db_seconds * 1000:.1f} ms db, pool wait {trace.pool_wait * 1000:.1f} ms"
+    ]
+    for name, query_seconds, sql in trace.statements or ():
+        statement = " ".join(sql.split()) if sql else ""
+        lines.append(f"  {query_seconds * 1000:8.2f} ms  {name}  {statement}")
+    if trace.statements is not None and trace.queries > len(trace.statements):
+        lines.append(f"  ... {trace.queries - len(trace.statements)} more")
+    slow_log.warning("\n".join(lines))
+
+
+async def count_body(body_iterator, finish):
+    """Teruskan body response sambil menghitung byte; finish(size) dipanggil saat selesai"""
+    size = 0
+    try:
+        async for chunk in body_iterator:
+            size += len(chunk)
+            yield chunk
+    finally:
+        finish(size)
@@ -0,0 +1,85 @@
+# Query SQL yang dipakai bersama oleh handler sync (mysql-connector) dan async (aiomysql)
+
+# Lokasi + evaluasinya dalam satu round trip (satu baris per evaluasi)
+LOCATION_WITH_EVALUATIONS = """
+SELECT l.*, e.criteria_id, e.value
+FROM locations l
+LEFT JOIN evaluations e ON e.location_id = l.id
+WHERE l.id = %s
+"""
+
+INSERT_LOCATION = "INSERT INTO locations (name, address, latitude, longitude) VALUES (%s, %s, %s, %s)"
+
+# Satu statement untuk semua kombinasi field: parameter NULL mempertahankan nilai lama
+UPDATE_LOCATION = """
+UPDATE locations
+SET name = COALESCE(%s, name), address = COALESCE(%s, address),
+    latitude = COALESCE(%s, latitude), longitude = COALESCE(%s, longitude)
+WHERE id = %s
+"""
+
+DELETE_LOCATION = "DELETE FROM locations WHERE id = %s"
+
+ALL_CRITERIA = "SELECT * FROM criteria ORDER BY name"
+
+CRITERIA_BY_ID = "SELECT * FROM criteria WHERE id = %s"
+
+INSERT_CRITERIA = "INSERT INTO criteria (id, name, weight, type) VALUES (%s, %s, %s, %s)"
+
+UPDATE_CRITERIA = """
+UPDATE criteria
+SET name = COALESCE(%s, name), weight = COALESCE(%s, weight), type = COALESCE(%s, type)
+WHERE id = %s
+"""
+
+DELETE_CRITERIA = "DELETE FROM criteria WHERE id = %s"
+
+EVALUATIONS_WITH_NAMES = """
+SELECT 
+    e.location_id, e.criteria_id, e.value,
+    l.name as location_name,
+    c.name as criteria_name, c.type as criteria_type
+FROM evaluations e
+JOIN locations l ON e.location_id = l.id
+JOIN criteria c ON e.criteria_id = c.id
+ORDER BY l.name, c.name
+"""
+
+
+UPSERT_EVALUATION = """
+INSERT INTO evaluations (location_id, criteria_id, value)
+VALUES (%s, %s, %s)
+ON DUPLICATE KEY UPDATE value = VALUES(value)
+"""
+
+DELETE_EVALUATION = "DELETE FROM evaluations WHERE location_id = %s AND criteria_id = %s"
+
+PING = "SELECT 1"
+
+
+def _in_list(ids):
+    """(placeholder, params) untuk IN (...)
+
+    Jumlah placeholder dibulatkan ke pangkat dua (diisi id terakhir) supaya
+    hanya ada sedikit variasi teks SQL untuk di-prepare.
+    """
+    ids = list(ids)
+    size = 1 << (len(ids) - 1).bit_length()
+    params = ids + ids[-1:] * (size - len(ids))
+    return ", ".join(["%s"] * size), params
+
+
+def locations_by_ids(ids):
+    """(SQL, params) kolom lokasi untuk ids"""
+    placeholders, params = _in_list(ids)
+    return f"SELECT id, name, address, latitude, longitude FROM locations WHERE id IN ({placeholders})", params
+
+
+def locations_with_evaluations(ids):
+    """(SQL, params) seperti LOCATION_WITH_EVALUATIONS untuk banyak id sekaligus"""
+    placeholders, params = _in_list(ids)
+    return (
+        "SELECT l.*, e.criteria_id, e.value FROM locations l "
+        f"LEFT JOIN evaluations e ON e.location_id = l.id WHERE l.id IN ({placeholders})",
+        params,
+    )
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from incremental_ranking import RankingMaintainer
+from data_versions import load_versions
+from metrics import track_query
+from replicas import primary_connection
+from shared_matrix import current_matrix, version_key
+from scoring import ALGORITHMS, ScoringContext, rank_locations, ranking_rows, saw_top_k, select_top
+
+# Presisi kolom calculation_results.score (DECIMAL(10,6))
+SCORE_DECIMALS = 6
+INSERT_CHUNK_SIZE = 1000
+# Detik hasil ranking versi data lama disimpan sebelum dihapus (untuk worker / replica yang tertinggal)
+RANKING_RESULTS_RETENTION = int(os.getenv('RANKING_RESULTS_RETENTION', 3600))
+
+# Fallback jika tabel data_versions belum ada: ringkasan (scan penuh) dari
+# semua input ranking. Nama/alamat/koordinat lokasi dan nama kriteria tidak
+# ikut karena tidak mempengaruhi skor.
+FINGERPRINT_QUERY = """
+SELECT
+    (SELECT CONCAT_WS(':', COUNT(*), COALESCE(SUM(id), 0), COALESCE(BIT_XOR(CRC32(id)), 0))
+     FROM locations),
+    (SELECT CONCAT_WS(':', COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS(':', id, weight, type))), 0),
+                      COALESCE(BIT_XOR(CRC32(CONCAT_WS(':', id, weight, type))), 0))
+     FROM criteria),
+    (SELECT CONCAT_WS(':', COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS(':', location_id, criteria_id, value))), 0),
+                      COALESCE(BIT_XOR(CRC32(CONCAT_WS(':', location_id, criteria_id, value))), 0))
+     FROM evaluations)
+"""
+
+
+def compute_fingerprint(conn):
+    """Fingerprint (sha1) dari bobot kriteria dan data evaluasi saat ini"""
+    cursor = conn.cursor()
+    with track_query("ranking_fingerprint", FINGERPRINT_QUERY):
+        cursor.execute(FINGERPRINT_QUERY)
+        parts = cursor.fetchone()
+    cursor.close()
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def ranking_versions(conn):
+    """(key, versions): key hasil ranking dari data_versions (lookup primary key)
+
+    Tanpa tabel data_versions key diambil dari compute_fingerprint dan versions None.
+    """
+    versions = load_versions(conn)
+    if versions is None:
+        return compute_fingerprint(conn), None
+    return version_key(versions), versions
+
+
+def load_cached_ranking(conn, algorithm, fingerprint, offset=0, limit=None, min_score=None):
+    """Ambil ranking dari calculation_results; None jika belum ada
+
+    offset/limit/min_score memakai index (algorithm, fingerprint, rank_position),
+    jadi halaman top-k hanya membaca k baris.
+    """
+    sql = """
+        SELECT r.rank_position, r.location_id, l.name, r.score
+        FROM calculation_results r
+        JOIN locations l ON l.id = r.location_id
+        WHERE r.algorithm = %s AND r.fingerprint = %s AND r.rank_position > %s
+    """
+    params = [algorithm, fingerprint, offset]
+    if min_score is not None:
+        sql += " AND r.score >= %s"
+        params.append(min_score)
+    sql += " ORDER BY r.rank_position"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+
+    cursor = conn.cursor()
+    with track_query("cached_ranking", sql):
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    if not rows and (offset or min_score is not None):
+        # Halaman kosong: bedakan "di luar hasil" dari "belum ada ranking"
+        with track_query("cached_ranking_exists"):
+            cursor.execute("""
+                SELECT 1 FROM calculation_results
+                WHERE algorithm = %s AND fingerprint = %s LIMIT 1
+            """, (algorithm, fingerprint))
+            exists = cursor.fetchone() is not None
+        cursor.close()
+        return [] if exists else None
+    cursor.close()
+
+    if not rows:
+        return None
+    return [
+        {"rank": rank, "location_id": location_id, "name": name, "score": float(score)}
+        for rank, location_id, name, score in rows
+    ]
+
+
+def store_ranking(conn, algorithm, fingerprint, matrix, scores, order):
+    """Simpan hasil ranking algorithm ini untuk versi data ``fingerprint`` (upsert dalam satu transaksi)
+
+    Hasil versi lain tidak disentuh, kecuali versi lama algorithm yang sama
+    yang sudah lebih tua dari RANKING_RESULTS_RETENTION.
+    """
+    location_ids = matrix.location_ids[order].tolist()
+    ranked_scores = scores[order].tolist()
+    rows = [
+        (location_id, algorithm, fingerprint, score, position)
+        for position, (location_id, score) in enumerate(zip(location_ids, ranked_scores), start=1)
+    ]
+
+    cursor = conn.cursor()
+    conn.start_transaction()
+    try:
+        with track_query("store_ranking"):
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                cursor.executemany("""
+                    INSERT INTO calculation_results (location_id, algorithm, fingerprint, score, rank_position)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE location_id = VALUES(location_id), score = VALUES(score),
+                                            calculated_at = CURRENT_TIMESTAMP
+                """, rows[start:start + INSERT_CHUNK_SIZE])
+            cursor.execute("""
+                DELETE FROM calculation_results
+                WHERE algorithm = %s AND fingerprint <> %s
+                  AND calculated_at < NOW() - INTERVAL %s SECOND
+            """, (algorithm, fingerprint, RANKING_RESULTS_RETENTION))
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+ranking_maintainer = RankingMaintainer(version_key)
+_completing = set()
+_completing_lock = threading.Lock()
+
+
+def complete_ranking(matrix, algorithm, fingerprint, versions=None):
+    """Hitung ranking penuh lalu isi cache memori dan calculation_results
+
+    Dijalankan sebagai background task setelah response ranking parsial, supaya
+    request top-k berikutnya dilayani dari cache. Satu kali per fingerprint.
+    """
+    key = (algorithm, fingerprint)
+    with _completing_lock:
+        if key in _completing:
+            return
+        _completing.add(key)
+    try:
+        from db_config_normalized import pool
+
+        ranking_maintainer.replace(matrix, fingerprint, versions)
+        scores, order = rank_locations(matrix, algorithm)
+        if len(order):
+            with pool.connection() as conn:
+                store_ranking(conn, algorithm, fingerprint, matrix, np.round(scores, SCORE_DECIMALS), order)
+    finally:
+        with _completing_lock:
+            _completing.discard(key)
+
+
+def partial_ranking(matrix, algorithm, offset=0, limit=None, min_score=None):
+    """(scores, order) untuk satu halaman ranking tanpa mengurutkan semua lokasi
+
+    SAW memakai pruning batas atas (saw_top_k), algoritma lain argpartition
+    atas vektor skor. min_score dibandingkan dengan skor yang sudah dibulatkan.
+    """
+    context = ScoringContext(matrix)
+    # Skor mentah >= threshold jika hasil pembulatannya >= min_score
+    threshold = None if min_score is None else min_score - 0.5 * 10 ** -SCORE_DECIMALS
+    if algorithm == 'saw':
+        candidates, candidate_scores = saw_top_k(
+            context, None if limit is None else offset + limit, threshold
+        )
+        scores = np.full(len(matrix.location_ids), -np.inf)
+        scores[candidates] = candidate_scores
+    else:
+        scores = ALGORITHMS[algorithm](context)
+    order = select_top(scores, offset, limit, threshold)
+    scores = np.round(scores, SCORE_DECIMALS)
+    if min_score is not None:
+        order = order[:np.count_nonzero(scores[order] >= min_score)]
+    return scores, order
+
+
+def get_ranking(conn, algorithm, offset=0, limit=None, min_score=None, background=None):
+    """Ranking dari memori atau calculation_results jika versi data cocok,
+    kalau tidak hitung ulang dari primary dan simpan
+
+    Dengan limit/min_score hanya satu halaman yang diambil. Jika cache kosong
+    dan ``background`` (BackgroundTasks) diberikan, halaman dihitung dengan
+    top-k lalu ranking penuh disimpan setelah response terkirim.
+
+    Mengembalikan (rows, fingerprint, cached); fingerprint adalah key versi data.
+    """
+    fingerprint, versions = ranking_versions(conn)
+    rows = ranking_maintainer.rows(fingerprint, algorithm, SCORE_DECIMALS, offset, limit, min_score)
+    if rows is not None:
+        return rows, fingerprint, True
+
+    rows = load_cached_ranking(conn, algorithm, fingerprint, offset, limit, min_score)
+    if rows is not None:
+        return rows, fingerprint, True
+
+    with primary_connection(conn) as primary:
+        if primary is not conn:
+            # conn read replica: ranking yang disimpan dihitung dari primary, bukan dari replica yang tertinggal
+            fingerprint, versions = ranking_versions(primary)
+            rows = ranking_maintainer.rows(fingerprint, algorithm, SCORE_DECIMALS, offset, limit, min_score)
+            if rows is not None:
+                return rows, fingerprint, True
+
+        matrix = current_matrix(primary, versions)
+        if background is not None and (limit is not None or min_score is not None):
+            scores, order = partial_ranking(matrix, algorithm, offset, limit, min_score)
+            background.add_task(complete_ranking, matrix, algorithm, fingerprint, versions)
+            return ranking_rows(matrix, scores, order, start=offset + 1), fingerprint, False
+
+        ranking_maintainer.replace(matrix, fingerprint, versions)
+        scores, order = rank_locations(matrix, algorithm)
+        scores = np.round(scores, SCORE_DECIMALS)
+        if len(order):
+            store_ranking(primary, algorithm, fingerprint, matrix, scores, order)
+    order = order[offset:] if limit is None else order[offset:offset + limit]
+    if min_score is not None:
+        order = order[:np.count_nonzero(scores[order] >= min_score)]
+    return ranking_rows(matrix, scores, order, start=offset + 1), fingerprint, False
@@ -0,0 +1,282 @@
+# Read/write splitting: handler baca memakai read replica (DB_REPLICA_HOSTS),
+# handler tulis tetap ke primary (pool di db_config_normalized).
+#
+# Lag tiap replica dicek thread latar; replica yang tertinggal lebih dari
+# DB_REPLICA_MAX_LAG detik, replikasinya berhenti atau ceknya basi dilewati.
+# Read-your-writes: response write yang berhasil membawa header X-Session-Token
+# (GTID set primary, atau waktu write jika GTID nonaktif). Klien yang
+# mengirimnya lagi pada request baca hanya dilayani replica yang sudah
+# menerapkan write tersebut, kalau tidak oleh primary. Hasil turunan yang
+# disimpan (ranking, snapshot matriks, cache criteria) selalu dari primary.
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import Request
+from mysql.connector import Error
+
+from db_config_normalized import POOL_CONFIG, REPLICA_CONFIGS, get_db, pool
+from db_pool import ConnectionPool
+from metrics import track_query
+
+REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 1))
+# Batas tunggu replica mengejar GTID token sebelum request dialihkan ke primary
+REPLICA_WAIT_TIMEOUT = float(os.getenv('DB_REPLICA_WAIT_TIMEOUT', 0.5))
+
+SESSION_TOKEN_HEADER = "X-Session-Token"
+MAX_TOKEN_LENGTH = 4096
+# Seconds_Behind_Source dibulatkan ke detik: margin untuk token waktu
+LAG_RESOLUTION = 1.0
+
+GTID_EXECUTED = "SELECT @@GLOBAL.gtid_executed"
+WAIT_FOR_GTID = "SELECT WAIT_FOR_EXECUTED_GTID_SET(%s, %s)"
+# MySQL >= 8.0.22, lalu nama lama (MySQL < 8.0.22)
+REPLICA_STATUS = ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS")
+LAG_COLUMNS = ("Seconds_Behind_Source", "Seconds_Behind_Master")
+
+# Token yang tidak bisa dibaca: layani dari primary supaya tetap konsisten
+PRIMARY_ONLY = ("primary", None)
+
+
+def parse_token(value):
+    """("gtid", set) / ("ts", epoch) dari header X-Session-Token; None jika tidak ada"""
+    if not value:
+        return None
+    kind, _, payload = value.partition(":")
+    if len(value) > MAX_TOKEN_LENGTH or not payload:
+        return PRIMARY_ONLY
+    if kind == "gtid":
+        return kind, payload
+    if kind == "ts":
+        try:
+            return kind, float(payload)
+        except ValueError:
+            return PRIMARY_ONLY
+    return PRIMARY_ONLY
+
+
+def read_replica_lag(conn):
+    """Seconds_Behind_Source terbesar (multi-source), None jika replikasi berhenti"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for statement in REPLICA_STATUS:
+            try:
+                with track_query("replica_status", statement):
+                    cursor.execute(statement)
+                    rows = cursor.fetchall()
+                break
+            except Error:
+                if statement == REPLICA_STATUS[-1]:
+                    raise
+    finally:
+        cursor.close()
+    if not rows:
+        raise Error("replication is not configured on this server")
+    lags = [next((row[column] for column in LAG_COLUMNS if column in row), None) for row in rows]
+    return None if None in lags else max(lags)
+
+
+def wait_for_gtid(conn, gtid, timeout):
+    """True jika replica sudah menerapkan GTID set ini (menunggu maksimal timeout detik)"""
+    cursor = conn.cursor()
+    try:
+        with track_query("wait_for_gtid", WAIT_FOR_GTID):
+            cursor.execute(WAIT_FOR_GTID, (gtid, timeout))
+            (result,) = cursor.fetchone()
+    finally:
+        cursor.close()
+    return result == 0
+
+
+class Replica:
+    """Pool satu replica dan hasil cek lag terakhir"""
+
+    def __init__(self, config, pool_config):
+        self.name = f"{config['host']}:{config['port']}"
+        self.config = config
+        self.pool = ConnectionPool(config, **pool_config)
+        # (lag detik, time.time() cek sukses terakhir, error); diganti utuh supaya konsisten antar thread
+        self.state = (None, None, "not checked yet")
+
+    def check(self):
+        try:
+            with self.pool.connection() as conn:
+                lag = read_replica_lag(conn)
+            error = None if lag is not None else "replication is not running"
+        except Exception as e:
+            lag, error = None, str(e)
+        self.state = (lag, time.time() if error is None else self.state[1], error)
+
+    def usable(self, now, max_lag, stale_after):
+        lag, checked_at, error = self.state
+        return error is None and lag <= max_lag and now - checked_at <= stale_after
+
+    def applied_until(self):
+        """Waktu (epoch) yang pasti sudah diterapkan replica menurut cek lag terakhir"""
+        lag, checked_at, _ = self.state
+        return checked_at - lag - LAG_RESOLUTION
+
+    def status(self, now, max_lag, stale_after):
+        lag, checked_at, error = self.state
+        return {
+            "name": self.name,
+            "lag_s": lag,
+            "checked_age_s": round(now - checked_at, 3) if checked_at is not None else None,
+            "error": error,
+            "usable": self.usable(now, max_lag, stale_after),
+            "pool": self.pool.status(),
+        }
+
+
+class ReplicaRouter:
+    """Pilih sumber koneksi request baca: replica round-robin, fallback ke primary"""
+
+    def __init__(self, primary, replicas, max_lag=REPLICA_MAX_LAG, wait_timeout=REPLICA_WAIT_TIMEOUT,
+                 check_interval=REPLICA_CHECK_INTERVAL):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.wait_timeout = wait_timeout
+        self.check_interval = check_interval
+        # Cek lag yang lebih tua dari ini (thread macet) tidak dipercaya
+        self.stale_after = max(3 * check_interval, 1.0)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._reads = {"primary": 0, **{replica.name: 0 for replica in self.replicas}}
+
+    def candidates(self, token):
+        """Replica yang boleh melayani read dengan token ini, mulai dari giliran round-robin"""
+        if not self.replicas or token is PRIMARY_ONLY:
+            return []
+        now = time.time()
+        usable = [replica for replica in self.replicas if replica.usable(now, self.max_lag, self.stale_after)]
+        if token is not None and token[0] == "ts":
+            usable = [replica for replica in usable if replica.applied_until() >= token[1]]
+        if not usable:
+            return []
+        start = next(self._next) % len(usable)
+        return usable[start:] + usable[:start]
+
+    def count(self, replica):
+        with self._lock:
+            self._reads["primary" if replica is None else replica.name] += 1
+
+    def acquire_read(self, token=None):
+        """(koneksi, pool asalnya) untuk satu request baca"""
+        for replica in self.candidates(token):
+            try:
+                connection = replica.pool.acquire()
+            except Error:
+                continue
+            if token is not None and token[0] == "gtid":
+                try:
+                    caught_up = wait_for_gtid(connection, token[1], self.wait_timeout)
+                except Error:
+                    caught_up = False
+                if not caught_up:
+                    # Replica lain kemungkinan sama tertinggalnya: langsung ke primary
+                    replica.pool.release(connection)
+                    break
+            self.count(replica)
+            return connection, replica.pool
+        self.count(None)
+        return self.primary.acquire(), self.primary
+
+    def write_token(self):
+        """Token read-your-writes setelah write di primary: GTID set, atau waktu jika GTID nonaktif"""
+        with self.primary.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with track_query("gtid_executed", GTID_EXECUTED):
+                    cursor.execute(GTID_EXECUTED)
+                    (gtid,) = cursor.fetchone()
+            finally:
+                cursor.close()
+        if gtid:
+            return "gtid:" + "".join(gtid.split())
+        return f"ts:{time.time():.3f}"
+
+    # Lifecycle
+    def check(self):
+        for replica in self.replicas:
+            replica.check()
+
+    def start_monitor(self):
+        """Thread latar cek lag; mengembalikan Event untuk menghentikannya"""
+        stop = threading.Event()
+
+        def run():
+            while True:
+                self.check()
+                if stop.wait(self.check_interval):
+                    break
+
+        threading.Thread(target=run, name="replica-monitor", daemon=True).start()
+        return stop
+
+    def reopen(self):
+        for replica in self.replicas:
+            replica.pool.reopen()
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.pool.dispose()
+
+    def status(self):
+        now = time.time()
+        with self._lock:
+            reads = dict(self._reads)
+        return {
+            "max_lag_s": self.max_lag,
+            "reads": reads,
+            "replicas": [replica.status(now, self.max_lag, self.stale_after) for replica in self.replicas],
+        }
+
+
+replica_router = ReplicaRouter(pool, [Replica(config, POOL_CONFIG) for config in REPLICA_CONFIGS])
+
+
+def request_token(request):
+    return parse_token(request.headers.get(SESSION_TOKEN_HEADER))
+
+
+def get_read_db(request: Request):
+    """FastAPI dependency untuk handler baca: replica yang cukup mutakhir, kalau tidak primary"""
+    connection, source = replica_router.acquire_read(request_token(request))
+    try:
+        yield connection
+    finally:
+        source.release(connection)
+
+
+@contextmanager
+def read_connection(token=None):
+    """Seperti get_read_db untuk kode di luar dependency (mis. generator export streaming)"""
+    connection, source = replica_router.acquire_read(token)
+    try:
+        yield connection
+    finally:
+        source.release(connection)
+
+
+def is_primary(conn):
+    """True jika conn koneksi primary (selalu, jika tidak ada replica)"""
+    return not replica_router.replicas or pool.owns(conn)
+
+
+@contextmanager
+def primary_connection(conn):
+    """conn jika koneksi primary, kalau tidak pinjam koneksi primary (hasil yang akan disimpan)"""
+    if is_primary(conn):
+        yield conn
+    else:
+        with pool.connection() as primary:
+            yield primary
+
+
+def uses_primary(route):
+    """True jika route memakai get_db (handler tulis), jadi butuh X-Session-Token"""
+    return any(dependency.call is get_db for dependency in route.dependant.dependencies)
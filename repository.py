@@ -0,0 +1,292 @@
+# Akses data untuk handler sync (mysql-connector). Semua SQL endpoint ada di
+# sini dan dijalankan sebagai prepared statement server yang di-cache per
+# koneksi pool, jadi MySQL hanya mem-parse tiap statement sekali per koneksi.
+# Handler async (aiomysql) tetap memakai teks SQL dari queries.py.
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import HAVE_CEXT
+
+from data_versions import NO_SUCH_TABLE, bump_sql
+from formatters import group_evaluations
+from metrics import record_query, track_query
+import queries
+
+# Hanya dengan C extension: cursor prepared pure-Python mengirim COM_STMT_RESET
+# tambahan sebelum setiap execute (dua round trip per query)
+PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true' and HAVE_CEXT
+# Batas statement per koneksi (server: max_prepared_stmt_count, default 16382)
+MAX_STATEMENTS_PER_CONNECTION = 64
+# errno MySQL: insert/update anak dengan foreign key yang tidak ada induknya
+NO_REFERENCED_ROW = 1452
+
+
+class QueryStats:
+    """Jumlah eksekusi dan waktu (execute + fetch) per nama query"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            items = [(name, list(stats)) for name, stats in self._stats.items()]
+        return {
+            name: {
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3),
+                "max_ms": round(maximum * 1000, 3),
+            }
+            for name, (count, total, maximum) in sorted(items)
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class StatementCache:
+    """Cursor prepared per (koneksi, teks SQL), LRU per koneksi
+
+    mysql-connector hanya memakai ulang statement yang sudah di-prepare jika
+    objek string SQL-nya sama, jadi teks yang disimpan di cache yang dikirim
+    ulang. Koneksi yang dibuang pool ikut melepas cache-nya (weakref).
+    """
+
+    def __init__(self, max_statements=MAX_STATEMENTS_PER_CONNECTION):
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._connections = weakref.WeakKeyDictionary()
+
+    def get(self, conn, sql, dictionary=False):
+        """(cursor, sql) siap di-execute"""
+        with self._lock:
+            statements = self._connections.setdefault(conn, OrderedDict())
+        key = (sql, dictionary)
+        entry = statements.get(key)
+        if entry is not None:
+            statements.move_to_end(key)
+            return entry
+
+        entry = (conn.cursor(prepared=True, dictionary=dictionary), sql)
+        statements[key] = entry
+        if len(statements) > self.max_statements:
+            _, (cursor, _) = statements.popitem(last=False)
+            cursor.close()
+        return entry
+
+    def discard(self, conn, sql, dictionary=False):
+        """Keluarkan statement dari cache dan tutup cursor-nya (melepas statement di server)"""
+        with self._lock:
+            statements = self._connections.get(conn)
+        entry = statements.pop((sql, dictionary), None) if statements is not None else None
+        if entry is not None:
+            try:
+                entry[0].close()
+            except mysql.connector.Error:
+                pass  # koneksi putus: statement ikut hilang bersama sesinya
+
+    def status(self):
+        with self._lock:
+            sizes = [len(statements) for statements in self._connections.values()]
+        return {"connections": len(sizes), "statements": sum(sizes)}
+
+
+query_stats = QueryStats()
+statement_cache = StatementCache()
+
+
+def _execute(conn, name, sql, params=(), dictionary=False):
+    """Jalankan satu statement; (rows atau None, rowcount, lastrowid)"""
+    start = time.perf_counter()
+    if PREPARED_STATEMENTS:
+        cursor, sql = statement_cache.get(conn, sql, dictionary)
+    else:
+        cursor = conn.cursor(dictionary=dictionary)
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall() if cursor.with_rows else None
+        return rows, cursor.rowcount, cursor.lastrowid
+    except mysql.connector.Error:
+        if PREPARED_STATEMENTS:
+            statement_cache.discard(conn, sql, dictionary)
+        raise
+    finally:
+        if not PREPARED_STATEMENTS:
+            cursor.close()
+        elapsed = time.perf_counter() - start
+        query_stats.record(name, elapsed)
+        record_query(name, elapsed, sql)
+
+
+def _fetch_one(conn, name, sql, params, dictionary=True):
+    rows, _, _ = _execute(conn, name, sql, params, dictionary)
+    return rows[0] if rows else None
+
+
+# Locations
+def location_page(conn, query):
+    """(lokasi, evaluasi) untuk satu halaman GET /locations (LocationQuery)"""
+    rows, _, _ = _execute(conn, "location_page", *query.locations_sql(), dictionary=True)
+    evaluations = []
+    if query.include_criteria and rows:
+        evaluations, _, _ = _execute(conn, "location_page_evaluations", *query.evaluations_sql(rows[-1]['id']),
+                                     dictionary=True)
+    return rows, evaluations
+
+
+def export_cursor(conn, query):
+    """Cursor unbuffered untuk streaming export (tidak di-cache: hasilnya dibaca bertahap)"""
+    cursor = conn.cursor(dictionary=True)
+    sql, params = query.export_sql()
+    with track_query("location_export", sql):
+        cursor.execute(sql, params)
+    return cursor
+
+
+def location_with_evaluations(conn, location_id):
+    """(lokasi, evaluasi) dalam satu query LEFT JOIN, atau None jika tidak ada"""
+    rows, _, _ = _execute(conn, "location_with_evaluations", queries.LOCATION_WITH_EVALUATIONS, (location_id,),
+                          dictionary=True)
+    return group_evaluations(rows).get(location_id)
+
+
+def locations_with_evaluations(conn, ids):
+    """{id: (lokasi, evaluasi)} untuk banyak lokasi dalam satu query; id yang tidak ada tidak muncul"""
+    if not ids:
+        return {}
+    sql, params = queries.locations_with_evaluations(ids)
+    rows, _, _ = _execute(conn, "locations_with_evaluations", sql, params, dictionary=True)
+    return group_evaluations(rows)
+
+
+def locations_by_ids(conn, ids):
+    """Baris lokasi untuk ids (urutan bebas); jumlah placeholder dibulatkan ke bucket"""
+    if not ids:
+        return []
+    sql, params = queries.locations_by_ids(ids)
+    rows, _, _ = _execute(conn, "locations_by_ids", sql, params, dictionary=True)
+    return rows
+
+
+def insert_location(conn, name, address, latitude, longitude):
+    """id lokasi baru"""
+    _, _, location_id = _execute(conn, "insert_location", queries.INSERT_LOCATION,
+                                 (name, address, latitude, longitude))
+    return location_id
+
+
+def update_location(conn, location_id, name=None, address=None, latitude=None, longitude=None):
+    """Ubah kolom yang tidak None (satu statement untuk semua kombinasi); rowcount"""
+    _, rowcount, _ = _execute(conn, "update_location", queries.UPDATE_LOCATION,
+                              (name, address, latitude, longitude, location_id))
+    return rowcount
+
+
+def delete_location(conn, location_id):
+    _, rowcount, _ = _execute(conn, "delete_location", queries.DELETE_LOCATION, (location_id,))
+    return rowcount
+
+
+# Criteria
+def criteria_by_id(conn, criteria_id):
+    return _fetch_one(conn, "criteria_by_id", queries.CRITERIA_BY_ID, (criteria_id,))
+
+
+def insert_criteria(conn, criteria_id, name, weight, type):
+    _execute(conn, "insert_criteria", queries.INSERT_CRITERIA, (criteria_id, name, weight, type))
+
+
+def update_criteria(conn, criteria_id, name=None, weight=None, type=None):
+    """Ubah kolom yang tidak None (satu statement untuk semua kombinasi); rowcount"""
+    _, rowcount, _ = _execute(conn, "update_criteria", queries.UPDATE_CRITERIA, (name, weight, type, criteria_id))
+    return rowcount
+
+
+def delete_criteria(conn, criteria_id):
+    _, rowcount, _ = _execute(conn, "delete_criteria", queries.DELETE_CRITERIA, (criteria_id,))
+    return rowcount
+
+
+# Evaluations
+def missing_reference(error):
+    """Kolom foreign key yang induknya tidak ada (IntegrityError 1452), atau None"""
+    if getattr(error, 'errno', None) != NO_REFERENCED_ROW:
+        return None
+    message = str(error)
+    for column in ('location_id', 'criteria_id'):
+        if f"FOREIGN KEY (`{column}`)" in message:
+            return column
+    return None
+
+
+def evaluations_with_names(conn):
+    rows, _, _ = _execute(conn, "evaluations_with_names", queries.EVALUATIONS_WITH_NAMES, dictionary=True)
+    return rows
+
+
+def upsert_evaluation(conn, location_id, criteria_id, value):
+    """rowcount: 0 nilai sama, 1 baru, 2 berubah
+
+    Lokasi/kriteria yang tidak ada menghasilkan IntegrityError (lihat missing_reference).
+    """
+    _, rowcount, _ = _execute(conn, "upsert_evaluation", queries.UPSERT_EVALUATION,
+                              (location_id, criteria_id, value))
+    return rowcount
+
+
+def delete_evaluation(conn, location_id, criteria_id):
+    _, rowcount, _ = _execute(conn, "delete_evaluation", queries.DELETE_EVALUATION, (location_id, criteria_id))
+    return rowcount
+
+
+# Lainnya
+@contextmanager
+def transaction(conn):
+    """Transaksi eksplisit (koneksi pool autocommit): commit di akhir blok, rollback jika error
+
+    Write dan bump data_versions-nya di-commit bersama, jadi versi yang dibaca
+    di dalam blok adalah tepat versi yang dihasilkan write tersebut.
+    """
+    conn.start_transaction()
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def bump_versions(conn, *resources):
+    """data_versions.bump_versions lewat prepared statement"""
+    try:
+        _execute(conn, "bump_versions", bump_sql(len(resources)), resources)
+    except mysql.connector.ProgrammingError as e:
+        if e.errno != NO_SUCH_TABLE:
+            raise
+
+
+def ping(conn):
+    _fetch_one(conn, "ping", queries.PING, (), dictionary=False)
+
+
+def status():
+    """Statistik query dan jumlah prepared statement yang di-cache"""
+    return {"prepared": PREPARED_STATEMENTS, "c_extension": HAVE_CEXT, **statement_cache.status(),
+            "queries": query_stats.snapshot()}
@@ -0,0 +1,253 @@
+from functools import cached_property
+
+import numpy as np
+
+# Batas bawah nilai untuk WP supaya log(0) / 0^-w tidak menghasilkan inf
+WP_EPSILON = 1e-6
+# Bobot strategi "mayoritas" VIKOR
+VIKOR_V = 0.5
+# Kelonggaran pembulatan float saat membandingkan batas atas dengan ambang top-k
+PRUNE_SLACK = 1e-12
+
+
+def normalized_weights(weights):
+    """Bobot dinormalisasi sehingga jumlahnya 1"""
+    total = weights.sum()
+    if total <= 0:
+        return np.zeros_like(weights)
+    return weights / total
+
+
+def column_extremes(values, present):
+    """(min, max) per kolom dari sel yang terisi; kolom kosong menghasilkan inf / -inf"""
+    col_min = np.where(present, values, np.inf).min(axis=0, initial=np.inf)
+    col_max = np.where(present, values, -np.inf).max(axis=0, initial=-np.inf)
+    return col_min, col_max
+
+
+def saw_normalize_values(values, present, is_benefit, col_min, col_max):
+    """Normalisasi SAW: benefit x / max, cost min / x; sel kosong = 0"""
+    benefit = np.divide(values, col_max, out=np.zeros_like(values), where=col_max > 0)
+    # Cost: nilai 0 adalah nilai terbaik
+    cost = np.divide(col_min, values, out=np.ones_like(values), where=values > 0)
+
+    normalized = np.where(is_benefit, benefit, cost)
+    return np.where(present, normalized, 0.0)
+
+
+def saw_normalize(matrix):
+    col_min, col_max = column_extremes(matrix.values, matrix.present)
+    return saw_normalize_values(matrix.values, matrix.present, matrix.is_benefit, col_min, col_max)
+
+
+def saw_scores(matrix, weights=None):
+    """Simple Additive Weighting: V = R · w"""
+    return ALGORITHMS['saw'](ScoringContext(matrix, weights))
+
+
+def wp_log_values(values, present, is_benefit, col_min, col_max):
+    """log(x) per sel; sel kosong diisi nilai terburuk kolomnya"""
+    worst = np.where(is_benefit, col_min, col_max)
+    worst = np.where(np.isfinite(worst), worst, WP_EPSILON)
+
+    filled = np.where(present, values, worst)
+    return np.log(np.maximum(filled, WP_EPSILON))
+
+
+def wp_log_matrix(matrix):
+    col_min, col_max = column_extremes(matrix.values, matrix.present)
+    return wp_log_values(matrix.values, matrix.present, matrix.is_benefit, col_min, col_max)
+
+
+def wp_scores(matrix, weights=None):
+    """Weighted Product: S = Π x^(±w), V = S / ΣS (dihitung di ruang log)"""
+    return ALGORITHMS['wp'](ScoringContext(matrix, weights))
+
+
+def wp_relative_scores(log_s):
+    """V = S / ΣS dari log S, digeser dulu supaya exp tidak overflow"""
+    if log_s.size == 0:
+        return log_s
+    shifted = np.exp(log_s - log_s.max())
+    return shifted / shifted.sum()
+
+
+def _safe_divide(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64),
+                     where=denominator != 0)
+
+
+class ScoringContext:
+    """Matriks keputusan beserta normalisasi yang dipakai bersama semua algoritma
+
+    Tiap normalisasi dihitung sekali saat pertama dibutuhkan, jadi beberapa
+    algoritma pada satu request hanya memuat dan menormalisasi matriks sekali.
+    """
+
+    def __init__(self, matrix, weights=None):
+        self.matrix = matrix
+        self.weights = normalized_weights(matrix.weights if weights is None else weights)
+        self.signs = np.where(matrix.is_benefit, 1.0, -1.0)
+
+    @cached_property
+    def extremes(self):
+        return column_extremes(self.matrix.values, self.matrix.present)
+
+    @cached_property
+    def saw_normalized(self):
+        return saw_normalize_values(self.matrix.values, self.matrix.present, self.matrix.is_benefit, *self.extremes)
+
+    @cached_property
+    def wp_log(self):
+        return wp_log_values(self.matrix.values, self.matrix.present, self.matrix.is_benefit, *self.extremes)
+
+    @cached_property
+    def ideal(self):
+        """(terbaik, terburuk) per kolom; kolom kosong 0"""
+        col_min, col_max = self.extremes
+        best = np.where(self.matrix.is_benefit, col_max, col_min)
+        worst = np.where(self.matrix.is_benefit, col_min, col_max)
+        return np.where(np.isfinite(best), best, 0.0), np.where(np.isfinite(worst), worst, 0.0)
+
+    @cached_property
+    def filled(self):
+        """Nilai dengan sel kosong diisi nilai terburuk kolomnya (TOPSIS / VIKOR)"""
+        return np.where(self.matrix.present, self.matrix.values, self.ideal[1])
+
+
+# Registry algoritma: nama → fungsi(ScoringContext) yang mengembalikan skor (makin besar makin baik)
+ALGORITHMS = {}
+
+
+def register(name):
+    def decorator(function):
+        ALGORITHMS[name] = function
+        return function
+    return decorator
+
+
+@register('saw')
+def saw(context):
+    return context.saw_normalized @ context.weights
+
+
+@register('wp')
+def wp(context):
+    return wp_relative_scores(context.wp_log @ (context.signs * context.weights))
+
+
+@register('topsis')
+def topsis(context):
+    """Closeness C = D- / (D+ + D-) terhadap solusi ideal positif/negatif"""
+    values = context.filled
+    norms = np.sqrt((values ** 2).sum(axis=0))
+    weighted = _safe_divide(values, norms) * context.weights
+    if not len(weighted):
+        return np.zeros(0)
+    benefit = context.matrix.is_benefit
+    positive = np.where(benefit, weighted.max(axis=0), weighted.min(axis=0))
+    negative = np.where(benefit, weighted.min(axis=0), weighted.max(axis=0))
+    distance_positive = np.sqrt(((weighted - positive) ** 2).sum(axis=1))
+    distance_negative = np.sqrt(((weighted - negative) ** 2).sum(axis=1))
+    return _safe_divide(distance_negative, distance_positive + distance_negative)
+
+
+@register('vikor')
+def vikor(context):
+    """Skor 1 - Q (Q = indeks kompromi VIKOR, v = 0.5), supaya makin besar makin baik"""
+    n, m = context.matrix.shape
+    if not n or not m:
+        return np.zeros(n)
+    best, worst = context.ideal
+    regret = _safe_divide(best - context.filled, best - worst) * context.weights
+    group = regret.sum(axis=1)
+    individual = regret.max(axis=1)
+    q = VIKOR_V * _safe_divide(group - group.min(), group.max() - group.min()) + \
+        (1 - VIKOR_V) * _safe_divide(individual - individual.min(), individual.max() - individual.min())
+    return 1.0 - q
+
+
+def rank_order(scores):
+    """Indeks baris terurut dari skor tertinggi; seri dipecah dengan id terkecil"""
+    return np.argsort(-scores, kind="stable")
+
+
+def rank_locations(matrix, algorithm, context=None):
+    scores = ALGORITHMS[algorithm](context or ScoringContext(matrix))
+    return scores, rank_order(scores)
+
+
+def select_top(scores, offset=0, limit=None, min_score=None):
+    """Indeks baris untuk rank offset+1..offset+limit dengan skor >= min_score
+
+    Urutannya sama dengan rank_order(scores)[offset:offset + limit], tapi hanya
+    kandidat yang dipilih argpartition (O(n)) yang diurutkan. Kandidat yang
+    seri dengan skor ke-K ikut diurutkan supaya seri tetap dipecah dengan id
+    terkecil.
+    """
+    candidates = np.arange(len(scores)) if min_score is None else np.flatnonzero(scores >= min_score)
+    if limit is not None and offset + limit < len(candidates):
+        k = offset + limit
+        kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+        candidates = candidates[scores[candidates] >= kth]
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return order[offset:] if limit is None else order[offset:offset + limit]
+
+
+def saw_top_k(context, k=None, min_score=None):
+    """(indeks, skor) kandidat top-k SAW, dengan pruning batas atas
+
+    Kolom dinormalisasi dan dijumlahkan satu per satu dari bobot terbesar,
+    hanya untuk kandidat yang tersisa. Setelah tiap kolom, skor parsial adalah
+    batas bawah dan skor parsial + Σ w·r terbaik kolom sisanya batas atas;
+    lokasi yang batas atasnya di bawah batas bawah ke-k (atau di bawah
+    min_score) tidak mungkin masuk top-k dan tidak dihitung lagi. Skor
+    kandidat akhir dihitung ulang dengan R · w seperti saw().
+    """
+    matrix = context.matrix
+    weights = context.weights
+    col_min, col_max = context.extremes
+    n, m = matrix.shape
+    candidates = np.arange(n)
+    if not m:
+        return candidates, np.zeros(n)
+
+    def normalized(rows, columns):
+        return saw_normalize_values(matrix.values[rows, columns], matrix.present[rows, columns],
+                                    matrix.is_benefit[columns], col_min[columns], col_max[columns])
+
+    # Nilai ternormalisasi terbaik per kolom (sel terisi dengan nilai ideal)
+    best = np.where(matrix.is_benefit, col_max, col_min)
+    bounds = saw_normalize_values(best[np.newaxis], np.isfinite(best)[np.newaxis],
+                                  matrix.is_benefit, col_min, col_max)[0] * weights
+    columns = np.argsort(-weights, kind="stable")
+    # remaining[step] = batas atas kontribusi kolom columns[step + 1:]
+    remaining = np.append(np.cumsum(bounds[columns][::-1])[::-1][1:], 0.0)
+
+    partial = np.zeros(n)
+    for step, j in enumerate(columns.tolist()):
+        rows = slice(None) if len(candidates) == n else candidates
+        partial += normalized(rows, slice(j, j + 1))[:, 0] * weights[j]
+        threshold = -np.inf if min_score is None else min_score
+        if k is not None and 0 < k < len(candidates):
+            threshold = max(threshold, np.partition(partial, len(partial) - k)[len(partial) - k])
+        keep = partial + remaining[step] + PRUNE_SLACK >= threshold
+        if not keep.all():
+            candidates, partial = candidates[keep], partial[keep]
+    return candidates, normalized(candidates, slice(None)) @ weights
+
+
+def ranking_rows(matrix, scores, order, start=1):
+    """Ubah hasil ranking jadi list dict untuk response JSON (rank mulai dari start)"""
+    ids = matrix.location_ids[order].tolist()
+    names = matrix.location_names
+    ranked_scores = scores[order].tolist()
+    return [
+        {
+            "rank": position,
+            "location_id": location_id,
+            "name": names[index],
+            "score": score,
+        }
+        for position, (index, location_id, score) in enumerate(zip(order.tolist(), ids, ranked_scores), start=start)
+    ]
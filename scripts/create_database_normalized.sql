@@ -43,10 +43,23 @@ CREATE TABLE IF NOT EXISTS calculation_results (
   id INT PRIMARY KEY AUTO_INCREMENT,
   location_id INT,
   algorithm VARCHAR(10) NOT NULL,
+  fingerprint CHAR(40) NOT NULL DEFAULT '',
   score DECIMAL(10,6) NOT NULL,
   rank_position INT NOT NULL,
   calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY (location_id) REFERENCES locations(id) ON DELETE CASCADE,
   INDEX idx_algorithm (algorithm),
+  UNIQUE KEY uq_algorithm_fingerprint_rank (algorithm, fingerprint, rank_position),
   INDEX idx_calculated_at (calculated_at)
 );
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  -- Versi per tabel untuk ETag / Last-Modified, dinaikkan setiap write lewat API
+  resource VARCHAR(32) PRIMARY KEY,
+  version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+);
+
+-- Baris awal per resource: updated_at saat database dibuat (ikut direplikasi) membedakan
+-- database ini dari database lain / yang dibuat ulang dengan nomor versi yang sama
+INSERT IGNORE INTO data_versions (resource) VALUES ('locations'), ('criteria'), ('evaluations');
@@ -0,0 +1,6 @@
+-- Migrasi untuk database yang dibuat sebelum kolom fingerprint ada
+USE tofico_analyzer;
+
+ALTER TABLE calculation_results
+  ADD COLUMN fingerprint CHAR(40) NOT NULL DEFAULT '' AFTER algorithm,
+  ADD INDEX idx_algorithm_fingerprint (algorithm, fingerprint, rank_position);
@@ -0,0 +1,12 @@
+-- Migrasi untuk database yang dibuat sebelum tabel data_versions ada
+USE tofico_analyzer;
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  resource VARCHAR(32) PRIMARY KEY,
+  version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+);
+
+-- Baris awal per resource: updated_at saat database dibuat (ikut direplikasi) membedakan
+-- database ini dari database lain / yang dibuat ulang dengan nomor versi yang sama
+INSERT IGNORE INTO data_versions (resource) VALUES ('locations'), ('criteria'), ('evaluations');
@@ -0,0 +1,9 @@
+-- Migrasi untuk database yang dibuat sebelum hasil ranking disimpan per versi data
+USE tofico_analyzer;
+
+-- Fingerprint lama (scan CRC32) tidak pernah cocok dengan key dari data_versions
+DELETE FROM calculation_results;
+
+ALTER TABLE calculation_results
+  DROP INDEX idx_algorithm_fingerprint,
+  ADD UNIQUE KEY uq_algorithm_fingerprint_rank (algorithm, fingerprint, rank_position);
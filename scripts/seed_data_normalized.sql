@@ -45,3 +45,8 @@ INSERT INTO evaluations (location_id, criteria_id, value) VALUES
 (3, 'marketPotential', 85)
 ON DUPLICATE KEY UPDATE
 value = VALUES(value);
+
+-- Naikkan versi data: ETag, cache criteria, ranking tersimpan dan snapshot matriks
+-- dari isi sebelum seeding tidak lagi dianggap berlaku
+INSERT INTO data_versions (resource, version) VALUES ('locations', 1), ('criteria', 1), ('evaluations', 1)
+ON DUPLICATE KEY UPDATE version = version + 1;
@@ -0,0 +1,211 @@
+import itertools
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from scoring import ScoringContext, normalized_weights
+
+MAX_SCENARIOS = 10000
+# Jumlah sel skor (skenario × lokasi) per batch, membatasi memori per thread
+CHUNK_CELLS = 2_000_000
+WORKERS = min(os.cpu_count() or 1, 4)
+# Rank 1..EXACT_RANKS dihitung tepat; di atasnya histogram bin geometris
+EXACT_RANKS = 100
+GEOMETRIC_BINS = 150
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Resolusi kuantisasi skor untuk kunci sort (butuh lokasi < 2^23 agar muat int64)
+_KEY_STEPS = 1 << 40
+METHODS = ('grid', 'one_at_a_time', 'dirichlet')
+# Algoritma yang skornya linier terhadap bobot (satu matmul per batch skenario)
+ALGORITHMS = ('saw', 'wp')
+
+
+def grid_scenarios(m, steps):
+    """Semua bobot kelipatan 1/steps yang jumlahnya 1 (lattice simplex)"""
+    count = math.comb(steps + m - 1, m - 1)
+    if count > MAX_SCENARIOS:
+        raise ValueError(f"Grid with {steps} steps over {m} criteria has {count} scenarios (max {MAX_SCENARIOS})")
+    scenarios = np.empty((count, m), dtype=np.float64)
+    # Stars and bars: posisi m-1 pemisah di antara steps + m - 1 slot
+    for row, bars in enumerate(itertools.combinations(range(steps + m - 1), m - 1)):
+        edges = np.array((-1,) + bars + (steps + m - 1,))
+        scenarios[row] = (np.diff(edges) - 1) / steps
+    return scenarios
+
+
+def one_at_a_time_scenarios(weights, delta, steps):
+    """Ubah satu bobot sebesar ±delta (steps langkah per arah), bobot lain diskalakan proporsional
+
+    Mengembalikan (scenarios, labels) dengan label (criteria_index, perubahan).
+    """
+    base = normalized_weights(weights)
+    m = len(base)
+    changes = [delta * k / steps for k in range(-steps, steps + 1) if k]
+    if m * len(changes) > MAX_SCENARIOS:
+        raise ValueError(f"Too many scenarios (max {MAX_SCENARIOS})")
+
+    scenarios = []
+    labels = []
+    for j in range(m):
+        rest = 1.0 - base[j]
+        for change in changes:
+            weight = min(max(base[j] + change, 0.0), 1.0)
+            if rest > 0:
+                scenario = base * ((1.0 - weight) / rest)
+            else:
+                scenario = np.full(m, (1.0 - weight) / max(m - 1, 1))
+            scenario[j] = weight
+            scenarios.append(scenario)
+            labels.append((j, round(weight - base[j], 6)))
+    return np.array(scenarios).reshape(-1, m), labels
+
+
+def dirichlet_scenarios(weights, samples, concentration=None, seed=None):
+    """Sampel bobot acak; dengan concentration, sampel terpusat di bobot saat ini"""
+    if not (1 <= samples <= MAX_SCENARIOS):
+        raise ValueError(f"samples must be between 1-{MAX_SCENARIOS}")
+    m = len(weights)
+    if concentration is None:
+        alpha = np.ones(m)
+    else:
+        alpha = np.maximum(normalized_weights(weights) * concentration * m, 1e-3)
+    return np.random.default_rng(seed).dirichlet(alpha, size=samples)
+
+
+def scoring_basis(matrix, algorithm):
+    """(matriks n×m, tanda kolom) sehingga skor skenario w = basis @ (tanda · w)
+
+    Untuk WP dipakai log S (urutannya sama dengan V = S / ΣS).
+    """
+    context = ScoringContext(matrix)
+    if algorithm == 'saw':
+        return context.saw_normalized, np.ones(len(matrix.criteria_ids))
+    return context.wp_log, context.signs
+
+
+def _rank_bins(n):
+    """Batas bawah bin rank (1-based) dan pemetaan rank → bin"""
+    exact = np.arange(1, min(n, EXACT_RANKS) + 1)
+    if n > EXACT_RANKS:
+        tail = np.unique(np.geomspace(EXACT_RANKS + 1, n + 1, GEOMETRIC_BINS).astype(np.int64))
+        edges = np.concatenate([exact, tail[tail <= n]])
+    else:
+        edges = exact
+    bin_of_rank = np.searchsorted(edges, np.arange(1, n + 1), side='right') - 1
+    return edges, bin_of_rank
+
+
+def _sort_keys(scores):
+    """Kunci int64 unik per baris: skor tertinggi dulu, seri dipecah dengan indeks terkecil
+
+    Skor dikuantisasi ke 2^40 langkah per baris sehingga argsort biasa
+    (quicksort) memberi urutan yang sama dengan argsort stabil, beberapa kali
+    lebih cepat.
+    """
+    n = scores.shape[1]
+    low = scores.min(axis=1, keepdims=True)
+    span = scores.max(axis=1, keepdims=True) - low
+    span[span == 0] = 1.0
+    steps = float(_KEY_STEPS)
+    keys = ((scores - low) * (steps / span)).astype(np.int64)
+    keys = (_KEY_STEPS - keys) * n
+    keys += np.arange(n, dtype=np.int64)
+    return keys
+
+
+def _chunk_statistics(basis_t, weights, bin_of_rank, bins, top_k):
+    """Rank semua lokasi untuk satu batch skenario dan kembalikan akumulatornya"""
+    n = basis_t.shape[1]
+    scores = weights @ basis_t  # (skenario, lokasi)
+    order = np.argsort(_sort_keys(scores), axis=1)
+    ranks = np.empty_like(order, dtype=np.int32)
+    np.put_along_axis(ranks, order, np.arange(1, n + 1, dtype=np.int32)[np.newaxis, :], axis=1)
+
+    locations = np.arange(n, dtype=np.int64) * bins
+    return (
+        np.bincount(order[:, 0], minlength=n),
+        np.bincount(order[:, :top_k].ravel(), minlength=n),
+        ranks.sum(axis=0, dtype=np.int64),
+        ranks.min(axis=0),
+        ranks.max(axis=0),
+        np.bincount((locations + bin_of_rank[ranks - 1]).ravel(), minlength=n * bins),
+    )
+
+
+def rank_statistics(basis, signs, scenarios, top_k=10):
+    """Skor semua skenario dalam batch matmul dan kumpulkan statistik rank per lokasi
+
+    Batch skenario diproses paralel di thread (numpy melepas GIL saat matmul
+    dan sort). Skor seri dipecah dengan urutan lokasi (id terkecil) seperti
+    di rank_order.
+    """
+    n = basis.shape[0]
+    count = len(scenarios)
+    edges, bin_of_rank = _rank_bins(n)
+    bins = len(edges)
+
+    basis_t = np.ascontiguousarray(basis.T)
+    weights = scenarios * signs
+    chunk = max(1, CHUNK_CELLS // max(n, 1))
+    batches = [weights[start:start + chunk] for start in range(0, count, chunk)]
+
+    first = np.zeros(n, dtype=np.int64)
+    in_top = np.zeros(n, dtype=np.int64)
+    rank_sum = np.zeros(n, dtype=np.int64)
+    rank_min = np.full(n, n + 1, dtype=np.int64)
+    rank_max = np.zeros(n, dtype=np.int64)
+    histogram = np.zeros(n * bins, dtype=np.int64)
+
+    with ThreadPoolExecutor(max_workers=min(WORKERS, len(batches))) as executor:
+        results = executor.map(lambda batch: _chunk_statistics(basis_t, batch, bin_of_rank, bins, top_k), batches)
+        for batch_first, batch_top, batch_sum, batch_min, batch_max, batch_histogram in results:
+            first += batch_first
+            in_top += batch_top
+            rank_sum += batch_sum
+            np.minimum(rank_min, batch_min, out=rank_min)
+            np.maximum(rank_max, batch_max, out=rank_max)
+            histogram += batch_histogram
+
+    cumulative = np.cumsum(histogram.reshape(n, bins), axis=1)
+    quantiles = {}
+    for q in QUANTILES:
+        target = max(math.ceil(q * count), 1)
+        quantiles[q] = edges[np.argmax(cumulative >= target, axis=1)]
+
+    return {
+        "share_first": first / count,
+        "share_top_k": in_top / count,
+        "mean_rank": rank_sum / count,
+        "min_rank": rank_min,
+        "max_rank": rank_max,
+        "quantiles": quantiles,
+    }
+
+
+def sensitivity_rows(matrix, baseline_order, stats, limit=None):
+    """Statistik per lokasi, urut share_first lalu median rank lalu rank baseline"""
+    n = len(matrix.location_ids)
+    baseline_rank = np.empty(n, dtype=np.int64)
+    baseline_rank[baseline_order] = np.arange(1, n + 1)
+    median = stats["quantiles"][0.5]
+    order = np.lexsort((baseline_rank, median, -stats["share_first"]))
+    if limit is not None:
+        order = order[:limit]
+
+    ids = matrix.location_ids.tolist()
+    rows = []
+    for i in order.tolist():
+        rows.append({
+            "location_id": ids[i],
+            "name": matrix.location_names[i],
+            "baseline_rank": int(baseline_rank[i]),
+            "share_first": round(float(stats["share_first"][i]), 6),
+            "share_top_k": round(float(stats["share_top_k"][i]), 6),
+            "mean_rank": round(float(stats["mean_rank"][i]), 3),
+            "min_rank": int(stats["min_rank"][i]),
+            "max_rank": int(stats["max_rank"][i]),
+            "rank_quantiles": {f"p{round(q * 100)}": int(values[i]) for q, values in stats["quantiles"].items()},
+        })
+    return rows
@@ -0,0 +1,88 @@
+# Encoder response cepat untuk baris database (tanpa jsonable_encoder).
+# Baris dari database sudah berupa tipe dasar, jadi langsung di-encode dengan
+# orjson jika terpasang (fallback json stdlib); Decimal → float, datetime → ISO 8601.
+# Representasi lain lewat header Accept:
+# - application/x-msgpack: MessagePack (butuh paket msgpack)
+# - application/vnd.tofico.columnar+json: list objek → {field: [nilai, ...]}
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+COLUMNAR = "application/vnd.tofico.columnar+json"
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple, np.ndarray)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps(data):
+    """JSON (bytes) dengan format yang sama seperti JSONResponse FastAPI"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def to_columns(data):
+    """List objek → {field: [nilai, ...]}; {items: [...]} / {results: [...]} ikut diubah"""
+    if isinstance(data, dict):
+        for key in ('items', 'results'):
+            if isinstance(data.get(key), list):
+                return {**data, key: to_columns(data[key])}
+        return data
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        return data
+    fields = {}
+    for row in data:
+        for field in row:
+            fields.setdefault(field, None)
+    return {field: [row.get(field) for row in data] for field in fields}
+
+
+def negotiate(request):
+    """Media type response dari header Accept (default JSON)"""
+    accept = request.headers.get("accept", "")
+    if MSGPACK in accept and msgpack is not None:
+        return MSGPACK
+    if COLUMNAR in accept:
+        return COLUMNAR
+    return JSON
+
+
+def encode(data, media_type=JSON):
+    if media_type == MSGPACK:
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+    if media_type == COLUMNAR:
+        return dumps(to_columns(data))
+    return dumps(data)
+
+
+def fast_response(request, data, headers=None):
+    """Response tanpa validasi ulang; representasi dipilih dari Accept"""
+    media_type = negotiate(request)
+    headers = {**(headers or {}), "Vary": "Accept"}
+    return Response(content=encode(data, media_type), media_type=media_type, headers=headers)
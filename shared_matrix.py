@@ -0,0 +1,390 @@
+# Matriks keputusan bersama untuk beberapa worker uvicorn (SHARED_MATRIX=true).
+#
+# Satu file per database di tmpfs (/dev/shm) berisi header berversi lalu
+# array numpy mentah. Worker me-mmap file itu read-only dan membuat
+# DecisionMatrix di atasnya tanpa salinan, jadi RAM tidak bertambah per
+# worker. Rebuild (oleh satu worker, dijaga file lock, atau oleh refresher
+# `python shared_matrix.py`) menulis file baru lalu os.replace: pertukaran
+# versi atomik, dan worker yang masih memegang mmap lama tetap aman sampai
+# melepasnya.
+#
+# File yang sama adalah snapshot warm start (MATRIX_SNAPSHOT=true, juga untuk
+# satu worker): saat startup file di-mmap dan dipakai langsung jika versinya
+# cocok dengan data_versions, tanpa membaca ulang tabel. Snapshot disimpan di
+# disk (snapshots/ di repo) supaya bertahan setelah reboot; tanpa
+# MATRIX_SNAPSHOT file bersama cukup di tmpfs /dev/shm.
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from collections.abc import Sequence
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+from data_versions import load_versions
+from db_config_normalized import DB_CONFIG
+from decision_matrix import DecisionMatrix, load_decision_matrix
+from replicas import is_primary
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa file lock, tiap worker bisa rebuild sendiri
+    fcntl = None
+
+SHARED_MATRIX = os.getenv('SHARED_MATRIX', 'false').lower() == 'true'
+# Snapshot matriks di disk untuk warm start setelah restart/reboot, tidak bergantung pada SHARED_MATRIX
+MATRIX_SNAPSHOT = os.getenv('MATRIX_SNAPSHOT', 'false').lower() == 'true'
+MATRIX_STORE = SHARED_MATRIX or MATRIX_SNAPSHOT
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots')
+SHARED_MATRIX_DIR = os.getenv('SHARED_MATRIX_DIR') or (
+    SNAPSHOT_DIR if MATRIX_SNAPSHOT else '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+)
+# Detik antar cek versi oleh thread refresher di tiap worker (0 = hanya saat request)
+SHARED_MATRIX_REFRESH = float(os.getenv('SHARED_MATRIX_REFRESH', 2))
+# Resource data_versions yang menentukan isi matriks
+RESOURCES = ('locations', 'criteria', 'evaluations')
+
+MAGIC = b"TSM1"
+FORMAT_VERSION = 1
+# magic, format, generation, key (sha1 hex versi data), rows, cols, dibuat (unix), panjang metadata, panjang nama
+HEADER = struct.Struct("<4sIQ40sQQdQQ")
+ALIGNMENT = 8
+
+
+def version_key(versions):
+    """sha1 dari versi + updated_at resource matriks (updated_at membedakan database yang di-reset)"""
+    parts = []
+    for resource in RESOURCES:
+        version, updated_at = versions.get(resource, (0, None))
+        parts.append(f"{resource}={version}@{updated_at.timestamp() if updated_at else 0}")
+    return hashlib.sha1(";".join(parts).encode()).hexdigest()
+
+
+def snapshot_key(versions):
+    """version_key untuk file snapshot, atau None jika ada resource tanpa baris data_versions
+
+    Tanpa baris, versinya 0@0 untuk database mana pun (baru, dibuat ulang,
+    di-seed ulang), jadi key itu tidak membedakan isi dan snapshot tidak
+    dipakai maupun ditulis. updated_at baris (dibuat bersama database dan
+    ikut direplikasi) adalah identitas database tersebut.
+    """
+    if versions is None or any(versions.get(resource, (0, None))[1] is None for resource in RESOURCES):
+        return None
+    return version_key(versions)
+
+
+def _aligned(offset):
+    return offset + (-offset % ALIGNMENT)
+
+
+def _layout(rows, cols, meta_size, names_size):
+    """Offset tiap bagian file; array 8-byte di offset kelipatan 8"""
+    sections = {}
+    offset = HEADER.size
+    for name, size in (
+        ("meta", meta_size),
+        ("location_ids", 8 * rows),
+        ("weights", 8 * cols),
+        ("values", 8 * rows * cols),
+        ("name_offsets", 8 * (rows + 1)),
+        ("is_benefit", cols),
+        ("present", rows * cols),
+        ("names", names_size),
+    ):
+        offset = _aligned(offset)
+        sections[name] = offset
+        offset += size
+    return sections, offset
+
+
+class SharedNames(Sequence):
+    """location_names tanpa salinan: nama di-decode dari buffer saat diakses"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("location name index out of range")
+        start, stop = int(self._offsets[index]), int(self._offsets[index + 1])
+        return self._blob[start:stop].tobytes().decode("utf-8")
+
+
+class Snapshot:
+    """Satu file matriks yang sudah di-mmap"""
+
+    def __init__(self, key, generation, created_at, size, inode, matrix):
+        self.key = key
+        self.generation = generation
+        self.created_at = created_at
+        self.size = size
+        self.inode = inode
+        self.matrix = matrix
+
+
+def write_snapshot(path, matrix, key, generation):
+    """Tulis matriks ke file sementara lalu ganti path secara atomik"""
+    rows, cols = matrix.shape
+    names = [name.encode("utf-8") for name in matrix.location_names]
+    name_offsets = np.zeros(rows + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in names], out=name_offsets[1:])
+    meta = json.dumps({"criteria_ids": list(matrix.criteria_ids)}).encode("utf-8")
+    sections, total = _layout(rows, cols, len(meta), int(name_offsets[-1]))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation, key.encode("ascii"), rows, cols,
+                                   time.time(), len(meta), int(name_offsets[-1])))
+            for name, data in (
+                ("meta", meta),
+                ("location_ids", np.ascontiguousarray(matrix.location_ids, dtype=np.int64)),
+                ("weights", np.ascontiguousarray(matrix.weights, dtype=np.float64)),
+                ("values", np.ascontiguousarray(matrix.values, dtype=np.float64)),
+                ("name_offsets", name_offsets),
+                ("is_benefit", np.ascontiguousarray(matrix.is_benefit, dtype=np.bool_)),
+                ("present", np.ascontiguousarray(matrix.present, dtype=np.bool_)),
+                ("names", b"".join(names)),
+            ):
+                file.seek(sections[name])
+                file.write(data)
+            file.truncate(total)
+            # Snapshot di disk: isi harus tersimpan sebelum rename supaya crash tidak meninggalkan file setengah
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def open_snapshot(path):
+    """Snapshot di path (mmap read-only), atau None jika tidak ada / formatnya lain"""
+    try:
+        with open(path, "rb") as file:
+            inode = os.fstat(file.fileno()).st_ino
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+    if len(buffer) < HEADER.size:
+        return None
+    magic, version, generation, key, rows, cols, created_at, meta_size, names_size = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    sections, total = _layout(rows, cols, meta_size, names_size)
+    if len(buffer) < total:
+        return None
+
+    def array(name, dtype, count):
+        return np.frombuffer(buffer, dtype=dtype, count=count, offset=sections[name])
+
+    meta = json.loads(buffer[sections["meta"]:sections["meta"] + meta_size])
+    names = SharedNames(array("name_offsets", np.int64, rows + 1), array("names", np.uint8, names_size))
+    matrix = DecisionMatrix(
+        array("location_ids", np.int64, rows),
+        names,
+        meta["criteria_ids"],
+        array("weights", np.float64, cols),
+        array("is_benefit", np.bool_, cols),
+        array("values", np.float64, rows * cols).reshape(rows, cols),
+        array("present", np.bool_, rows * cols).reshape(rows, cols),
+    )
+    return Snapshot(key.decode("ascii"), generation, created_at, len(buffer), inode, matrix)
+
+
+@contextmanager
+def _file_lock(path):
+    """Lock eksklusif antar proses (blok sampai pemegang lain selesai)"""
+    with open(path, "a") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+class SharedMatrixStore:
+    """DecisionMatrix dari file bersama, dibangun ulang jika versi data berubah
+
+    Versi diambil dari data_versions (satu query kecil), jadi request yang
+    datanya tidak berubah tidak memuat matriks dari database sama sekali.
+    Versi dibaca sebelum matriks dimuat; write berikutnya hanya membuat
+    matriks lebih baru dari key-nya, yang dibangun ulang pada request berikut.
+    """
+
+    def __init__(self, directory, name):
+        self.path = os.path.join(directory, f"tofico-matrix-{name}.bin")
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.rebuilds = 0
+        self.attaches = 0
+        self.warm_start = None
+        self.last_error = None
+
+    def get(self, conn, versions=None, rebuild=True):
+        """Matriks untuk ``versions``; rebuild=False (koneksi replica) tidak pernah menulis snapshot
+
+        Replica yang versinya lain dari snapshot dilayani langsung dari
+        database, jadi replica yang tertinggal tidak membuat key snapshot
+        bolak-balik.
+        """
+        key = snapshot_key(load_versions(conn) if versions is None else versions)
+        if key is None:
+            # Tabel / baris data_versions belum ada: tidak ada versi untuk dibandingkan
+            return load_decision_matrix(conn)
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.key != key:
+                snapshot = self._attach(key)
+                if snapshot is None and rebuild:
+                    try:
+                        snapshot = self._rebuild(conn, key)
+                    except OSError as e:
+                        # Direktori snapshot tidak bisa ditulis: layani dari database, jangan gagalkan request
+                        self.last_error = str(e)
+                if snapshot is not None:
+                    self._snapshot = snapshot
+            if snapshot is not None:
+                return snapshot.matrix
+        return load_decision_matrix(conn)
+
+    def _attach(self, key):
+        snapshot = open_snapshot(self.path)
+        if snapshot is None or snapshot.key != key:
+            return None
+        self.attaches += 1
+        return snapshot
+
+    def _rebuild(self, conn, key):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock = _file_lock(self.path + ".lock") if fcntl is not None else nullcontext()
+        with lock:
+            # Worker lain mungkin baru saja membangun versi yang sama
+            snapshot = self._attach(key)
+            if snapshot is not None:
+                return snapshot
+            current = open_snapshot(self.path)
+            generation = current.generation + 1 if current is not None else 1
+            write_snapshot(self.path, load_decision_matrix(conn), key, generation)
+            self.rebuilds += 1
+            return open_snapshot(self.path)
+
+    def refresh(self, conn):
+        """Bangun ulang snapshot jika versi data berubah; tanpa baris data_versions tidak memuat apa pun"""
+        versions = load_versions(conn)
+        if snapshot_key(versions) is None:
+            raise RuntimeError("data_versions rows are missing; matrix snapshot disabled")
+        self.get(conn, versions)
+
+    def start(self, pool):
+        """Warm start: pasang snapshot yang ada jika versinya cocok, kalau tidak bangun sekarang
+
+        Dipanggil saat startup supaya request pertama tidak menunggu scan tabel.
+        """
+        started = time.perf_counter()
+        rebuilds, attaches = self.rebuilds, self.attaches
+        try:
+            with pool.connection() as conn:
+                self.get(conn)
+        except Exception as e:
+            # Database belum siap: matriks dibangun pada request pertama
+            self.last_error = str(e)
+            return
+        self.warm_start = {
+            "source": ("rebuilt" if self.rebuilds != rebuilds else
+                       "snapshot" if self.attaches != attaches else "database"),
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def start_refresher(self, pool, interval=SHARED_MATRIX_REFRESH):
+        """Thread yang menulis snapshot baru segera setelah data berubah; Event untuk menghentikannya"""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    with pool.connection() as conn:
+                        self.refresh(conn)
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+
+        if interval > 0:
+            threading.Thread(target=run, name="shared-matrix-refresher", daemon=True).start()
+        return stop
+
+    def status(self):
+        snapshot = self._snapshot
+        status = {"shared": SHARED_MATRIX, "snapshot": MATRIX_SNAPSHOT, "path": self.path,
+                  "rebuilds": self.rebuilds, "attaches": self.attaches,
+                  "warm_start": self.warm_start, "last_error": self.last_error}
+        if snapshot is not None:
+            status.update({
+                "generation": snapshot.generation,
+                "key": snapshot.key,
+                "shape": list(snapshot.matrix.shape),
+                "bytes": snapshot.size,
+                "age_s": round(time.time() - snapshot.created_at, 1),
+            })
+        return status
+
+
+def store_name(config):
+    """Nama file per server + database supaya beberapa database tidak berbagi matriks"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", f"{config['host']}-{config['port']}-{config['database']}")
+
+
+shared_store = SharedMatrixStore(SHARED_MATRIX_DIR, store_name(DB_CONFIG))
+
+
+def current_matrix(conn, versions=None):
+    """DecisionMatrix terkini: dari file snapshot jika SHARED_MATRIX / MATRIX_SNAPSHOT aktif, kalau tidak dari database
+
+    ``versions`` (hasil load_versions) boleh diberikan jika sudah dibaca, supaya tidak dibaca dua kali.
+    Snapshot hanya ditulis dari koneksi primary.
+    """
+    if MATRIX_STORE:
+        return shared_store.get(conn, versions, rebuild=is_primary(conn))
+    return load_decision_matrix(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresher matriks bersama (alternatif rebuild oleh worker)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Detik antar cek versi data")
+    parser.add_argument("--once", action="store_true", help="Bangun sekali lalu keluar")
+    args = parser.parse_args()
+
+    import mysql.connector
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        while True:
+            rebuilds = shared_store.rebuilds
+            shared_store.refresh(connection)
+            if shared_store.rebuilds != rebuilds or args.once:
+                print(json.dumps(shared_store.status()), flush=True)
+            if args.once:
+                break
+            time.sleep(args.interval)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import math
+import threading
+
+import numpy as np
+
+from data_versions import follows, load_versions, newer
+from metrics import track_query
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+# Ukuran sel grid dalam derajat (~5.5 km di khatulistiwa)
+CELL_DEGREES = 0.05
+# Di atas jumlah ring ini kNN beralih ke scan penuh (data terlalu jarang untuk grid)
+MAX_KNN_RINGS = 64
+
+def haversine_km(lat, lng, lats, lngs):
+    """Jarak great-circle (km) dari satu titik ke array titik"""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """Index grid lat/lng di memori untuk pencarian radius dan k-nearest
+
+    Titik dikelompokkan per sel ``CELL_DEGREES``; query hanya memeriksa sel
+    di sekitar titik pusat lalu menghitung haversine secara vektor untuk
+    kandidat di sel-sel tersebut. Tambah/ubah/hapus titik O(1).
+    """
+
+    def __init__(self, points=(), cell_degrees=CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells = {}
+        self._points = {}
+        for location_id, latitude, longitude in points:
+            self.add(location_id, latitude, longitude)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, latitude, longitude):
+        return (math.floor(longitude / self.cell_degrees), math.floor(latitude / self.cell_degrees))
+
+    def add(self, location_id, latitude, longitude):
+        if latitude is None or longitude is None:
+            return
+        self.remove(location_id)
+        latitude, longitude = float(latitude), float(longitude)
+        self._points[location_id] = (latitude, longitude)
+        self._cells.setdefault(self._cell(latitude, longitude), set()).add(location_id)
+
+    def remove(self, location_id):
+        point = self._points.pop(location_id, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(location_id)
+            if not members:
+                del self._cells[cell]
+
+    def _distances(self, latitude, longitude, ids):
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        coordinates = np.array([self._points[location_id] for location_id in ids])
+        distances = haversine_km(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+        return np.array(ids, dtype=np.int64), distances
+
+    def _ring(self, center, radius):
+        cx, cy = center
+        if radius == 0:
+            yield center
+            return
+        for x in range(cx - radius, cx + radius + 1):
+            yield (x, cy - radius)
+            yield (x, cy + radius)
+        for y in range(cy - radius + 1, cy + radius):
+            yield (cx - radius, y)
+            yield (cx + radius, y)
+
+    def within(self, latitude, longitude, radius_km):
+        """(ids, distances) dalam radius, terurut dari yang terdekat"""
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(min(abs(latitude) + lat_span, 90.0))), 1e-6)
+        lng_span = radius_km / (KM_PER_DEGREE * cos_lat)
+
+        min_x, min_y = self._cell(latitude - lat_span, longitude - lng_span)
+        max_x, max_y = self._cell(latitude + lat_span, longitude + lng_span)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self._cells):
+            # Radius besar: lebih murah menelusuri sel yang terisi saja
+            cells = [cell for cell in self._cells if min_x <= cell[0] <= max_x and min_y <= cell[1] <= max_y]
+        else:
+            cells = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+        candidates = [location_id for cell in cells for location_id in self._cells.get(cell, ())]
+        ids, distances = self._distances(latitude, longitude, candidates)
+        inside = distances <= radius_km
+        ids, distances = ids[inside], distances[inside]
+        order = np.lexsort((ids, distances))
+        return ids[order], distances[order]
+
+    def nearest(self, latitude, longitude, k):
+        """(ids, distances) k titik terdekat"""
+        if not self._points or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        center = self._cell(latitude, longitude)
+        # Jarak minimum (km) yang ditempuh per ring sel
+        cos_lat = max(math.cos(math.radians(min(abs(latitude) + 1.0, 90.0))), 1e-6)
+        ring_km = self.cell_degrees * KM_PER_DEGREE * cos_lat
+
+        candidates = []
+        radius = 0
+        while radius <= MAX_KNN_RINGS:
+            candidates.extend(
+                location_id for cell in self._ring(center, radius) for location_id in self._cells.get(cell, ())
+            )
+            if len(candidates) >= k or len(candidates) == len(self._points):
+                ids, distances = self._distances(latitude, longitude, candidates)
+                kth = np.partition(distances, min(k, len(distances)) - 1)[min(k, len(distances)) - 1]
+                # Titik di luar ring ini berjarak minimal radius * ring_km
+                if kth <= radius * ring_km or len(candidates) == len(self._points):
+                    break
+            radius += 1
+        else:
+            ids, distances = self._distances(latitude, longitude, list(self._points))
+
+        order = np.lexsort((ids, distances))[:k]
+        return ids[order], distances[order]
+
+    def search(self, latitude, longitude, radius_km=None, k=None):
+        """Radius saja, k terdekat saja, atau k terdekat di dalam radius"""
+        if k is None:
+            return self.within(latitude, longitude, radius_km)
+        ids, distances = self.nearest(latitude, longitude, k)
+        if radius_km is not None:
+            inside = distances <= radius_km
+            ids, distances = ids[inside], distances[inside]
+        return ids, distances
+
+
+def location_version(conn):
+    """Versi locations dari data_versions (lookup primary key), None jika tabelnya belum ada"""
+    versions = load_versions(conn)
+    if versions is None:
+        return None
+    return versions.get('locations', (0, None))
+
+
+def load_grid_index(conn):
+    cursor = conn.cursor()
+    with track_query("location_points"):
+        cursor.execute("SELECT id, latitude, longitude FROM locations WHERE latitude IS NOT NULL AND longitude IS NOT NULL")
+        rows = cursor.fetchall()
+    index = GridIndex(rows)
+    cursor.close()
+    return index
+
+
+class SpatialIndexHolder:
+    """GridIndex per proses, dibangun ulang jika versi locations di data_versions berubah
+
+    Pembacaan tabel dilakukan di luar lock; lock hanya menjaga index di memori
+    (write di worker yang sama mengubahnya di tempat). Index yang lebih baru
+    tetap dipakai untuk request dari replica yang tertinggal, jadi index tidak
+    bolak-balik dibangun ulang antar replica. Tanpa tabel data_versions index
+    dibangun ulang setiap pencarian.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index = None
+        self.version = None
+        self.rebuilds = 0
+
+    def _serves(self, version):
+        return self.index is not None and version is not None and (
+            self.version == version or newer(self.version, version)
+        )
+
+    def _current(self, conn):
+        """GridIndex yang berlaku untuk koneksi ini (dibangun di luar lock jika perlu)"""
+        version = location_version(conn)
+        with self._lock:
+            if self._serves(version):
+                return self.index
+        index = load_grid_index(conn)
+        with self._lock:
+            self.rebuilds += 1
+            if version is not None and not self._serves(version):
+                self.index = index
+                self.version = version
+        return index
+
+    def search(self, conn, latitude, longitude, radius_km=None, k=None):
+        index = self._current(conn)
+        with self._lock:
+            return index.search(latitude, longitude, radius_km, k)
+
+    def load(self, conn):
+        """Bangun index sekarang (warm-up startup) jika belum ada atau versinya berubah"""
+        self._current(conn)
+
+    def status(self):
+        with self._lock:
+            return {"loaded": self.index is not None, "size": len(self.index) if self.index is not None else 0,
+                    "rebuilds": self.rebuilds}
+
+    def invalidate(self):
+        with self._lock:
+            self.index = None
+            self.version = None
+
+    def apply(self, versions, change=None):
+        """Terapkan write ke locations yang sudah di-commit: ``change(index)`` lalu naikkan versinya
+
+        ``versions`` dibaca di dalam transaksi write, sesudah bump locations.
+        Index hanya diubah jika versinya tepat satu write di belakang; kalau
+        tidak dibiarkan dan dibangun ulang saat versinya tidak lagi cocok.
+        """
+        version = versions.get('locations') if versions is not None else None
+        with self._lock:
+            if self.index is None:
+                return
+            if not follows({'locations': self.version}, {'locations': version}, ('locations',)):
+                return
+            if change is not None:
+                change(self.index)
+            self.version = version
+
+
+spatial_index = SpatialIndexHolder()
@@ -0,0 +1,102 @@
+# Import lokasi (CSV / GeoJSON) tanpa MySQL: parser streaming dan validasi per baris
+import json
+
+from evaluation_import import consume_records
+from location_import import FeatureCollectionParser, LocationImporter
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.lastrowid = None
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.connection.statements.append((sql, list(params or ())))
+        if sql.startswith("SELECT id FROM criteria"):
+            self.rows = [('c1',)]
+        elif sql.startswith("SELECT @@SESSION.auto_increment_increment"):
+            self.rows = [(1,)]
+        elif sql.startswith("INSERT INTO locations"):
+            self.lastrowid = self.connection.next_id
+            self.connection.next_id += len(params) // 4
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.next_id = 1
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def feature(name, properties=None):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [106.8, -6.2]},
+            "properties": {"name": name, **(properties or {})}}
+
+
+def parse(chunks):
+    parser = FeatureCollectionParser()
+    results = []
+    for chunk in chunks:
+        results.extend(parser.feed(chunk))
+    results.extend(parser.close())
+    return results
+
+
+def test_criteria_must_be_an_object():
+    importer = LocationImporter(FakeConnection())
+    records = [
+        (1, {"name": "A", "latitude": 1, "longitude": 2, "criteria": {"c1": 50}}, None),
+        (2, {"name": "B", "latitude": 1, "longitude": 2, "criteria": "oops"}, None),
+        (3, {"name": "C", "latitude": 1, "longitude": 2, "criteria": [1, 2]}, None),
+    ]
+    consume_records(importer, records)
+    summary = importer.finish()
+    assert summary["inserted"] == 1
+    assert summary["evaluations"] == 1
+    assert summary["errors"] == [{"row": 2, "detail": "criteria must be an object"},
+                                 {"row": 3, "detail": "criteria must be an object"}]
+
+
+def test_bad_feature_in_the_middle_is_skipped():
+    good = [json.dumps(feature(f"Lokasi {i}")) for i in range(1, 5)]
+    body = ('{"type": "FeatureCollection", "features": [' + good[0] + ", " + good[1] + ', '
+            + '{"type": "Feature", "properties": {"name": "rusak",}, "geometry": {"type": "Point"}}'
+            + ", " + good[2] + ", " + good[3] + "]}").encode()
+
+    # Per 7 byte supaya feature juga terpotong di batas chunk
+    results = parse([body[i:i + 7] for i in range(0, len(body), 7)])
+    assert [number for number, _, _ in results] == [1, 2, 3, 4, 5]
+    assert [record["name"] for _, record, error in results if error is None] == \
+        ["Lokasi 1", "Lokasi 2", "Lokasi 3", "Lokasi 4"]
+    assert [error for _, _, error in results if error is not None] == \
+        ["Invalid JSON: Expecting property name enclosed in double quotes"]
+
+
+def test_bad_line_in_feature_sequence_is_skipped():
+    body = (json.dumps(feature("A")) + "\n" + '{"type": "Feature", oops}' + "\n"
+            + json.dumps(feature("B")) + "\n").encode()
+    results = parse([body])
+    assert [(number, error is None) for number, _, error in results] == [(1, True), (2, False), (3, True)]
@@ -0,0 +1,386 @@
+# Jumlah statement database per endpoint, lewat TestClient dengan koneksi palsu
+# (tanpa MySQL). Angka di sini adalah anggaran round trip per request, termasuk
+# START TRANSACTION / COMMIT: kenaikan berarti regresi (mis. query N+1 atau
+# cek-keberadaan terpisah).
+import datetime
+import re
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main_normalized
+import replicas
+from criteria_cache import criteria_cache
+from data_versions import parse_versions
+from decision_matrix import DecisionMatrix
+from http_cache import response_cache
+from location_id_cache import location_id_cache
+from ranking_cache import ranking_maintainer
+from replicas import get_read_db
+from shared_matrix import version_key
+from spatial_index import spatial_index
+
+UPDATED_AT = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+
+
+class FakeDatabase:
+    """Tabel di memori yang cukup untuk menjawab SQL endpoint; mencatat setiap execute"""
+
+    def __init__(self):
+        self.statements = []
+        self.versions = {'locations': 1, 'criteria': 1, 'evaluations': 1}
+        self.locations = {
+            1: {'id': 1, 'name': 'Alpha', 'address': 'Jl. A', 'latitude': 1.0, 'longitude': 2.0},
+            2: {'id': 2, 'name': 'Beta', 'address': 'Jl. B', 'latitude': 1.01, 'longitude': 2.0},
+        }
+        self.criteria = [{'id': 'c1', 'name': 'Akses', 'weight': 0.5, 'type': 'benefit'}]
+        self.evaluations = {(1, 'c1'): 80, (2, 'c1'): 60}
+        self.stored_rankings = []
+
+    def execute(self, sql, params):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        params = list(params or ())
+        if sql.startswith("SELECT resource, version"):
+            return [(resource, version, UPDATED_AT) for resource, version in self.versions.items()], 0
+        if sql.startswith("INSERT INTO data_versions"):
+            for resource in params:
+                self.versions[resource] += 1
+            return None, len(params)
+        if sql.startswith("SELECT l.*, e.criteria_id, e.value"):
+            ids = [value for value in params if isinstance(value, int)]
+            return self._join(ids), 0
+        if sql.startswith("SELECT * FROM criteria ORDER BY"):
+            return [dict(row) for row in self.criteria], 0
+        if sql.startswith("SELECT id FROM locations"):
+            return [(location_id,) for location_id in self.locations], 0
+        if sql.startswith("SELECT id, latitude, longitude FROM locations"):
+            return [(row['id'], row['latitude'], row['longitude']) for row in self.locations.values()], 0
+        if sql.startswith("SELECT id, name, address, latitude, longitude FROM locations WHERE id IN"):
+            return [dict(self.locations[i]) for i in params if i in self.locations], 0
+        if sql.startswith("INSERT INTO locations"):
+            location_id = max(self.locations) + 1
+            self.locations[location_id] = dict(zip(('name', 'address', 'latitude', 'longitude'), params),
+                                               id=location_id)
+            return None, 1
+        if sql.startswith("UPDATE locations"):
+            location_id = params[-1]
+            if location_id not in self.locations:
+                return None, 0
+            for field, value in zip(('name', 'address', 'latitude', 'longitude'), params):
+                if value is not None:
+                    self.locations[location_id][field] = value
+            return None, 1
+        if sql.startswith("INSERT INTO evaluations"):
+            location_id, criteria_id, value = params
+            previous = self.evaluations.get((location_id, criteria_id))
+            self.evaluations[(location_id, criteria_id)] = value
+            return None, 0 if previous == value else (1 if previous is None else 2)
+        if sql.startswith("DELETE FROM evaluations"):
+            return None, 1 if self.evaluations.pop(tuple(params), None) is not None else 0
+        if sql.startswith("SELECT id, name FROM locations ORDER BY id"):
+            return [(i, self.locations[i]['name']) for i in sorted(self.locations)], 0
+        if sql.startswith("SELECT id, weight, type FROM criteria ORDER BY id"):
+            return [(row['id'], row['weight'], row['type']) for row in self.criteria], 0
+        if sql.startswith("SELECT location_id, criteria_id, value FROM evaluations"):
+            return [(*key, value) for key, value in self.evaluations.items()], 0
+        if sql.startswith("SELECT r.rank_position"):
+            return [(rank, location_id, self.locations[location_id]['name'], score)
+                    for location_id, _, fingerprint, score, rank in self.stored_rankings
+                    if fingerprint == params[1] and rank > params[2]], 0
+        if sql.startswith("INSERT INTO calculation_results"):
+            self.stored_rankings.extend(params)
+            return None, len(params)
+        if sql.startswith("DELETE FROM calculation_results"):
+            return None, 0
+        raise AssertionError(f"Unexpected SQL: {sql}")
+
+    def _join(self, ids):
+        rows = []
+        for location_id in ids:
+            location = self.locations.get(location_id)
+            if location is None:
+                continue
+            values = [(key[1], value) for key, value in self.evaluations.items() if key[0] == location_id]
+            for criteria_id, value in values or [(None, None)]:
+                rows.append(dict(location, criteria_id=criteria_id, value=value))
+        return rows
+
+    def count(self, pattern=None):
+        return sum(1 for sql in self.statements if pattern is None or re.search(pattern, sql))
+
+
+class FakeCursor:
+    def __init__(self, database, dictionary=False):
+        self.database = database
+        self.dictionary = dictionary
+        self.rows = []
+        self.rowcount = -1
+        self.lastrowid = None
+        self.with_rows = False
+
+    def execute(self, sql, params=()):
+        rows, self.rowcount = self.database.execute(sql, params)
+        self.with_rows = rows is not None
+        self.rows = list(rows or [])
+        if sql.lstrip().startswith("INSERT INTO locations"):
+            self.lastrowid = max(self.database.locations)
+
+    def executemany(self, sql, rows):
+        self.execute(sql, rows)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, dictionary=False, prepared=False):
+        return FakeCursor(self.database, dictionary)
+
+    # Kontrol transaksi juga satu round trip ke server, jadi ikut dihitung
+    def start_transaction(self):
+        self.database.statements.append("START TRANSACTION")
+
+    def commit(self):
+        self.database.statements.append("COMMIT")
+
+    def rollback(self):
+        self.database.statements.append("ROLLBACK")
+
+
+@pytest.fixture
+def database():
+    database = FakeDatabase()
+    connection = FakeConnection(database)
+    app = main_normalized.app
+    app.dependency_overrides[main_normalized.get_db] = lambda: connection
+    app.dependency_overrides[get_read_db] = lambda: connection
+    for cache in (criteria_cache, spatial_index, location_id_cache, ranking_maintainer):
+        cache.invalidate()
+    response_cache.clear()
+    yield database
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(database):
+    return TestClient(main_normalized.app)
+
+
+def request(client, database, method, url, **kwargs):
+    """(response, jumlah statement) untuk satu request"""
+    before = len(database.statements)
+    response = client.request(method, url, **kwargs)
+    return response, len(database.statements) - before
+
+
+def load_ranking(database):
+    """IncrementalRanking di memori sesuai versi data palsu (seperti warm-up startup)"""
+    ids = sorted(database.locations)
+    matrix = DecisionMatrix(
+        np.array(ids), [database.locations[i]['name'] for i in ids], ['c1'], np.array([0.5]), np.array([True]),
+        np.array([[float(database.evaluations.get((i, 'c1'), 0))] for i in ids]),
+        np.array([[(i, 'c1') in database.evaluations] for i in ids]),
+    )
+    versions = parse_versions([(resource, version, UPDATED_AT) for resource, version in database.versions.items()])
+    ranking_maintainer.replace(matrix, version_key(versions), versions)
+
+
+def test_get_location_is_one_join(client, database):
+    response, statements = request(client, database, "GET", "/locations/1")
+    assert response.status_code == 200
+    assert response.json()['criteria'] == {'c1': 80}
+    assert statements == 1
+
+    response, statements = request(client, database, "GET", "/locations/99")
+    assert response.status_code == 404
+    assert statements == 1
+
+
+def test_location_batch_is_one_join(client, database):
+    response, statements = request(client, database, "POST", "/locations/batch", json={"ids": [2, 1, 99]})
+    assert response.status_code == 200
+    assert response.json()['missing'] == [99]
+    assert statements == 1
+
+
+def test_criteria_reads_versions_then_cache(client, database):
+    response, statements = request(client, database, "GET", "/criteria")
+    assert response.status_code == 200
+    assert statements == 2  # data_versions + criteria (cache kosong)
+
+    etag = response.headers['etag']
+    response, statements = request(client, database, "GET", "/criteria", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert statements == 1  # data_versions saja
+
+
+def test_nearby_reuses_spatial_index(client, database):
+    response, statements = request(client, database, "GET", "/locations/nearby?lat=1&lng=2&radius_km=5")
+    assert response.status_code == 200
+    assert statements == 3  # data_versions + titik index + baris lokasi
+
+    response, statements = request(client, database, "GET", "/locations/nearby?lat=1&lng=2&radius_km=5")
+    assert statements == 2
+    assert database.count("CRC32") == 0
+
+
+def test_rankings_from_memory(client, database):
+    load_ranking(database)
+    response, statements = request(client, database, "GET", "/rankings?limit=1")
+    assert response.status_code == 200
+    assert response.json()['results'][0]['location_id'] == 1
+    assert statements == 1  # data_versions saja
+
+
+def test_update_evaluation_keeps_ranking(client, database):
+    load_ranking(database)
+    response, statements = request(client, database, "PUT", "/evaluations",
+                                   json={"location_id": 2, "criteria_id": "c1", "value": 90})
+    assert response.status_code == 200
+    assert statements == 5  # START + upsert + bump + data_versions + COMMIT
+
+    response, statements = request(client, database, "GET", "/rankings?limit=1")
+    assert response.json()['results'][0]['location_id'] == 2
+    assert statements == 1
+
+    response, statements = request(client, database, "PUT", "/evaluations",
+                                   json={"location_id": 2, "criteria_id": "c1", "value": 90})
+    assert statements == 3  # nilai sama: START + upsert + COMMIT, tanpa bump
+
+
+def test_delete_evaluation(client, database):
+    response, statements = request(client, database, "DELETE", "/evaluations/1/c1")
+    assert response.status_code == 200
+    assert statements == 5  # START + delete + bump + data_versions + COMMIT
+
+    response, statements = request(client, database, "DELETE", "/evaluations/1/c1")
+    assert response.status_code == 404
+    assert statements == 3  # START + delete + COMMIT
+
+
+def test_evaluation_batch_reuses_reference_ids(client, database):
+    batch = {"evaluations": [{"location_id": 1, "criteria_id": "c1", "value": 10},
+                             {"location_id": 99, "criteria_id": "c1", "value": 10}]}
+    response, statements = request(client, database, "PUT", "/evaluations/batch", json=batch)
+    assert response.json()['written'] == 1
+    assert statements == 7  # data_versions + id lokasi + criteria, lalu START + upsert + bump + COMMIT
+
+    response, statements = request(client, database, "PUT", "/evaluations/batch", json=batch)
+    assert response.json()['written'] == 1
+    assert statements == 5  # id lokasi & criteria dari cache: hanya data_versions
+    assert database.count("SELECT id FROM locations") == 1
+
+
+def test_location_writes(client, database):
+    response, statements = request(client, database, "POST", "/locations",
+                                   json={"name": "Gamma", "address": "Jl. C", "latitude": 1.5, "longitude": 2.5})
+    assert response.status_code == 200
+    assert statements == 5  # START + insert + bump + data_versions + COMMIT
+
+    load_ranking(database)
+    response, statements = request(client, database, "PUT", "/locations/1", json={"name": "Alpha Baru"})
+    assert response.status_code == 200
+    assert statements == 6  # START + update + join untuk response + bump + data_versions + COMMIT
+
+    response, statements = request(client, database, "GET", "/rankings")
+    assert {row['name'] for row in response.json()['results']} >= {"Alpha Baru"}
+    assert statements == 1
+
+
+def test_async_get_location_is_one_join():
+    pytest.importorskip("aiomysql")
+    import async_routes
+    from db_async import get_async_read_db
+
+    database = FakeDatabase()
+
+    class AsyncCursor:
+        def __init__(self):
+            self.cursor = FakeCursor(database, dictionary=True)
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute(self, sql, params=()):
+            self.cursor.execute(sql, params)
+
+        async def fetchall(self):
+            return self.cursor.fetchall()
+
+    class AsyncConnection:
+        def cursor(self, *args):
+            return AsyncCursor()
+
+    app = FastAPI()
+    app.include_router(async_routes.router)
+    app.dependency_overrides[get_async_read_db] = lambda: AsyncConnection()
+    client = TestClient(app)
+
+    response = client.get("/locations/1")
+    assert response.status_code == 200
+    assert response.json()['criteria'] == {'c1': 80}
+    assert client.get("/locations/99").status_code == 404
+    assert database.count() == 2
+
+
+def test_replica_reads_never_store_replica_data(client, database, monkeypatch):
+    primary = FakeConnection(database)
+    replica_database = FakeDatabase()
+    replica_database.versions['evaluations'] = 0  # replica tertinggal satu write
+    main_normalized.app.dependency_overrides[get_read_db] = lambda: FakeConnection(replica_database)
+    monkeypatch.setattr(replicas, "is_primary", lambda conn: conn is primary)
+    monkeypatch.setattr(main_normalized, "is_primary", lambda conn: conn is primary)
+    monkeypatch.setattr(replicas, "pool", SimpleNamespace(connection=lambda: nullcontext(primary)))
+    primary_key = version_key(parse_versions(
+        [(resource, version, UPDATED_AT) for resource, version in database.versions.items()]))
+
+    response = client.get("/rankings")
+    assert response.status_code == 200
+    assert response.json()['fingerprint'] == primary_key
+    assert len(database.stored_rankings) == 2
+    assert replica_database.count("calculation_results") == 1  # hanya cek hasil tersimpan
+    assert replica_database.count("ORDER BY id") == 0  # matriks tidak dimuat dari replica
+
+    response, statements = request(client, replica_database, "GET", "/rankings")
+    assert response.json()['cached'] is True
+    assert statements == 2  # data_versions + calculation_results di replica, ranking dari memori primary
+
+    response = client.get("/criteria")
+    assert response.status_code == 200
+    assert criteria_cache.status()['loaded'] is False
+
+
+def test_matrix_snapshot_needs_data_versions_rows(database, tmp_path):
+    from shared_matrix import SharedMatrixStore
+
+    connection = FakeConnection(database)
+    store = SharedMatrixStore(str(tmp_path), "test")
+    matrix = store.get(connection, parse_versions([]))  # database baru: belum ada baris data_versions
+    assert matrix.shape == (2, 1)
+    assert not (tmp_path / "tofico-matrix-test.bin").exists()
+
+    rows = [(resource, version, UPDATED_AT) for resource, version in database.versions.items()]
+    store.get(connection, parse_versions(rows))
+    assert store.rebuilds == 1
+
+    # Database dibuat ulang dengan nomor versi yang sama: updated_at baris berbeda
+    store.get(connection, parse_versions([(resource, version, UPDATED_AT + 60) for resource, version, _ in rows]))
+    assert store.rebuilds == 2